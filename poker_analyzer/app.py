@@ -1,62 +1,230 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import json
 import logging
 import sys
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Optional
 
-# Set up logging configuration
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("poker_assistant.log")
-    ]
-)
-
+from config.settings import Settings, configure_logging
 from core.parser import HandHistoryParser
-from core.strategy import StrategyEngine
-from database.manager import DatabaseManager
-import json
+from models.card import CardSet
+from utils.metrics import METRICS
+
+# 本模块导入耗时；策略引擎、数据库等较重的模块在首次使用时才导入
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
 
 class PokerAssistant:
-    def __init__(self):
+    def __init__(self, workers: int = 0, advice_cache: str = None, advice_cache_size: int = 50000,
+                 db_path: str = "poker_history.db", fast_start: bool = False):
+        """advice_cache: 建议缓存快照文件，启动时加载、关闭时写回；None 表示不缓存
+        fast_start: 构造时立即返回，策略引擎、缓存快照和数据库由后台线程预热；
+        预热完成前到达的消息在首次使用处等待初始化
+        """
+        self._created_at = time.perf_counter()
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.metrics = METRICS
+        # 启动各阶段耗时（毫秒），后台或延迟创建的部分在完成时记录
+        self.startup = {"import": round(IMPORT_SECONDS * 1000, 2)}
         self.parser = HandHistoryParser()
-        self.strategy = StrategyEngine()
-        self.db = DatabaseManager()
-        self.logger.info("PokerAssistant initialized.")
+        self.db_path = db_path
+        self.advice_cache_path = advice_cache
+        self.advice_cache_size = advice_cache_size
+        self.advice_cache = None
+        self._db = None
+        self._strategy = None
+        self._init_lock = threading.RLock()
+        self._warmup = None
+        if fast_start:
+            self._warmup = threading.Thread(target=self._warm_up, name="assistant-warmup", daemon=True)
+            self._warmup.start()
+        else:
+            self._warm_up()
+        # 单桌的手牌追踪：当前街、本街下注者和建议针对的对手都取自这里
+        self._tracker = None
+        self.pool = None
+        if workers:
+            # 多进程模式：建议计算分发到进程池，对手统计以共享快照发布
+            with self._startup_phase("workers"):
+                from core.workers import AdvicePool
+                self.pool = AdvicePool(workers)
+                self.refresh_opponent_snapshot()
+                # 每次对手统计写入数据库后重新发布快照
+                self.db.flush_listeners.append(self.refresh_opponent_snapshot)
+        self.startup["init"] = round((time.perf_counter() - self._created_at) * 1000, 2)
+        self.logger.info("PokerAssistant initialized. Startup (ms): %s", self.startup)
+
+    @contextmanager
+    def _startup_phase(self, name: str):
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.startup[name] = round(elapsed * 1000, 2)
+        self.metrics.observe(f"startup_{name}", elapsed)
+
+    def _warm_up(self):
+        """创建策略引擎（含牌力查找表）、加载建议缓存快照、打开数据库"""
+        self.strategy
+        if self.advice_cache is not None:
+            with self._startup_phase("advice_cache"):
+                self.advice_cache.load()
+        self.db
+
+    @property
+    def strategy(self):
+        if self._strategy is None:
+            with self._init_lock:
+                if self._strategy is None:
+                    with self._startup_phase("strategy"):
+                        from core.strategy import StrategyEngine
+                        if self.advice_cache_path:
+                            from core.advice_cache import AdviceCache
+                            self.advice_cache = AdviceCache(self.advice_cache_size, self.advice_cache_path)
+                        self._strategy = StrategyEngine(advice_cache=self.advice_cache)
+        return self._strategy
+
+    @property
+    def db(self):
+        if self._db is None:
+            with self._init_lock:
+                if self._db is None:
+                    with self._startup_phase("db"):
+                        from database.manager import DatabaseManager
+                        # 对手动作先在内存中累计，批量 UPSERT 写入
+                        self._db = DatabaseManager(self.db_path, buffer_size=256, flush_interval=1.0)
+        return self._db
+
+    @property
+    def tracker(self):
+        if self._tracker is None:
+            with self._init_lock:
+                if self._tracker is None:
+                    from core.game_tracker import GameTracker
+                    self._tracker = GameTracker(history_size=100)
+        return self._tracker
+
+    def refresh_opponent_snapshot(self):
+        """把数据库中的对手统计重新发布给工作进程"""
+        if self.pool is not None:
+            self.pool.publish_opponents(self.db.get_all_opponent_stats())
+
+    def submit_pooled_advice(self, strategy_state: dict, opponent_stats: Optional[dict]) -> Future:
+        """多进程模式：把 prepare_round_change 解析好的对手统计随任务交给工作进程
+
+        与单进程路径使用同一份统计（含近期弃牌率和玩家资料的回退），建议缓存的键也用它；
+        命中时返回已完成的 Future。
+        """
+        future = Future()
+        advice = self.strategy.cached_advice(strategy_state, opponent_stats)
+        if advice is not None:
+            future.set_result(advice)
+            return future
+
+        def remember(done: Future):
+            # 先写缓存再完成外层 Future，调用方拿到结果时缓存已经更新
+            error = done.exception()
+            if error is not None:
+                future.set_exception(error)
+                return
+            self.strategy.remember(strategy_state, opponent_stats, done.result())
+            future.set_result(done.result())
+
+        self.pool.submit(strategy_state, opponent_stats=opponent_stats).add_done_callback(remember)
+        return future
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        if self._warmup is not None:
+            self._warmup.join()
+        if self.advice_cache is not None:
+            self.advice_cache.save()
+        if self._db is not None:
+            self._db.close()
+
+    def prepare_round_change(self, parsed: dict):
+        """更新对手数据并准备策略输入，返回 (展示用状态, 策略引擎状态, 对手统计)"""
+        board = parsed.get("board", CardSet())
+        hero_cards = parsed.get("hero_cards", CardSet())
+        game_state = {
+            "street": parsed.get("street"),
+            "pot": parsed.get("pot"),
+            "board": board.to_strings(),
+            "hero_cards": hero_cards.to_strings(),
+            "position": parsed.get("position"),
+            "facing_raise": bool(parsed.get("facing_raise"))
+        }
+
+        # 更新对手行为数据
+        for opponent in parsed.get("opponents", []):
+            self.db.update_opponent_stats(opponent["userId"], opponent["lastAction"], parsed.get("street"))
+
+        # 获取对手统计数据，弃牌率取近期衰减统计（对手当前位置的样本足够时按位置）
+        opponent_id = parsed.get("opponentId")
+        opponent_stats = self.db.get_opponent_stats(opponent_id)
+        fold_frequency = self.db.get_fold_frequency(opponent_id, parsed.get("opponentPosition"))
+        if fold_frequency is not None:
+            opponent_stats = {**(opponent_stats or {}), "fold_frequency": fold_frequency}
+
+        # 策略引擎直接使用紧凑的 CardSet，避免再从字符串解析；听牌摘要取自牌局追踪器
+        strategy_state = {**game_state, "board": board, "hero_cards": hero_cards, "draws": parsed.get("draws")}
+        return game_state, strategy_state, opponent_stats
 
     def process_message(self, message: str) -> dict:
         """处理单条消息"""
+        with self.metrics.timer("message"):
+            return self._process_message(message)
+
+    def _process_message(self, message: str) -> dict:
+        metrics = self.metrics
         try:
-            self.logger.debug(f"Processing message: {message}")
+            metrics.incr("messages")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Processing message: %s", message)
             
             # 解析消息
-            parsed = self.parser.parse_message(message)
+            errors = self.parser.stats["errors"]
+            with metrics.timer("parse"):
+                parsed = self.parser.parse_message(message)
             if not parsed:
+                # 解析器的错误计数没变说明是未处理的消息类型，不是格式错误
+                if self.parser.stats["errors"] == errors:
+                    metrics.incr("skipped_messages")
+                    self.logger.debug("跳过未处理的消息")
+                    return {"status": "skipped", "message": "未处理的消息类型"}
+                metrics.incr("parse_errors")
                 self.logger.error("消息解析失败")
                 return {"status": "error", "message": "消息解析失败"}
             
             # 简单消息处理
             if parsed.get("type") == "round_change":
-                game_state = {
-                    "street": parsed.get("street"),
-                    "pot": parsed.get("pot"),
-                    "board": [str(card) for card in parsed.get("board", [])],
-                    "hero_cards": [str(card) for card in parsed.get("hero_cards", [])],
-                    "position": parsed.get("position")
-                }
-
-                # 更新对手行为数据
-                for opponent in parsed.get("opponents", []):
-                    self.db.update_opponent_stats(opponent["userId"], opponent["lastAction"], parsed.get("street"))
-
-                # 获取对手统计数据
-                opponent_stats = self.db.get_opponent_stats(parsed.get("opponentId"))
+                # 先更新手牌状态，再从本手的动作记录取对手 ID 和是否面对加注
+                tracker = self.tracker
+                tracker.process_message(parsed)
+                tracker.annotate_round_change(parsed)
+                with metrics.timer("db"):
+                    game_state, strategy_state, opponent_stats = self.prepare_round_change(parsed)
 
                 # 获取策略建议
-                advice = self.strategy.get_advice(game_state, opponent_stats)
+                with metrics.timer("strategy"):
+                    if self.pool is not None:
+                        advice = self.submit_pooled_advice(strategy_state, opponent_stats).result()
+                    else:
+                        advice = self.strategy.get_advice(strategy_state, opponent_stats)
+                metrics.incr("advice")
+                if "first_advice" not in self.startup:
+                    self.startup["first_advice"] = round((time.perf_counter() - self._created_at) * 1000, 2)
+                    self.logger.info("First advice after %.1f ms.", self.startup["first_advice"])
 
-                self.logger.info(f"Game State: {game_state}")
-                self.logger.info(f"Advice: {advice}")
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("Game State: %s", game_state)
+                    self.logger.debug("Advice: %s", advice)
 
                 return {
                     "status": "success",
@@ -65,6 +233,27 @@ class PokerAssistant:
                     "advice": advice
                 }
 
+            if parsed.get("type") == "action" and parsed.get("user_id") is not None:
+                tracker = self.tracker
+                tracker.process_message(parsed)
+                hand = tracker.current_hand
+                # 位置按相对按钮的位置名记录，而不是原始座位号
+                with metrics.timer("db"):
+                    self.db.record_action(parsed["user_id"], parsed.get("action_type"),
+                                          hand.street if hand else None,
+                                          hand.position_of(parsed.get("position")) if hand else None)
+
+            if parsed.get("type") == "player_stats":
+                # 一条消息的全部玩家一次批量写入，值未变化的玩家跳过
+                with metrics.timer("db"):
+                    updated = self.db.profiles.ingest(parsed["stats"])
+                return {
+                    "status": "success",
+                    "message_type": "player_stats",
+                    "data": parsed,
+                    "updated": updated
+                }
+
             return {
                 "status": "success",
                 "message_type": parsed.get("type"),
@@ -72,11 +261,69 @@ class PokerAssistant:
             }
             
         except Exception as e:
-            self.logger.error(f"处理错误: {str(e)}", exc_info=True)
+            metrics.incr("errors")
+            self.logger.error("处理错误: %s", e, exc_info=True)
             return {"status": "error", "message": f"处理错误: {str(e)}"}
 
 if __name__ == "__main__":
-    assistant = PokerAssistant()
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="德州扑克助手")
+    arg_parser.add_argument("--serve", action="store_true", help="以 asyncio TCP 服务方式接收多桌消息流")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=9009)
+    arg_parser.add_argument("--workers", type=int, default=0, help="建议计算的工作进程数，0 表示在主进程内计算")
+    arg_parser.add_argument("--archive", help="完成的手牌写入该目录下的手牌历史归档")
+    arg_parser.add_argument("--history-size", type=int, default=100, help="每张桌在内存中保留的最近手牌数")
+    arg_parser.add_argument("--idle-timeout", type=float, default=600.0, help="牌桌空闲多少秒后被回收")
+    # 以下选项未指定时取 config/settings.py 中的默认值或 POKER_* 环境变量
+    arg_parser.add_argument("--advice-cache", help="建议缓存快照文件，重启后直接加载；传空字符串关闭缓存")
+    arg_parser.add_argument("--advice-cache-size", type=int)
+    arg_parser.add_argument("--db-path")
+    arg_parser.add_argument("--fast-start", action="store_true", default=None,
+                            help="数据库和策略引擎推迟到首次使用时创建，缓存快照在后台加载")
+    arg_parser.add_argument("--log-level", help="覆盖 POKER_LOG_LEVEL 环境变量")
+    arg_parser.add_argument("--log-file", help="日志文件，传空字符串只输出到终端")
+    arg_parser.add_argument("--profile", action="store_true", help="开启采样分析器，热点随指标一起输出")
+    arg_parser.add_argument("--metrics-interval", type=float, help="每隔多少秒把延迟指标写入日志")
+    arg_parser.add_argument("--metrics-file", help="指标快照写入该文件而不是日志")
+    args = arg_parser.parse_args()
+
+    settings = Settings.from_env(log_level=args.log_level, log_file=args.log_file, db_path=args.db_path,
+                                 advice_cache=args.advice_cache, advice_cache_size=args.advice_cache_size,
+                                 fast_start=args.fast_start)
+    # 日志经队列由后台线程写出，调用方不阻塞在终端/文件 I/O 上
+    configure_logging(settings)
+    if args.profile:
+        METRICS.start_profiler()
+    dumper = None
+    if args.metrics_interval:
+        from utils.metrics import MetricsDumper
+        dumper = MetricsDumper(METRICS, args.metrics_interval, args.metrics_file).start()
+
+    if args.serve:
+        import asyncio
+        from core.table_registry import TrackerRegistry
+        from database.hand_archive import HandArchive
+        from server import IngestionServer
+
+        archive = HandArchive(args.archive) if args.archive else None
+        trackers = TrackerRegistry(archive, history_size=args.history_size, idle_timeout=args.idle_timeout)
+        assistant = PokerAssistant(args.workers, settings.advice_cache, settings.advice_cache_size,
+                                   settings.db_path, settings.fast_start)
+        try:
+            asyncio.run(IngestionServer(assistant, args.host, args.port, trackers=trackers).serve_forever())
+        finally:
+            trackers.close()
+            assistant.close()
+            if archive is not None:
+                archive.close()
+            if dumper is not None:
+                dumper.stop()
+        sys.exit(0)
+
+    assistant = PokerAssistant(args.workers, settings.advice_cache, settings.advice_cache_size,
+                               settings.db_path, settings.fast_start)
     print("德州扑克助手已启动")
     print("请输入游戏消息 (输入 'quit' 退出):")
 
@@ -95,3 +342,7 @@ if __name__ == "__main__":
             break
         except Exception as e:
             print(f"\n错误: {e}")
+
+    assistant.close()
+    if dumper is not None:
+        dumper.stop()
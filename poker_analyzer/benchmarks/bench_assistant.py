@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture
+def assistant(tmp_path, monkeypatch):
+    # PokerAssistant 在当前目录创建数据库，切到临时目录避免污染工作区
+    monkeypatch.chdir(tmp_path)
+    from app import PokerAssistant
+    instance = PokerAssistant()
+    yield instance
+    instance.close()
+
+
+def test_process_message_throughput(benchmark, assistant, corpus):
+    results = benchmark.pedantic(lambda: [assistant.process_message(line) for line in corpus],
+                                 rounds=3, iterations=1)
+    assert all(r["status"] == "success" for r in results)
@@ -0,0 +1,41 @@
+import pytest
+
+from database.manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "bench.db"), buffer_size=256)
+    yield manager
+    manager.close()
+
+
+def test_record_actions_and_flush(benchmark, db, events):
+    actions = [e for e in events if e["type"] == "action"]
+
+    def run():
+        for action in actions:
+            db.record_action(action["user_id"], action["action_type"], "preflop")
+        db.flush()
+    benchmark(run)
+    assert db.get_opponent_stats(actions[0]["user_id"])["hands_played"] > 0
+
+
+def test_stat_lookups_cached(benchmark, db, events):
+    users = sorted({e["user_id"] for e in events if e["type"] == "action"})
+    for user in users:
+        db.record_action(user, "CALL", "preflop")
+    db.flush()
+    results = benchmark(lambda: [db.get_opponent_stats(u) for u in users])
+    assert all(results)
+
+
+def test_stat_lookups_uncached(benchmark, tmp_path, events):
+    users = sorted({e["user_id"] for e in events if e["type"] == "action"})
+    db = DatabaseManager(str(tmp_path / "bench.db"), cache_size=0)
+    for user in users:
+        db.record_action(user, "CALL", "preflop")
+    db.flush()
+    results = benchmark(lambda: [db.get_opponent_stats(u) for u in users])
+    db.close()
+    assert all(results)
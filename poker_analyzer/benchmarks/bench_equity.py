@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from core.calculator import EXACT_CACHE, evaluate, evaluate_batch, exact_equity, monte_carlo_equity
+from core.ranges import RANGE_CACHE, range_equity
+from models.card import INDEX_TO_CODE
+
+_RNG = np.random.default_rng(0)
+_HANDS = _RNG.random((2000, 52)).argsort(axis=1)[:, :7]
+_HAND_CODES = [[INDEX_TO_CODE[i] for i in row] for row in _HANDS.tolist()]
+
+
+def test_evaluate_scalar(benchmark):
+    values = benchmark(lambda: [evaluate(codes) for codes in _HAND_CODES])
+    assert len(values) == len(_HAND_CODES)
+
+
+def test_evaluate_batch(benchmark):
+    values = benchmark(evaluate_batch, _HANDS)
+    assert len(values) == len(_HANDS)
+
+
+def test_monte_carlo_equity_flop(benchmark):
+    rng = np.random.default_rng(1)
+    result = benchmark(monte_carlo_equity, [101, 201], [302, 407, 113], 2, samples=5000, rng=rng)
+    assert result.samples == 5000
+
+
+@pytest.mark.parametrize("board", [[302, 407, 113, 212], [302, 407, 113, 212, 309]], ids=["turn", "river"])
+def test_exact_equity(benchmark, board):
+    EXACT_CACHE.clear()
+    result = benchmark(exact_equity, [101, 201], board, 1)
+    assert result.exact
+
+
+def test_range_equity_uncached(benchmark):
+    def run():
+        RANGE_CACHE.clear()
+        return range_equity([110, 212], [302, 407, 113, 112], 0.3)
+    assert 0 < benchmark(run) < 1
@@ -0,0 +1,38 @@
+from core.parser import HandHistoryParser
+from models.card import decode_card_set, decode_cards
+
+
+def _parse_all(lines):
+    parser = HandHistoryParser()
+    return [parser.parse_message(line) for line in lines]
+
+
+def test_parse_round_change(benchmark, round_changes):
+    results = benchmark(_parse_all, round_changes)
+    assert all(r["type"] == "round_change" for r in results)
+
+
+def test_parse_action(benchmark, actions):
+    results = benchmark(_parse_all, actions)
+    assert all(r["type"] == "action" for r in results)
+
+
+def test_parse_profile(benchmark, profiles):
+    results = benchmark(_parse_all, profiles)
+    assert all(r["type"] == "player_stats" for r in results)
+
+
+def test_parse_stream_bytes(benchmark, corpus):
+    lines = [line.encode() for line in corpus]
+    results = benchmark(lambda: list(HandHistoryParser().parse_stream(lines, batch_size=256)))
+    assert sum(len(batch) for batch in results) == len(corpus)
+
+
+def test_decode_cards(benchmark, events):
+    boards = [list(e["board"]) + list(e["hero_cards"]) for e in events if e["type"] == "round_change"]
+    benchmark(lambda: [decode_cards(codes) for codes in boards])
+
+
+def test_decode_card_set(benchmark, events):
+    boards = [list(e["board"]) + list(e["hero_cards"]) for e in events if e["type"] == "round_change"]
+    benchmark(lambda: [decode_card_set(codes) for codes in boards])
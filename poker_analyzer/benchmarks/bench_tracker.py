@@ -0,0 +1,23 @@
+from core.game_tracker import GameTracker
+from core.table_registry import TrackerRegistry
+
+
+def _track(events):
+    tracker = GameTracker()
+    for event in events:
+        tracker.process_message(event)
+    return tracker
+
+
+def test_tracker_updates(benchmark, events):
+    tracker = benchmark(_track, events)
+    assert len(tracker.hand_history) > 0
+
+
+def test_registry_updates(benchmark, events):
+    def run():
+        registry = TrackerRegistry(idle_timeout=None)
+        for i, event in enumerate(events):
+            registry.process_message(f"t{i % 8}", event)
+        return registry
+    assert len(benchmark(run)) == 8
@@ -0,0 +1,33 @@
+import pytest
+
+from benchmarks.corpus import load_corpus
+from core.parser import HandHistoryParser
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="session")
+def corpus():
+    return load_corpus()
+
+
+@pytest.fixture(scope="session")
+def round_changes():
+    return load_corpus("round_change")
+
+
+@pytest.fixture(scope="session")
+def actions():
+    return load_corpus("action")
+
+
+@pytest.fixture(scope="session")
+def profiles():
+    return load_corpus("profile")
+
+
+@pytest.fixture(scope="session")
+def events(corpus):
+    """预先解析好的事件序列，供不测解析本身的基准使用"""
+    parser = HandHistoryParser()
+    return [e for e in (parser.parse_message(line) for line in corpus) if e]
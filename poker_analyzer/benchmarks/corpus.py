@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from models.card import INDEX_TO_CODE
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus.jsonl")
+MSG_TYPES = {
+    "round_change": "WP_roundChangeNotify",
+    "action": "WP_actionNotify",
+    "profile": "WP_updateUserProfileNotify",
+}
+_ACTION_TYPES = ["FOLD", "CHECK", "CALL", "BET", "RAISE"]
+_ACTION_WEIGHTS = [0.35, 0.2, 0.25, 0.1, 0.1]
+
+
+def generate_corpus(hands: int = 200, seed: int = 0, players: int = 200) -> List[str]:
+    """生成与线上消息格式一致的原始消息，按手牌顺序排列
+
+    每手牌依次为四条 WP_roundChangeNotify，每街之间若干 WP_actionNotify；
+    每 10 手附带一条 WP_updateUserProfileNotify。
+    """
+    rng = np.random.default_rng(seed)
+    ordered = []
+    for hand in range(hands):
+        deck = [INDEX_TO_CODE[i] for i in rng.permutation(52)]
+        hero, board = deck[:2], deck[2:7]
+        seats = rng.choice(np.arange(1, players + 1), 6, replace=False).tolist()
+        pot = 3
+        for street, shown in (("PRE_FLOP", 0), ("FLOP", 3), ("TURN", 4), ("RIVER", 5)):
+            message = json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+                "round": street, "totalPot": pot,
+                "dealPublicCards": board[:shown] + [0] * (5 - shown),
+                "userCardsList": [{"userId": seats[0], "handCards": hero}] +
+                                 [{"userId": s, "handCards": []} for s in seats[1:]],
+            }})
+            ordered.append(message)
+            for seat in seats[1:1 + int(rng.integers(1, 5))]:
+                action = _ACTION_TYPES[rng.choice(len(_ACTION_TYPES), p=_ACTION_WEIGHTS)]
+                amount = int(rng.integers(1, 10)) * 2 if action in ("CALL", "BET", "RAISE") else 0
+                pot += amount
+                message = json.dumps({"msgType": "WP_actionNotify", "msgBody": {"actionList": [
+                    {"userId": seat, "actionType": action, "actionScore": amount, "seatNum": seats.index(seat)}
+                ]}})
+                ordered.append(message)
+        if hand % 10 == 0:
+            message = json.dumps({"msgType": "WP_updateUserProfileNotify", "msgBody": {"listData": [
+                {"userId": s, "totalHand": int(rng.integers(10, 5000)), "poolingHandNum": int(rng.integers(1, 1000)),
+                 "winNum": int(rng.integers(0, 500)), "showdownNum": int(rng.integers(0, 300))}
+                for s in seats
+            ]}})
+            ordered.append(message)
+    return ordered
+
+
+def load_corpus(kind: Optional[str] = None, path: str = CORPUS_PATH) -> List[str]:
+    """读取录制格式的消息语料；kind 为 MSG_TYPES 中的键时只返回该类消息"""
+    with open(path) as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    if kind is None:
+        return lines
+    marker = f'"msgType": "{MSG_TYPES[kind]}"'
+    return [line for line in lines if marker in line]
+
+
+def write_corpus(path: str = CORPUS_PATH, hands: int = 200, seed: int = 0) -> None:
+    with open(path, "w") as f:
+        f.write("\n".join(generate_corpus(hands, seed)) + "\n")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="生成基准测试用的消息语料")
+    arg_parser.add_argument("--output", default=CORPUS_PATH)
+    arg_parser.add_argument("--hands", type=int, default=200)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    write_corpus(args.output, args.hands, args.seed)
+    print(f"语料已写入 {args.output}")
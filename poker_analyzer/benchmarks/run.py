@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+STORAGE = os.path.join(BENCH_DIR, ".results")
+
+
+def main(argv=None) -> int:
+    """记录基线 (save) 或与最近一次基线比较 (compare)，退化超过阈值时返回非零"""
+    arg_parser = argparse.ArgumentParser(description="热点路径基准测试")
+    arg_parser.add_argument("mode", choices=["run", "save", "compare"], nargs="?", default="run")
+    arg_parser.add_argument("--threshold", type=int, default=15, help="中位数允许的退化百分比")
+    arg_parser.add_argument("--baseline", help="比较的基线编号，默认最近一次保存的结果")
+    arg_parser.add_argument("-k", dest="keyword", help="只运行名称匹配的基准")
+    args = arg_parser.parse_args(argv)
+
+    options = [BENCH_DIR, "-q", f"--benchmark-storage=file://{STORAGE}"]
+    if args.keyword:
+        options += ["-k", args.keyword]
+    if args.mode == "save":
+        options.append("--benchmark-save=baseline")
+    elif args.mode == "compare":
+        options += [f"--benchmark-compare={args.baseline}" if args.baseline else "--benchmark-compare",
+                    f"--benchmark-compare-fail=median:{args.threshold}%"]
+    return pytest.main(options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
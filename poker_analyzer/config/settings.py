@@ -0,0 +1,38 @@
+import os
+from dataclasses import dataclass, fields, replace
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Settings:
+    """运行配置，默认值可由 POKER_<字段名大写> 环境变量覆盖（如 POKER_LOG_LEVEL=DEBUG）"""
+    log_level: str = "INFO"
+    log_file: Optional[str] = "poker_assistant.log"  # 空字符串表示只输出到终端
+    db_path: str = "poker_history.db"
+    advice_cache: Optional[str] = "advice_cache.json"
+    advice_cache_size: int = 50000
+    # 快速启动：数据库和策略引擎在首次使用时才创建，建议缓存快照在后台线程加载
+    fast_start: bool = False
+
+    @classmethod
+    def from_env(cls, environ=os.environ, **overrides) -> 'Settings':
+        """从环境变量读取，overrides 中不为 None 的值优先（通常来自命令行参数）"""
+        values = {}
+        for field in fields(cls):
+            raw = environ.get(f"POKER_{field.name.upper()}")
+            if raw is None:
+                continue
+            if field.type is bool:
+                values[field.name] = raw.lower() in ("1", "true", "yes", "on")
+            elif field.type is int:
+                values[field.name] = int(raw)
+            else:
+                values[field.name] = raw or None
+        settings = cls(**values)
+        return replace(settings, **{k: v for k, v in overrides.items() if v is not None})
+
+
+def configure_logging(settings: Settings):
+    """按配置启动异步日志；在入口处调用，而不是在模块导入时"""
+    from utils.log import setup_logging
+    return setup_logging(settings.log_level, settings.log_file or None)
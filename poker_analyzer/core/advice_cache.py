@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+from core.calculator import canonical_spot
+from utils.cache import LRUCache
+from utils.metrics import METRICS
+
+SNAPSHOT_VERSION = 2
+
+
+def advice_key(street, hero, board, num_opponents: int, facing_raise: bool, width: Optional[float],
+               bluff: bool = False) -> tuple:
+    """建议缓存的键：街、花色同构规范化后的手牌和公共牌、对手数、是否面对加注、对手范围桶、
+    对手是否常弃牌（可半诈唬）
+
+    只包含 StrategyEngine 计算胜率和动作时实际用到的输入，位置等不影响建议的字段不进入键，
+    以免降低命中率。
+    """
+    hero, cards = canonical_spot(hero, board)
+    return street, hero, cards, num_opponents, bool(facing_raise), width, bool(bluff)
+
+
+class AdviceCache:
+    """有界 LRU 建议缓存，可快照到磁盘并在启动时重新加载
+
+    值只保存与花色无关的字段（动作、胜率、牌型名等）；依赖具体牌的听牌信息每次重新计算。
+    """
+
+    def __init__(self, maxsize: int = 50000, path: Optional[str] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.loaded = 0
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: tuple) -> Optional[dict]:
+        with self._lock:
+            advice = self._cache.get(key)
+        METRICS.incr("advice_cache_hits" if advice is not None else "advice_cache_misses")
+        return dict(advice) if advice is not None else None
+
+    def put(self, key: tuple, advice: dict) -> None:
+        with self._lock:
+            self._cache.put(key, dict(advice))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = self._cache.stats()
+        stats["loaded"] = self.loaded
+        return stats
+
+    def save(self, path: Optional[str] = None) -> int:
+        """按 LRU 顺序（最近使用的在后）写出快照，先写临时文件再原子替换；返回条目数"""
+        path = path or self.path
+        with self._lock:
+            entries = [[list(key[:1]) + [list(key[1]), list(key[2])] + list(key[3:]), advice]
+                       for key, advice in self._cache.items()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.logger.info("Advice cache snapshot: %d entries -> %s", len(entries), path)
+        return len(entries)
+
+    def load(self, path: Optional[str] = None) -> int:
+        """从快照恢复；文件不存在或版本不符时忽略，返回加载的条目数"""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning("Advice cache snapshot unreadable: %s", e)
+            return 0
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return 0
+        with self._lock:
+            for (street, hero, cards, *rest), advice in snapshot["entries"]:
+                self._cache.put((street, tuple(hero), tuple(cards), *rest), advice)
+            self.loaded = len(self._cache)
+        self.logger.info("Advice cache loaded %d entries from %s", self.loaded, path)
+        return self.loaded
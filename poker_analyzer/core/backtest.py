@@ -0,0 +1,246 @@
+import argparse
+import itertools
+import time
+from collections import defaultdict
+from dataclasses import asdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.calculator import THREE_OF_A_KIND, TWO_PAIR, evaluate, hand_category, hand_strength
+from core.preflop import get_preflop_table, hand_class
+from core.strategy import STREETS, Strategy, StrategyParams
+from models.card import to_codes
+
+FOLD, CALL, RAISE = 0, 1, 2
+ACTION_NAMES = ["FOLD", "CALL", "RAISE"]
+STREET_INDEX = {"preflop": 0, "flop": 1, "turn": 2, "river": 3}
+
+# 每个决策点一行的列定义
+COLUMNS = {
+    "street": np.int8,          # 0=翻前 1=翻牌 2=转牌 3=河牌
+    "category": np.int8,        # 成牌类别，翻前为 -1
+    "draw": np.bool_,           # 是否有听牌
+    "percentile": np.float32,   # 翻前起手牌强度百分位
+    "range_equity": np.float32, # 翻前对对手入池范围的胜率，未知为 NaN
+    "equity": np.float32,       # 用于 EV 估算的胜率
+    "pot": np.float32,
+    "to_call": np.float32,
+    "opp_pfr": np.float32,
+    "opp_vpip": np.float32,
+    "opp_fold_freq": np.float32,
+}
+
+
+class DecisionTable:
+    """按列存储的决策点，供向量化回测使用"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["street"])
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @classmethod
+    def from_rows(cls, rows: List[dict]) -> 'DecisionTable':
+        return cls({name: np.array([r[name] for r in rows], dtype=dtype) for name, dtype in COLUMNS.items()})
+
+    @classmethod
+    def from_events(cls, events: Iterable[dict]) -> 'DecisionTable':
+        """由 HandHistoryParser 解析出的事件流构建决策表
+
+        每个带 hero 手牌的 round_change 是一个决策点。对手画像取最近一次行动的对手（跳过 hero 自己，
+        hero 由 round_change 的 hero_id 确定），只使用该决策之前的动作计数，避免前视偏差。
+        """
+        builder = _DecisionBuilder()
+        for event in events:
+            builder.add(event)
+        return cls.from_rows(builder.rows)
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.columns)
+
+    @classmethod
+    def load(cls, path: str) -> 'DecisionTable':
+        with np.load(path) as data:
+            return cls({name: data[name] for name in COLUMNS})
+
+
+class _DecisionBuilder:
+    def __init__(self):
+        self.rows: List[dict] = []
+        self.table = get_preflop_table()
+        self.strategy = Strategy()
+        # user_id -> [动作数, 弃牌数, 翻前加注数, 翻前主动入池数]
+        self.counts = defaultdict(lambda: [0, 0, 0, 0])
+        self.street = "preflop"
+        self.hero_id = None
+        self.last_opponent = None
+        self.last_amount = 0
+
+    def add(self, event: dict) -> None:
+        if event.get("type") == "action":
+            self._add_action(event)
+        elif event.get("type") == "round_change":
+            self._add_decision(event)
+
+    def _add_action(self, event: dict) -> None:
+        if self.hero_id is not None and event.get("user_id") == self.hero_id:
+            # hero 自己的动作既不是对手画像，也不是需要跟注的金额
+            return
+        action = str(event.get("action_type", "")).upper()
+        counts = self.counts[event.get("user_id")]
+        counts[0] += 1
+        counts[1] += action == "FOLD"
+        if self.street == "preflop":
+            counts[2] += action == "RAISE"
+            counts[3] += action in ("CALL", "BET", "RAISE")
+        self.last_opponent = event.get("user_id")
+        self.last_amount = event.get("amount", 0) or 0
+
+    def _add_decision(self, event: dict) -> None:
+        street = STREETS.get(event.get("street"), event.get("street"))
+        self.street = street
+        if event.get("hero_id") is not None:
+            self.hero_id = event["hero_id"]
+        hero = to_codes(event.get("hero_cards", ()))
+        board = to_codes(event.get("board", ()))
+        if street not in STREET_INDEX or len(hero) != 2:
+            return
+
+        counts = self.counts[self.last_opponent] if self.last_opponent is not None else [0, 0, 0, 0]
+        acted = max(counts[0], 1)
+        row = {
+            "street": STREET_INDEX[street],
+            "category": -1,
+            "draw": False,
+            "percentile": np.nan,
+            "range_equity": np.nan,
+            "pot": event.get("pot", 0) or 0,
+            "to_call": self.last_amount,
+            "opp_pfr": counts[2] / acted,
+            "opp_vpip": counts[3] / acted,
+            "opp_fold_freq": counts[1] / acted,
+        }
+        if street == "preflop":
+            index = hand_class(*hero)
+            if self.table is not None:
+                row["percentile"] = self.table.hand_percentile(index)
+                row["equity"] = self.table.equity(index, 1)
+                if row["opp_vpip"]:
+                    row["range_equity"] = self.table.equity_vs_range(index, row["opp_vpip"])
+            else:
+                row["equity"] = 0.5
+        else:
+            row["category"] = hand_category(evaluate(hero + board))
+            row["draw"] = street != "river" and self.strategy.has_draw_potential(hero + board)
+            row["equity"] = hand_strength(hero, board)
+        self.rows.append(row)
+        self.last_amount = 0
+
+
+def decide(table: DecisionTable, params: StrategyParams) -> np.ndarray:
+    """与 Strategy.suggest_action 相同的规则，对全部决策点一次性给出动作"""
+    street = table.street
+    actions = np.full(len(table), FOLD, dtype=np.int8)
+
+    # 翻前：查表规则，偷盲优先
+    pre = street == 0
+    has_range = pre & (table.opp_vpip > 0)
+    by_pct = pre & ~has_range
+    actions[has_range & (table.range_equity >= params.range_call_equity)] = CALL
+    actions[has_range & (table.range_equity >= params.range_raise_equity)] = RAISE
+    actions[by_pct & (table.percentile < params.preflop_call_pct)] = CALL
+    actions[by_pct & (table.percentile < params.preflop_raise_pct)] = RAISE
+    actions[pre & (table.opp_pfr < params.steal_pfr)] = RAISE
+
+    # 翻牌后：按优先级从低到高覆盖
+    post = street > 0
+    river = street == 3
+    bluff = post & (table.opp_fold_freq > params.semi_bluff_fold)
+    actions[bluff] = RAISE
+    actions[post & ~river & table.draw] = CALL
+    actions[river & (table.category == TWO_PAIR)] = CALL
+    actions[post & (table.category >= THREE_OF_A_KIND)] = RAISE
+    return actions
+
+
+def action_evs(table: DecisionTable) -> np.ndarray:
+    """每个决策点三种动作的 EV 代理值 (3, N)
+
+    跟注: eq*(P+C) - C；加注投入 R=max(2C, P/2)，对手按弃牌率放弃，
+    否则按胜率摊牌: f*P + (1-f)*(eq*(P+2R) - R)。
+    """
+    eq = table.equity.astype(np.float64)
+    pot = table.pot.astype(np.float64)
+    to_call = table.to_call.astype(np.float64)
+    fold = table.opp_fold_freq.astype(np.float64)
+    raise_size = np.maximum(2 * to_call, pot / 2)
+    ev_call = eq * (pot + to_call) - to_call
+    ev_raise = fold * pot + (1 - fold) * (eq * (pot + 2 * raise_size) - raise_size)
+    return np.stack([np.zeros_like(eq), ev_call, ev_raise])
+
+
+def evaluate_strategy(table: DecisionTable, params: StrategyParams,
+                      evs: Optional[np.ndarray] = None) -> dict:
+    """回测单组参数，返回 EV 代理指标"""
+    evs = action_evs(table) if evs is None else evs
+    actions = decide(table, params)
+    ev = np.take_along_axis(evs, actions[None, :].astype(np.intp), axis=0)[0]
+    n = max(len(table), 1)
+    return {
+        "decisions": len(table),
+        "total_ev": float(ev.sum()),
+        "ev_per_decision": float(ev.sum() / n),
+        "ev_by_street": {s: float(ev[table.street == i].sum()) for s, i in STREET_INDEX.items()},
+        "action_freq": {name: float((actions == i).sum() / n) for i, name in enumerate(ACTION_NAMES)},
+    }
+
+
+def parameter_grid(**ranges: Sequence[float]) -> List[StrategyParams]:
+    """笛卡尔积生成参数组合，未指定的字段取默认值"""
+    names = list(ranges)
+    return [StrategyParams(**dict(zip(names, values))) for values in itertools.product(*ranges.values())]
+
+
+def sweep(table: DecisionTable, grid: Iterable[StrategyParams]) -> List[Tuple[StrategyParams, dict]]:
+    """扫描参数组合，按总 EV 从高到低排序；各动作的 EV 只计算一次"""
+    evs = action_evs(table)
+    results = [(params, evaluate_strategy(table, params, evs)) for params in grid]
+    results.sort(key=lambda r: r[1]["total_ev"], reverse=True)
+    return results
+
+
+if __name__ == "__main__":
+    from core.parser import HandHistoryParser
+
+    arg_parser = argparse.ArgumentParser(description="对录制的手牌历史回测 Strategy 阈值")
+    arg_parser.add_argument("log", help="按行分隔的原始消息日志，或 DecisionTable 的 .npz 文件")
+    arg_parser.add_argument("--save", help="把决策表保存为 .npz 以便重复回测")
+    arg_parser.add_argument("--top", type=int, default=10)
+    args = arg_parser.parse_args()
+
+    if args.log.endswith(".npz"):
+        decisions = DecisionTable.load(args.log)
+    else:
+        decisions = DecisionTable.from_events(HandHistoryParser().parse_file(args.log))
+    if args.save:
+        decisions.save(args.save)
+
+    grid = parameter_grid(
+        steal_pfr=[0.0, 0.05, 0.1, 0.15, 0.2],
+        semi_bluff_fold=[0.4, 0.5, 0.6, 0.7, 0.8],
+        preflop_raise_pct=[0.05, 0.1, 0.15, 0.2],
+        preflop_call_pct=[0.3, 0.4, 0.5],
+    )
+    start = time.perf_counter()
+    ranked = sweep(decisions, grid)
+    print(f"{len(grid)} configs x {len(decisions)} decisions in {time.perf_counter() - start:.1f}s")
+    for params, metrics in ranked[:args.top]:
+        print(f"{metrics['ev_per_decision']:+.4f}  {asdict(params)}")
@@ -0,0 +1,559 @@
+import argparse
+import logging
+import os
+import struct
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations, permutations
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.card import CODE_TO_INDEX, INDEX_TO_CODE, CardSet
+from utils.cache import LRUCache
+
+# 牌型类别（数值越大越强）
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+HAND_NAMES = {
+    HIGH_CARD: "High Card",
+    ONE_PAIR: "One Pair",
+    TWO_PAIR: "Two Pair",
+    THREE_OF_A_KIND: "Three of a Kind",
+    STRAIGHT: "Straight",
+    FLUSH: "Flush",
+    FULL_HOUSE: "Full House",
+    FOUR_OF_A_KIND: "Four of a Kind",
+    STRAIGHT_FLUSH: "Straight Flush",
+}
+
+# 牌力值布局: 类别占高位，其后最多 5 个 4 位的点数（0=2 ... 12=A）
+CATEGORY_SHIFT = 20
+
+
+def _pack(category: int, ranks: Sequence[int]) -> int:
+    value = category
+    for i in range(5):
+        value = (value << 4) | (ranks[i] if i < len(ranks) else 0)
+    return value
+
+
+def _straight_top(mask: int) -> int:
+    """返回 13 位点数掩码中最大顺子的顶张点数，没有顺子返回 -1"""
+    for top in range(12, 3, -1):
+        window = 0b11111 << (top - 4)
+        if mask & window == window:
+            return top
+    # A-2-3-4-5
+    if mask & 0b1000000001111 == 0b1000000001111:
+        return 3
+    return -1
+
+
+def _ranks_desc(mask: int) -> List[int]:
+    return [r for r in range(12, -1, -1) if mask >> r & 1]
+
+
+def _build_flush_table() -> List[int]:
+    """13 位同花点数掩码 -> 同花/同花顺牌力值"""
+    table = [0] * 8192
+    for mask in range(8192):
+        if bin(mask).count("1") < 5:
+            continue
+        top = _straight_top(mask)
+        if top >= 0:
+            table[mask] = _pack(STRAIGHT_FLUSH, [top])
+        else:
+            table[mask] = _pack(FLUSH, _ranks_desc(mask)[:5])
+    return table
+
+
+def _value_from_counts(counts: Sequence[int]) -> int:
+    """按各点数张数计算最佳非同花牌力值（仅用于建表）"""
+    by_count = {4: [], 3: [], 2: [], 1: []}
+    mask = 0
+    for r in range(12, -1, -1):
+        if counts[r]:
+            by_count[counts[r]].append(r)
+            mask |= 1 << r
+    quads, trips, pairs = by_count[4], by_count[3], by_count[2]
+
+    def kickers(exclude, n):
+        return [r for r in range(12, -1, -1) if counts[r] and r not in exclude][:n]
+
+    if quads:
+        return _pack(FOUR_OF_A_KIND, [quads[0]] + kickers({quads[0]}, 1))
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1:] + pairs)
+        return _pack(FULL_HOUSE, [trips[0], pair])
+    top = _straight_top(mask)
+    if top >= 0:
+        return _pack(STRAIGHT, [top])
+    if trips:
+        return _pack(THREE_OF_A_KIND, [trips[0]] + kickers({trips[0]}, 2))
+    if len(pairs) >= 2:
+        return _pack(TWO_PAIR, pairs[:2] + kickers(set(pairs[:2]), 1))
+    if pairs:
+        return _pack(ONE_PAIR, [pairs[0]] + kickers({pairs[0]}, 3))
+    return _pack(HIGH_CARD, kickers(set(), 5))
+
+
+def _build_rank_table() -> Dict[int, int]:
+    """点数多重集键（各点数 5 进制计数）-> 非同花牌力值，覆盖 5/6/7 张"""
+    table = {}
+    counts = [0] * 13
+
+    def fill(rank: int, remaining: int, total: int):
+        if rank == 13:
+            if total >= 5:
+                key = 0
+                for r in range(12, -1, -1):
+                    key = key * 5 + counts[r]
+                table[key] = _value_from_counts(counts)
+            return
+        for c in range(min(4, remaining) + 1):
+            counts[rank] = c
+            fill(rank + 1, remaining - c, total + c)
+        counts[rank] = 0
+
+    fill(0, 7, 0)
+    return table
+
+
+# 游戏编码 suit*100+value（value 1=A, 2..13）-> 查表所需的各项分量
+RANK_OF_CODE = [-1] * 500
+SUIT_OF_CODE = [-1] * 500
+RANK_KEY = [0] * 500
+SUIT_KEY = [0] * 500
+for _suit in range(1, 5):
+    for _value in range(1, 14):
+        _code = _suit * 100 + _value
+        _rank = 12 if _value == 1 else _value - 2
+        RANK_OF_CODE[_code] = _rank
+        SUIT_OF_CODE[_code] = _suit - 1
+        RANK_KEY[_code] = 5 ** _rank
+        SUIT_KEY[_code] = 1 << (3 * (_suit - 1))
+
+# 花色计数键（每花色 3 位）-> 达到同花的花色（0..3），否则不在表中
+FLUSH_SUIT = {}
+for _n in range(5, 8):
+    for _combo in combinations(range(_n + 3), 3):
+        # 用隔板法枚举 4 个花色的张数分布
+        _bounds = (-1,) + _combo + (_n + 3,)
+        _split = [_bounds[i + 1] - _bounds[i] - 1 for i in range(4)]
+        for _s, _c in enumerate(_split):
+            if _c >= 5:
+                FLUSH_SUIT[sum(c << (3 * i) for i, c in enumerate(_split))] = _s
+
+# 标量评估用：点数键与花色键打包成一个整数（低 12 位为花色键），一次累加得到两者；
+# 花色键直接作为列表下标判断同花，每张牌在所属花色的 13 位段内占一位
+SUIT_KEY_BITS = 12
+HAND_KEY = [RANK_KEY[c] << SUIT_KEY_BITS | SUIT_KEY[c] for c in range(500)]
+FLUSH_SUIT_OF_KEY = [-1] * (1 << SUIT_KEY_BITS)
+for _key, _s in FLUSH_SUIT.items():
+    FLUSH_SUIT_OF_KEY[_key] = _s
+SUITED_RANK_BIT = [0] * 500
+for _code in range(500):
+    if RANK_OF_CODE[_code] >= 0:
+        SUITED_RANK_BIT[_code] = 1 << (RANK_OF_CODE[_code] + 13 * SUIT_OF_CODE[_code])
+
+DEFAULT_TABLES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "data", "evaluator_tables.bin")
+# 文件头: 魔数, 版本, 点数表条目数；其后为 int32 的同花表 (8192)、点数键 (升序)、点数牌力值
+_TABLES_HEADER = struct.Struct("<4sHI")
+_TABLES_MAGIC = b"EVTB"
+_TABLES_VERSION = 1
+
+
+def _read_tables(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, entries = _TABLES_HEADER.unpack_from(data, 0)
+    if magic != _TABLES_MAGIC or version != _TABLES_VERSION:
+        raise ValueError(f"无效的牌力查找表: {path}")
+    arrays = np.frombuffer(data, dtype=np.int32, offset=_TABLES_HEADER.size).astype(np.int64)
+    if len(arrays) != 8192 + 2 * entries:
+        raise ValueError(f"牌力查找表长度不符: {path}")
+    return arrays[:8192], arrays[8192:8192 + entries], arrays[8192 + entries:]
+
+
+def _write_tables(path: str, flush: np.ndarray, keys: np.ndarray, values: np.ndarray) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_TABLES_HEADER.pack(_TABLES_MAGIC, _TABLES_VERSION, len(keys)))
+        f.write(np.concatenate([flush, keys, values]).astype(np.int32).tobytes())
+    os.replace(tmp_path, path)
+
+
+def build_tables() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """现场构建 (同花表, 点数键, 点数牌力值)，约 1 秒"""
+    flush = np.array(_build_flush_table(), dtype=np.int64)
+    rank_table = _build_rank_table()
+    keys = np.array(sorted(rank_table), dtype=np.int64)
+    values = np.array([rank_table[k] for k in keys.tolist()], dtype=np.int64)
+    return flush, keys, values
+
+
+def generate_tables(path: str = DEFAULT_TABLES_PATH) -> None:
+    """构建牌力查找表并写入二进制文件（与翻前胜率表一样作为构建步骤运行）"""
+    _write_tables(path, *build_tables())
+
+
+def load_tables(path: Optional[str] = DEFAULT_TABLES_PATH) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(同花表, 点数键, 点数牌力值)；读取预生成的表文件，缺失或损坏时在内存中构建，不写文件"""
+    if path and os.path.exists(path):
+        try:
+            return _read_tables(path)
+        except (OSError, ValueError, struct.error) as e:
+            logging.getLogger(__name__).warning("Evaluator tables unreadable, building in memory: %s", e)
+    return build_tables()
+
+
+_NP_FLUSH_TABLE, _NP_RANK_KEYS, _NP_RANK_VALUES = load_tables()
+FLUSH_TABLE = _NP_FLUSH_TABLE.tolist()
+RANK_TABLE = dict(zip(_NP_RANK_KEYS.tolist(), _NP_RANK_VALUES.tolist()))
+
+
+def _make_evaluate():
+    # 查找表绑定为闭包变量，热路径上不做全局名字查找
+    hand_key, flush_suit_of_key, rank_table = HAND_KEY, FLUSH_SUIT_OF_KEY, RANK_TABLE
+    suited_rank_bit, flush_table = SUITED_RANK_BIT, FLUSH_TABLE
+    suit_mask = (1 << SUIT_KEY_BITS) - 1
+
+    def evaluate(codes: Sequence[int]) -> int:
+        """评估 5~7 张牌（游戏编码）的最佳牌力值，数值越大越强"""
+        key = 0
+        for c in codes:
+            key += hand_key[c]
+        suit = flush_suit_of_key[key & suit_mask]
+        if suit < 0:
+            return rank_table[key >> SUIT_KEY_BITS]
+        # 7 张以内出现同花时不可能同时组成葫芦或四条
+        mask = 0
+        for c in codes:
+            mask |= suited_rank_bit[c]
+        return flush_table[mask >> (13 * suit) & 0x1FFF]
+
+    return evaluate
+
+
+evaluate = _make_evaluate()
+
+
+def hand_category(value: int) -> int:
+    """从牌力值中取出牌型类别"""
+    return value >> CATEGORY_SHIFT
+
+
+def hand_name(value: int) -> str:
+    return HAND_NAMES[hand_category(value)]
+
+
+def evaluate_many(hands: Iterable[Sequence[int]]) -> List[int]:
+    """批量评估多手牌"""
+    return [evaluate(h) for h in hands]
+
+
+# ---- 向量化评估（NumPy）----
+# 牌索引 0..51 与 models.card 的紧凑表示一致
+DECK_CODES = INDEX_TO_CODE
+INDEX_OF_CODE = CODE_TO_INDEX
+
+_NP_RANK_KEY = np.array([RANK_KEY[c] for c in DECK_CODES], dtype=np.int64)
+_NP_SUIT_KEY = np.array([SUIT_KEY[c] for c in DECK_CODES], dtype=np.int64)
+_NP_SUIT = np.array([SUIT_OF_CODE[c] for c in DECK_CODES], dtype=np.int64)
+_NP_RANK_BIT = np.array([1 << RANK_OF_CODE[c] for c in DECK_CODES], dtype=np.int64)
+_NP_HAND_KEY = np.array([HAND_KEY[c] for c in DECK_CODES], dtype=np.int64)
+_NP_SUITED_RANK_BIT = np.array([SUITED_RANK_BIT[c] for c in DECK_CODES], dtype=np.int64)
+_NP_FLUSH_SUIT_OF_KEY = np.array(FLUSH_SUIT_OF_KEY, dtype=np.int64)
+
+
+def evaluate_batch(indexes: np.ndarray) -> np.ndarray:
+    """批量评估牌索引矩阵 (N, 5~7)，返回每行的牌力值"""
+    rank_key = _NP_RANK_KEY[indexes].sum(axis=1)
+    suit_key = _NP_SUIT_KEY[indexes].sum(axis=1)
+    # 含重复牌的行（调用方随后会屏蔽）可能超出表范围，截断以免越界
+    values = _NP_RANK_VALUES[np.minimum(np.searchsorted(_NP_RANK_KEYS, rank_key), len(_NP_RANK_KEYS) - 1)]
+
+    flush_suit = np.full(len(indexes), -1, dtype=np.int64)
+    for s in range(4):
+        flush_suit[(suit_key >> (3 * s)) & 7 >= 5] = s
+    rows = np.nonzero(flush_suit >= 0)[0]
+    if len(rows):
+        cards = indexes[rows]
+        bits = np.where(_NP_SUIT[cards] == flush_suit[rows, None], _NP_RANK_BIT[cards], 0)
+        values[rows] = _NP_FLUSH_TABLE[np.bitwise_or.reduce(bits, axis=1)]
+    return values
+
+
+def evaluate_outer(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """left (N, a) 与 right (M, b) 的每一对拼成一手牌（a + b 为 5~7）评估，返回 (N, M) 牌力值
+
+    键和同花位都是逐牌相加，两侧各自求和后广播相加，不必展开 N*M 行的牌索引。
+    两侧不同的点数组合很少，只对它们的两两组合查点数表，再按下标展开。
+    含重复牌的组合值无意义，由调用方屏蔽。
+    """
+    left_key, right_key = _NP_HAND_KEY[left].sum(axis=1), _NP_HAND_KEY[right].sum(axis=1)
+    left_ranks, li = np.unique(left_key >> SUIT_KEY_BITS, return_inverse=True)
+    right_ranks, ri = np.unique(right_key >> SUIT_KEY_BITS, return_inverse=True)
+    index = np.searchsorted(_NP_RANK_KEYS, left_ranks[:, None] + right_ranks[None, :])
+    values = _NP_RANK_VALUES[np.minimum(index, len(_NP_RANK_KEYS) - 1)][li.reshape(-1, 1), ri.reshape(1, -1)]
+
+    suit_mask = (1 << SUIT_KEY_BITS) - 1
+    flush_suit = _NP_FLUSH_SUIT_OF_KEY[(left_key & suit_mask)[:, None] + (right_key & suit_mask)[None, :]]
+    li, ri = np.nonzero(flush_suit >= 0)
+    if len(li):
+        bits = _NP_SUITED_RANK_BIT[left].sum(axis=1)[li] + _NP_SUITED_RANK_BIT[right].sum(axis=1)[ri]
+        values[li, ri] = _NP_FLUSH_TABLE[bits >> (13 * flush_suit[li, ri]) & 0x1FFF]
+    return values
+
+
+@dataclass
+class EquityResult:
+    equity: float
+    ci_low: float
+    ci_high: float
+    samples: int
+    std_error: float = 0.0
+    exact: bool = False
+
+
+def _showdown_share(hero: np.ndarray, opponents: np.ndarray) -> np.ndarray:
+    """hero (N,) 与对手 (N, k) 摊牌，返回 hero 在每个样本中分得的底池份额"""
+    best = opponents.max(axis=1)
+    ties = (opponents == best[:, None]).sum(axis=1)
+    return np.where(hero > best, 1.0, np.where(hero == best, 1.0 / (ties + 1), 0.0))
+
+
+def monte_carlo_equity(
+    hero_cards: Sequence[int],
+    board: Sequence[int] = (),
+    num_opponents: int = 1,
+    samples: Optional[int] = 10000,
+    time_budget: Optional[float] = None,
+    batch_size: int = 2000,
+    rng: Optional[np.random.Generator] = None,
+) -> EquityResult:
+    """蒙特卡洛估算 hero 对 N 个随机手牌对手的胜率
+
+    以 2-D 数组批量发出剩余公共牌和对手手牌并批量评估。
+    samples 和 time_budget（秒）任一用尽即停止，返回胜率及 95% 置信区间。
+    有时间预算时批大小随对手数缩小，之后按已测得的每样本耗时取剩余时间内能完成的量，
+    超出预算的部分不超过一个小批次。
+    """
+    if samples is None and time_budget is None:
+        raise ValueError("samples 与 time_budget 至少指定一个")
+    rng = rng or np.random.default_rng()
+    hero = [INDEX_OF_CODE[c] for c in hero_cards]
+    known_board = [INDEX_OF_CODE[c] for c in board]
+    live = np.array((CardSet.full_deck() - CardSet.from_indices(hero + known_board)).indices(), dtype=np.int64)
+    board_missing = 5 - len(known_board)
+    need = board_missing + 2 * num_opponents
+    if need > len(live):
+        raise ValueError("剩余牌不足以发给所有对手")
+
+    started = time.perf_counter()
+    deadline = started + time_budget if time_budget is not None else None
+    # 每个样本的评估量与对手数成正比，首批按对手数缩小，用来测速
+    min_batch = max(batch_size // (4 * (num_opponents + 1)), 50)
+    size = max(batch_size // (num_opponents + 1), min_batch) if deadline is not None else batch_size
+    total = 0.0
+    total_sq = 0.0
+    n = 0
+    while True:
+        if samples is not None:
+            size = min(size, samples - n)
+        if size <= 0:
+            break
+        order = rng.random((size, len(live))).argsort(axis=1)[:, :need]
+        drawn = live[order]
+        full_board = np.concatenate(
+            [np.broadcast_to(np.array(known_board, dtype=np.int64), (size, len(known_board))),
+             drawn[:, :board_missing]], axis=1)
+        hero_values = evaluate_batch(np.concatenate(
+            [np.broadcast_to(np.array(hero, dtype=np.int64), (size, 2)), full_board], axis=1))
+        opp_values = np.empty((size, num_opponents), dtype=np.int64)
+        for i in range(num_opponents):
+            hole = drawn[:, board_missing + 2 * i:board_missing + 2 * i + 2]
+            opp_values[:, i] = evaluate_batch(np.concatenate([hole, full_board], axis=1))
+        share = _showdown_share(hero_values, opp_values)
+        total += share.sum()
+        total_sq += (share * share).sum()
+        n += size
+        if deadline is not None:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # 按目前的每样本耗时估算剩余时间还能算多少，不足一个小批次就停止
+            size = min(batch_size, int((deadline - now) * n / (now - started)))
+            if size < min_batch:
+                break
+        else:
+            size = batch_size
+
+    equity = float(total / n)
+    variance = max(total_sq / n - equity * equity, 0.0)
+    std_error = float((variance / n) ** 0.5)
+    return EquityResult(
+        equity=equity,
+        ci_low=max(0.0, equity - 1.96 * std_error),
+        ci_high=min(1.0, equity + 1.96 * std_error),
+        samples=n,
+        std_error=std_error,
+    )
+
+
+def hand_strength(hero_cards: Sequence[int], board: Sequence[int]) -> float:
+    """当前公共牌下 hero 胜过随机一手对手牌的比例（平局记一半），不考虑后续发牌"""
+    hero = [INDEX_OF_CODE[c] for c in hero_cards]
+    known = [INDEX_OF_CODE[c] for c in board]
+    live = np.array((CardSet.full_deck() - CardSet.from_indices(hero + known)).indices(), dtype=np.int64)
+    ci, cj = _combos(len(live))
+    known_cols = np.broadcast_to(np.array(known, dtype=np.int64), (len(ci), len(known)))
+    opp_values = evaluate_batch(np.concatenate([live[ci][:, None], live[cj][:, None], known_cols], axis=1))
+    hero_value = evaluate(list(hero_cards) + list(board))
+    return float(((opp_values < hero_value).sum() + 0.5 * (opp_values == hero_value).sum()) / len(ci))
+
+
+# ---- 精确枚举 ----
+# 精确枚举支持单挑和三人底池、翻牌及以后；实时决策只在转牌/河牌走精确枚举
+EXACT_MAX_OPPONENTS = 2
+EXACT_MIN_BOARD = 4
+EXACT_CACHE = LRUCache(maxsize=50000)
+_SUIT_PERMUTATIONS = list(permutations(range(1, 5)))
+
+
+def canonical_spot(hero_cards: Sequence[int], board: Sequence[int]) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """花色同构的规范形式：在 24 种花色置换中取字典序最小的 (手牌, 公共牌)"""
+    best = None
+    for perm in _SUIT_PERMUTATIONS:
+        hero = tuple(sorted(perm[c // 100 - 1] * 100 + c % 100 for c in hero_cards))
+        cards = tuple(sorted(perm[c // 100 - 1] * 100 + c % 100 for c in board))
+        if best is None or (hero, cards) < best:
+            best = (hero, cards)
+    return best
+
+
+@lru_cache(maxsize=None)
+def _combos(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """n 张活牌中所有两张组合的位置"""
+    return np.triu_indices(n, 1)
+
+
+@lru_cache(maxsize=None)
+def _combo_card_matrix(n: int) -> np.ndarray:
+    """(组合数, n) 的 0/1 矩阵，标记每个组合包含哪两张活牌"""
+    ci, cj = _combos(n)
+    matrix = np.zeros((len(ci), n))
+    rows = np.arange(len(ci))
+    matrix[rows, ci] = 1
+    matrix[rows, cj] = 1
+    return matrix
+
+
+def _disjoint_pairs(mask: np.ndarray, card_matrix: np.ndarray) -> np.ndarray:
+    """每行 mask 选中的组合里互不冲突的无序组合对数
+
+    两个不同组合最多共用一张牌，所以冲突对数 = Σ_牌 C(含该牌的组合数, 2)。
+    """
+    selected = mask.sum(axis=1).astype(np.float64)
+    per_card = mask.astype(np.float64) @ card_matrix
+    return selected * (selected - 1) / 2 - (per_card * (per_card - 1) / 2).sum(axis=1)
+
+
+def exact_equity(hero_cards: Sequence[int], board: Sequence[int], num_opponents: int = 1) -> EquityResult:
+    """枚举所有剩余公共牌和对手手牌，精确计算 hero 对随机手牌的胜率"""
+    if not 1 <= num_opponents <= EXACT_MAX_OPPONENTS or len(board) < 3:
+        raise ValueError(f"不支持 {num_opponents} 个对手、{len(board)} 张公共牌的精确枚举")
+
+    hero = np.array([INDEX_OF_CODE[c] for c in hero_cards], dtype=np.int64)
+    known = [INDEX_OF_CODE[c] for c in board]
+    live = np.array((CardSet.full_deck() - CardSet.from_indices(hero.tolist() + known)).indices(), dtype=np.int64)
+    ci, cj = _combos(len(live))
+    runouts = np.array(list(combinations(range(len(live)), 5 - len(known))), dtype=np.int64)
+    runouts = runouts.reshape(len(runouts), 5 - len(known))
+
+    total = 0.0
+    count = 0
+    chunk = max(1, 150000 // len(ci))
+    for start in range(0, len(runouts), chunk):
+        part = runouts[start:start + chunk]
+        size = len(part)
+        full_board = np.concatenate(
+            [np.broadcast_to(np.array(known, dtype=np.int64), (size, len(known))), live[part]], axis=1)
+        hero_values = evaluate_batch(np.concatenate([np.broadcast_to(hero, (size, 2)), full_board], axis=1))
+        # (size, 组合数, 7)：每种补牌下所有对手手牌组合
+        rows = np.concatenate([
+            np.broadcast_to(live[ci][None, :, None], (size, len(ci), 1)),
+            np.broadcast_to(live[cj][None, :, None], (size, len(ci), 1)),
+            np.broadcast_to(full_board[:, None, :], (size, len(ci), 5)),
+        ], axis=2)
+        opp_values = evaluate_batch(rows.reshape(-1, 7)).reshape(size, len(ci))
+        valid = np.ones((size, len(ci)), dtype=bool)
+        for k in range(part.shape[1]):
+            pos = part[:, k:k + 1]
+            valid &= (ci[None, :] != pos) & (cj[None, :] != pos)
+
+        if num_opponents == 1:
+            hero_col = hero_values[:, None]
+            share = np.where(hero_col > opp_values, 1.0, np.where(hero_col == opp_values, 0.5, 0.0))
+            total += share[valid].sum()
+            count += int(valid.sum())
+        else:
+            # 两个对手：按与 hero 的大小关系把组合分组，用组合计数代替逐对枚举
+            card_matrix = _combo_card_matrix(len(live))
+            hero_col = hero_values[:, None]
+            below = _disjoint_pairs(valid & (opp_values < hero_col), card_matrix)
+            at_most = _disjoint_pairs(valid & (opp_values <= hero_col), card_matrix)
+            both_tie = _disjoint_pairs(valid & (opp_values == hero_col), card_matrix)
+            one_tie = at_most - below - both_tie
+            total += (below + one_tie / 2 + both_tie / 3).sum()
+            count += int(round(_disjoint_pairs(valid, card_matrix).sum()))
+
+    equity = float(total / count)
+    return EquityResult(equity=equity, ci_low=equity, ci_high=equity, samples=count, exact=True)
+
+
+def cached_exact_equity(hero_cards: Sequence[int], board: Sequence[int], num_opponents: int = 1) -> EquityResult:
+    """按花色同构规范形式缓存的精确胜率"""
+    hero, cards = canonical_spot(hero_cards, board)
+    key = (hero, cards, num_opponents)
+    result = EXACT_CACHE.get(key)
+    if result is None:
+        result = exact_equity(hero, cards, num_opponents)
+        EXACT_CACHE.put(key, result)
+    return result
+
+
+def supports_exact(board: Sequence[int], num_opponents: int) -> bool:
+    return 1 <= num_opponents <= EXACT_MAX_OPPONENTS and len(board) >= EXACT_MIN_BOARD
+
+
+def calculate_equity(
+    hero_cards: Sequence[int],
+    board: Sequence[int] = (),
+    num_opponents: int = 1,
+    samples: Optional[int] = 10000,
+    time_budget: Optional[float] = None,
+) -> EquityResult:
+    """可精确枚举时查缓存/枚举，否则回退到蒙特卡洛"""
+    if supports_exact(board, num_opponents):
+        return cached_exact_equity(hero_cards, board, num_opponents)
+    return monte_carlo_equity(hero_cards, board, num_opponents, samples=samples, time_budget=time_budget)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="生成牌力评估查找表")
+    arg_parser.add_argument("--output", default=DEFAULT_TABLES_PATH)
+    args = arg_parser.parse_args()
+    generate_tables(args.output)
+    print(f"牌力查找表已写入 {args.output}")
@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from core.calculator import RANK_OF_CODE, SUIT_OF_CODE
+from models.card import CODE_TO_INDEX, INDEX_TO_STR
+
+# 顺子窗口按 14 位排列：位置 0 是当作最小牌的 A，位置 r+1 是牌点 r（0=2 … 12=A）
+NUM_WINDOWS = 10
+ACE = 12
+
+
+def _positions(rank: int) -> tuple:
+    return (rank + 1, 0) if rank == ACE else (rank + 1,)
+
+
+def _rank_at(position: int) -> int:
+    return ACE if position == 0 else position - 1
+
+
+class _Counts:
+    """一组牌的花色计数、牌点位掩码和每个顺子窗口内的不同牌点数，逐张 O(1) 更新"""
+
+    __slots__ = ("suits", "ranks", "windows")
+
+    def __init__(self):
+        self.suits = [0, 0, 0, 0]
+        self.ranks = 0
+        self.windows = [0] * NUM_WINDOWS
+
+    def add(self, code: int) -> None:
+        self.suits[SUIT_OF_CODE[code]] += 1
+        rank = RANK_OF_CODE[code]
+        if self.ranks >> rank & 1:
+            return
+        self.ranks |= 1 << rank
+        for position in _positions(rank):
+            for window in range(max(0, position - 4), min(NUM_WINDOWS - 1, position) + 1):
+                self.windows[window] += 1
+
+    def missing(self, window: int) -> Optional[int]:
+        """窗口内缺的一个牌点（窗口恰有 4 个牌点时）"""
+        for position in range(window, window + 5):
+            rank = _rank_at(position)
+            if not self.ranks >> rank & 1:
+                return rank
+        return None
+
+
+class DrawAnalyzer:
+    """单手牌的听牌/补牌分析，随公共牌到来增量更新
+
+    同时维护 hero+公共牌 和 仅公共牌 两组计数：前者判断 hero 的听牌，
+    后者判断公共牌本身已成型、hero 手牌只起阻断作用的情况。
+    """
+
+    __slots__ = ("hero", "board", "_all", "_board")
+
+    def __init__(self, hero: Sequence[int], board: Iterable[int] = ()):
+        self.hero = tuple(hero)
+        self.board: List[int] = []
+        self._all = _Counts()
+        self._board = _Counts()
+        for code in self.hero:
+            self._all.add(code)
+        self.update(board)
+
+    def add_card(self, code: int) -> None:
+        self.board.append(code)
+        self._all.add(code)
+        self._board.add(code)
+
+    def update(self, board: Iterable[int]) -> bool:
+        """只追加尚未见过的公共牌；board 不包含已知公共牌（换了一手牌）时返回 False"""
+        board = list(board)
+        seen = set(self.board)
+        if not seen.issubset(board):
+            return False
+        for code in board:
+            if code not in seen:
+                self.add_card(code)
+        return True
+
+    @property
+    def cards_to_come(self) -> int:
+        return max(5 - len(self.board), 0)
+
+    @property
+    def made_flush(self) -> bool:
+        return max(self._all.suits) >= 5
+
+    @property
+    def made_straight(self) -> bool:
+        return max(self._all.windows) >= 5
+
+    @property
+    def flush_suit(self) -> Optional[int]:
+        """hero 参与的四张同花听牌的花色（0~3）"""
+        if not self.cards_to_come or self.made_flush:
+            return None
+        for suit, count in enumerate(self._all.suits):
+            if count == 4 and self._board.suits[suit] < 4:
+                return suit
+        return None
+
+    @property
+    def straight_ranks(self) -> List[int]:
+        """能补成顺子的牌点（hero 参与的窗口）"""
+        if not self.cards_to_come or self.made_straight:
+            return []
+        ranks = []
+        for window, count in enumerate(self._all.windows):
+            if count == 4 and self._board.windows[window] < 4:
+                rank = self._all.missing(window)
+                if rank not in ranks:
+                    ranks.append(rank)
+        return ranks
+
+    @property
+    def straight_draw(self) -> Optional[str]:
+        ranks = self.straight_ranks
+        if len(ranks) >= 2:
+            return "open_ended"
+        return "gutshot" if ranks else None
+
+    def outs(self) -> List[int]:
+        """补成同花或顺子的牌（游戏编码），两者重叠的牌只算一次"""
+        known = set(self.hero) | set(self.board)
+        outs = set()
+        suit = self.flush_suit
+        if suit is not None:
+            outs.update(code for code in range((suit + 1) * 100 + 1, (suit + 1) * 100 + 14) if code not in known)
+        for rank in self.straight_ranks:
+            value = 1 if rank == ACE else rank + 2
+            outs.update(s * 100 + value for s in range(1, 5) if s * 100 + value not in known)
+        return sorted(outs)
+
+    def blockers(self) -> Dict[str, List[int]]:
+        """hero 手牌阻断对手的坚果同花（该花色 A）和公共牌上三张即成的顺子"""
+        nut_flush = [c for c in self.hero
+                     if RANK_OF_CODE[c] == ACE and self._board.suits[SUIT_OF_CODE[c]] >= 3]
+        straight_ranks = set()
+        for window, count in enumerate(self._board.windows):
+            if count >= 3:
+                straight_ranks.update(_rank_at(p) for p in range(window, window + 5)
+                                      if not self._board.ranks >> _rank_at(p) & 1)
+        straight = [c for c in self.hero if RANK_OF_CODE[c] in straight_ranks]
+        return {"nut_flush": nut_flush, "straight": straight}
+
+    @property
+    def has_draw(self) -> bool:
+        """同花听牌或两头/双卡顺听牌（至少两个补牌点）"""
+        return self.flush_suit is not None or len(self.straight_ranks) >= 2
+
+    def summary(self) -> dict:
+        outs = self.outs()
+        return {
+            "flush_draw": self.flush_suit is not None,
+            "straight_draw": self.straight_draw,
+            "outs": len(outs),
+            "out_cards": [INDEX_TO_STR[CODE_TO_INDEX[c]] for c in outs],
+            "blockers": {name: [INDEX_TO_STR[CODE_TO_INDEX[c]] for c in cards]
+                         for name, cards in self.blockers().items()},
+        }
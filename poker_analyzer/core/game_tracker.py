@@ -1,17 +1,49 @@
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
-from models.card import Card, decode_cards
+from typing import Deque, Dict, List, Optional, Set
+from core.draws import DrawAnalyzer
+from core.parser import AGGRESSIVE_ACTIONS
+from models.card import CardSet
 from datetime import datetime
 
+# 按距离按钮的座位偏移排列的位置名
+POSITIONS = ["BTN", "SB", "BB", "UTG", "MP", "CO"]
+
+
+def position_names(num_players):
+    """num_players 人桌按距离按钮的座位偏移排列的位置名，缺少的是 UTG 一侧的位置"""
+    if num_players == 2:
+        return ["BTN", "BB"]
+    return POSITIONS[:3] + POSITIONS[3:][len(POSITIONS) - num_players:]
+
+
 @dataclass
 class HandState:
     street: str
     pot: float
-    board: List[Card]
+    board: CardSet
     current_bet: float
-    hero_cards: List[Card] = field(default_factory=list)
+    hero_cards: CardSet = field(default_factory=CardSet)
     last_action: Optional[dict] = None
     position: str = "BTN"  # 默认位置，实际应该从数据中获取
+    actions: List[dict] = field(default_factory=list)
+    table_id: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    # 下注账本：本街每个玩家已投入的筹码、整手累计投入，以及已应用的事件序号
+    street_bets: Dict[object, float] = field(default_factory=dict)
+    contributions: Dict[object, float] = field(default_factory=dict)
+    seq: int = 0
+    # 听牌分析随公共牌增量更新，转牌/河牌沿用翻牌的计算结果
+    draws: Optional[DrawAnalyzer] = None
+    # 当前公共牌下的听牌摘要（河牌后为 None），随 round_change 交给策略引擎
+    draw_summary: Optional[dict] = None
+    # 本手已弃牌的玩家，不再作为建议针对的对手
+    folded: Set[object] = field(default_factory=set)
+    # 本手发到牌的玩家、行动过的玩家座位，以及由第一个翻前动作推出的按钮座位
+    players: List[object] = field(default_factory=list)
+    seats: Dict[object, object] = field(default_factory=dict)
+    button: Optional[int] = None
     
     @classmethod
     def from_dict(cls, data: dict) -> 'HandState':
@@ -19,16 +51,129 @@ class HandState:
         return cls(
             street=data.get("street", ""),
             pot=data.get("pot", 0),
-            board=data.get("board", []),
+            board=data.get("board", CardSet()),
             current_bet=data.get("current_bet", 0),
-            hero_cards=data.get("hero_cards", []),
-            position=data.get("position", "BTN")
+            hero_cards=data.get("hero_cards", CardSet()),
+            position=data.get("position", "BTN"),
+            actions=list(data.get("actions", [])),
+            table_id=data.get("table_id"),
+            started_at=data.get("started_at", time.time()),
+            players=list(data.get("players", ()))
         )
 
+    def apply_action(self, action: dict) -> dict:
+        """记录一个动作并增量更新账本，返回变化的字段"""
+        user_id, amount = action.get("user_id"), action.get("amount", 0) or 0
+        self.actions.append({
+            "street": self.street,
+            "user_id": user_id,
+            "action_type": action.get("action_type"),
+            "amount": amount
+        })
+        self.last_action = action
+        if action.get("action_type") == "FOLD":
+            self.folded.add(user_id)
+        seat = action.get("position")
+        if seat is not None:
+            self.seats[user_id] = seat
+            if self.button is None and self.street == "PRE_FLOP" and len(self.actions) == 1:
+                self._infer_button(seat)
+        self.seq += 1
+        delta = {"seq": self.seq, "action": self.actions[-1]}
+        if amount:
+            bet = self.street_bets[user_id] = self.street_bets.get(user_id, 0) + amount
+            self.contributions[user_id] = self.contributions.get(user_id, 0) + amount
+            self.pot += amount
+            delta["pot"] = self.pot
+            if bet > self.current_bet:
+                self.current_bet = delta["current_bet"] = bet
+        return delta
+
+    def _infer_button(self, first_seat) -> None:
+        """消息里没有按钮位置：翻前第一个行动的是 UTG（三人桌为按钮，单挑为小盲即按钮），
+        假定座位号连续，由此反推按钮座位"""
+        num_players = len(self.players)
+        if 2 <= num_players <= len(POSITIONS):
+            self.button = (first_seat - (3 if num_players > 2 else 0)) % num_players
+
+    def position_of(self, seat) -> Optional[str]:
+        """座位相对按钮的位置名，按钮未知时返回 None"""
+        if seat is None or self.button is None:
+            return None
+        return position_names(len(self.players))[(seat - self.button) % len(self.players)]
+
+    def facing_raise(self, hero_id=None) -> bool:
+        """本街是否有主角以外的玩家下注或加注"""
+        for action in reversed(self.actions):
+            if action["street"] != self.street:
+                return False
+            if action["action_type"] in AGGRESSIVE_ACTIONS and action["user_id"] != hero_id:
+                return True
+        return False
+
+    def villain(self, hero_id=None):
+        """建议针对的对手：本街最后一个下注/加注者，否则本手最近行动且未弃牌的对手"""
+        latest = None
+        for action in reversed(self.actions):
+            user_id = action["user_id"]
+            if user_id is None or user_id == hero_id or user_id in self.folded:
+                continue
+            if action["street"] == self.street and action["action_type"] in AGGRESSIVE_ACTIONS:
+                return user_id
+            if latest is None:
+                latest = user_id
+        return latest
+
+    def apply_round_change(self, data: dict) -> dict:
+        """进入新的一街：以消息中的底池为准并清空本街下注，返回变化的字段"""
+        self.seq += 1
+        delta = {"seq": self.seq}
+        street, pot, board = data.get("street"), data.get("pot", 0), data.get("board")
+        if street != self.street:
+            self.street = delta["street"] = street
+            self.street_bets = {}
+            if self.current_bet:
+                self.current_bet = delta["current_bet"] = 0
+        if pot != self.pot:
+            self.pot = delta["pot"] = pot
+        if board and board != self.board:
+            self.board = board
+            delta["board"] = board.to_strings()
+            if len(self.hero_cards) == 2:
+                if self.draws is None or not self.draws.update(board):
+                    self.draws = DrawAnalyzer(list(self.hero_cards), board)
+                self.draw_summary = self.draws.summary() if self.draws.cards_to_come else None
+                if self.draw_summary is not None:
+                    delta["draws"] = self.draw_summary
+        return delta
+
+    @classmethod
+    def replay(cls, initial: dict, events: List[dict]) -> 'HandState':
+        """由开局状态和事件序列重建手牌状态"""
+        hand = cls.from_dict(initial)
+        for event in events:
+            if event.get("type") == "round_change":
+                hand.apply_round_change(event)
+            else:
+                hand.apply_action(event)
+        return hand
+
 class GameTracker:
-    def __init__(self):
+    """事件驱动的牌局追踪器
+
+    每条消息只增量更新当前手牌的账本，并返回变化的字段 (delta)；
+    完整状态只在调用 get_current_state 时序列化。
+    """
+
+    def __init__(self, table_id: Optional[str] = None, archive=None, history_size: Optional[int] = 1000):
+        """archive: 可选的 HandArchive，完成的手牌会追加写入
+        history_size: 内存中保留的最近手牌数，超出后最旧的被丢弃（None 为不限）
+        """
+        self.table_id = table_id
+        self.archive = archive
         self.current_hand: Optional[HandState] = None
-        self.hand_history: List[HandState] = []
+        self.hand_history: Deque[HandState] = deque(maxlen=history_size)
+        self.hand_id = 0
         
     def process_message(self, parsed_msg: dict) -> Optional[dict]:
         try:
@@ -45,52 +190,85 @@ class GameTracker:
     
     def _handle_round_change(self, data: dict) -> dict:
         if not self.current_hand or data.get("street") == "PRE_FLOP":
+            self.finish_hand()
+            self.hand_id += 1
             self.current_hand = HandState(
                 street=data.get("street", ""),
                 pot=data.get("pot", 0),
-                board=data.get("board", []),
+                board=data.get("board", CardSet()),
                 current_bet=0,
-                hero_cards=data.get("hero_cards", [])
+                hero_cards=data.get("hero_cards", CardSet()),
+                table_id=self.table_id,
+                players=list(data.get("players", ()))
             )
+            # 新手牌没有可参照的旧状态，发送一次完整快照
+            delta = {**self._get_state_dict(), "new_hand": True}
         else:
-            self.current_hand.street = data.get("street")
-            self.current_hand.pot = data.get("pot", 0)
-            if data.get("board"):
-                self.current_hand.board = data.get("board")
+            delta = self.current_hand.apply_round_change(data)
         
         return {
             "status": "success",
             "message": "Updated hand state",
-            "hand_state": self._get_state_dict()
+            "delta": delta
         }
     
     def _handle_action(self, data: dict) -> dict:
         if not self.current_hand:
             return {"status": "error", "message": "No active hand"}
-            
-        self.current_hand.current_bet = data.get("amount", 0)
-        self.current_hand.last_action = data
         
         return {
             "status": "success",
             "message": "Processed action",
-            "hand_state": self._get_state_dict()
+            "delta": self.current_hand.apply_action(data)
         }
-        
+
+    def annotate_round_change(self, parsed: dict) -> dict:
+        """在 round_change 已应用到当前手牌后，补上建议所需的上下文
+
+        facing_raise: 本街是否有主角以外的玩家下注或加注；
+        opponentId: 建议针对的对手（消息本身带有时以消息为准），取自本手的动作记录；
+        opponentPosition: 该对手相对按钮的位置，未知时为 None；
+        draws: 本手听牌分析器的摘要，策略引擎直接使用，不再重复分析。
+        """
+        hand, hero_id = self.current_hand, parsed.get("hero_id")
+        parsed["facing_raise"] = hand is not None and hand.facing_raise(hero_id)
+        if hand is None:
+            return parsed
+        parsed["draws"] = hand.draw_summary
+        if parsed.get("opponentId") is None:
+            parsed["opponentId"] = hand.villain(hero_id)
+        parsed["opponentPosition"] = hand.position_of(hand.seats.get(parsed["opponentId"]))
+        return parsed
+
+    def finish_hand(self) -> Optional[HandState]:
+        """结束当前手牌：加入历史并写入归档"""
+        hand, self.current_hand = self.current_hand, None
+        if hand is None:
+            return None
+        self.hand_history.append(hand)
+        if self.archive is not None:
+            self.archive.append(hand)
+        return hand
+
     def _get_state_dict(self) -> dict:
         """获取状态字典"""
-        if not self.current_hand:
+        hand = self.current_hand
+        if not hand:
             return {}
             
         return {
-            "street": self.current_hand.street,
-            "pot": self.current_hand.pot,
-            "board": [str(c) for c in self.current_hand.board],
-            "hero_cards": [str(c) for c in self.current_hand.hero_cards],
-            "current_bet": self.current_hand.current_bet,
-            "position": self.current_hand.position
+            "hand_id": self.hand_id,
+            "seq": hand.seq,
+            "street": hand.street,
+            "pot": hand.pot,
+            "board": hand.board.to_strings(),
+            "hero_cards": hand.hero_cards.to_strings(),
+            "current_bet": hand.current_bet,
+            "position": hand.position,
+            "street_bets": dict(hand.street_bets),
+            "contributions": dict(hand.contributions)
         }
     
     def get_current_state(self) -> dict:
-        """获取当前状态"""
-        return self._get_state_dict()
\ No newline at end of file
+        """获取当前状态的完整快照"""
+        return self._get_state_dict()
@@ -1,45 +1,125 @@
 import json
-from typing import Optional
-from models.card import Card, decode_cards
+import logging
+import re
+from typing import Iterable, Iterator, List, Optional, Union
+from models.card import CardSet, decode_card_set
+
+# 有 orjson 时使用更快的 JSON 解码
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 只读取 msgType 字段，不做完整解码
+_MSG_TYPE_RE = re.compile(r'"msgType"\s*:\s*"([^"]*)"')
+_MSG_TYPE_RE_BYTES = re.compile(rb'"msgType"\s*:\s*"([^"]*)"')
+
+# 主动下注类动作；本街有其他玩家做过这些动作时，主角面对加注
+AGGRESSIVE_ACTIONS = ("BET", "RAISE")
 
 class HandHistoryParser:
-    def parse_message(self, msg: str) -> Optional[dict]:
+    PARSERS = {
+        "WP_roundChangeNotify": "_parse_round_change",
+        "WP_actionNotify": "_parse_action",
+        "WP_updateUserProfileNotify": "_parse_player_stats"
+    }
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._dispatch = {msg_type: getattr(self, name) for msg_type, name in self.PARSERS.items()}
+        self.stats = {"parsed": 0, "skipped": 0, "errors": 0}
+
+    def parse_message(self, msg: Union[str, bytes]) -> Optional[dict]:
         try:
-            if not msg or "msgType" not in msg:
-                return None
-                
-            data = json.loads(msg)
-            msg_type = data.get("msgType")
-            
-            parsers = {
-                "WP_roundChangeNotify": self._parse_round_change,
-                "WP_actionNotify": self._parse_action,
-                "WP_updateUserProfileNotify": self._parse_player_stats
-            }
-            
-            parser = parsers.get(msg_type)
-            return parser(data) if parser else None
-            
+            return self._parse(msg)
         except Exception as e:
-            print(f"Error parsing message: {e}")
+            self.stats["errors"] += 1
+            self.logger.debug("Error parsing message: %s", e)
             return None
-    
+
+    def _parse(self, msg: Union[str, bytes]) -> Optional[dict]:
+        """解析单条消息；未处理的 msgType 只窥视类型字段，不做完整解码"""
+        if not msg:
+            return None
+        pattern = _MSG_TYPE_RE_BYTES if isinstance(msg, bytes) else _MSG_TYPE_RE
+        match = pattern.search(msg)
+        if not match:
+            self.stats["skipped"] += 1
+            return None
+        msg_type = match.group(1)
+        if isinstance(msg_type, bytes):
+            msg_type = msg_type.decode()
+        parser = self._dispatch.get(msg_type)
+        if parser is None:
+            self.stats["skipped"] += 1
+            return None
+
+        data = _json_loads(msg)
+        if data.get("msgType") != msg_type:
+            # 嵌套字段里的 msgType 被先匹配到，按完整解码的结果重新分发
+            parser = self._dispatch.get(data.get("msgType"))
+            if parser is None:
+                self.stats["skipped"] += 1
+                return None
+        self.stats["parsed"] += 1
+        return parser(data)
+
+    def parse_stream(self, lines: Iterable[Union[str, bytes]],
+                     batch_size: Optional[int] = None) -> Iterator[Union[dict, List[dict]]]:
+        """惰性解析按行分隔的消息流
+
+        逐条产出解析结果；指定 batch_size 时按批产出列表。
+        解析失败的消息产出 {"type": "error"} 事件并计数，未处理的消息类型直接跳过。
+        """
+        batch = []
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = self._parse(line)
+            except Exception as e:
+                self.stats["errors"] += 1
+                event = {"type": "error", "line": line_no, "error": str(e)}
+            if event is None:
+                continue
+            if batch_size is None:
+                yield event
+                continue
+            batch.append(event)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def parse_file(self, path: str, batch_size: Optional[int] = None) -> Iterator[Union[dict, List[dict]]]:
+        """从按行分隔的日志文件流式解析"""
+        with open(path, "rb") as f:
+            yield from self.parse_stream(f, batch_size)
+
     def _parse_round_change(self, data: dict) -> dict:
         msg_body = data.get("msgBody", {})
-        hero_cards = []
+        hero_cards = CardSet()
+        hero_id = None
+        players = msg_body.get("userCardsList", [])
         
         # 提取玩家手牌
-        for player in msg_body.get("userCardsList", []):
+        for player in players:
             if player.get("handCards"):
-                hero_cards = decode_cards(player.get("handCards", []))
+                hero_cards = decode_card_set(player.get("handCards", []))
+                hero_id = player.get("userId")
                 break
         
         return {
             "type": "round_change",
             "street": msg_body.get("round"),
             "pot": msg_body.get("totalPot", 0),
-            "board": decode_cards(msg_body.get("dealPublicCards", [])),
-            "hero_cards": hero_cards
+            "board": decode_card_set(msg_body.get("dealPublicCards", [])),
+            "hero_cards": hero_cards,
+            "hero_id": hero_id,
+            "players": [player.get("userId") for player in players]
         }
     
     def _parse_action(self, data: dict) -> dict:
@@ -0,0 +1,182 @@
+import argparse
+import mmap
+import os
+import struct
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from core.calculator import (
+    DECK_CODES, INDEX_OF_CODE, RANK_OF_CODE, _showdown_share, evaluate_batch, monte_carlo_equity
+)
+
+RANK_CHARS = "23456789TJQKA"
+NUM_CLASSES = 169
+MAX_OPPONENTS = 8
+# 对手范围：按单挑胜率排序后前 X% 的组合
+DEFAULT_PERCENTILES = (0.05, 0.10, 0.15, 0.20, 0.30, 0.40, 0.50, 0.75, 1.0)
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "data", "preflop_equity.bin")
+
+# 文件头: 魔数, 版本, 手牌类别数, 最大对手数, 范围数；其后全部为 float32
+_HEADER = struct.Struct("<4sHHHH")
+_MAGIC = b"PFEQ"
+_VERSION = 1
+
+
+def hand_class(c1: int, c2: int) -> int:
+    """两张手牌（游戏编码）-> 169 类起手牌下标
+
+    13x13 网格：对子在对角线，同花为 高*13+低，非同花为 低*13+高。
+    """
+    r1, r2 = RANK_OF_CODE[c1], RANK_OF_CODE[c2]
+    hi, lo = (r1, r2) if r1 >= r2 else (r2, r1)
+    if hi == lo or c1 // 100 == c2 // 100:
+        return hi * 13 + lo
+    return lo * 13 + hi
+
+
+def class_name(index: int) -> str:
+    a, b = divmod(index, 13)
+    if a == b:
+        return RANK_CHARS[a] * 2
+    if a > b:
+        return RANK_CHARS[a] + RANK_CHARS[b] + "s"
+    return RANK_CHARS[b] + RANK_CHARS[a] + "o"
+
+
+def class_combos(index: int) -> List[tuple]:
+    """某类起手牌的全部具体组合（游戏编码）"""
+    combos = []
+    for i, c1 in enumerate(DECK_CODES):
+        for c2 in DECK_CODES[i + 1:]:
+            if hand_class(c1, c2) == index:
+                combos.append((c1, c2))
+    return combos
+
+
+class PreflopTable:
+    """预计算的翻前胜率表，通过 mmap 只读映射，多进程共享同一份页缓存"""
+
+    def __init__(self, buffer, percentiles, vs_random, vs_range, strength):
+        self._buffer = buffer
+        self.percentiles = percentiles
+        self.vs_random = vs_random
+        self.vs_range = vs_range
+        self.strength = strength
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TABLE_PATH) -> 'PreflopTable':
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, classes, opponents, ranges = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION or classes != NUM_CLASSES:
+            raise ValueError(f"无效的翻前胜率表: {path}")
+        offset = _HEADER.size
+
+        def view(count, shape=None):
+            nonlocal offset
+            array = np.frombuffer(buffer, dtype=np.float32, count=count, offset=offset)
+            offset += count * 4
+            return array.reshape(shape) if shape else array
+
+        percentiles = view(ranges)
+        vs_random = view(classes * opponents, (classes, opponents))
+        vs_range = view(classes * ranges, (classes, ranges))
+        strength = view(classes)
+        return cls(buffer, percentiles, vs_random, vs_range, strength)
+
+    @property
+    def max_opponents(self) -> int:
+        return self.vs_random.shape[1]
+
+    def equity(self, hand: int, num_opponents: int = 1) -> float:
+        """对 N 个随机手牌对手的胜率"""
+        n = min(max(num_opponents, 1), self.max_opponents)
+        return float(self.vs_random[hand, n - 1])
+
+    def equity_vs_range(self, hand: int, percentile: float) -> float:
+        """单挑对前 percentile 范围的胜率，取不小于该百分位的最紧范围"""
+        column = int(np.searchsorted(self.percentiles, percentile - 1e-9))
+        column = min(column, len(self.percentiles) - 1)
+        return float(self.vs_range[hand, column])
+
+    def hand_percentile(self, hand: int) -> float:
+        """比该手牌更强的组合占全部组合的比例，越小越强"""
+        return float(self.strength[hand])
+
+
+_table: Optional[PreflopTable] = None
+
+
+def get_preflop_table(path: str = DEFAULT_TABLE_PATH) -> Optional[PreflopTable]:
+    """进程内共享的翻前胜率表，文件不存在时返回 None"""
+    global _table
+    if _table is None and os.path.exists(path):
+        _table = PreflopTable.load(path)
+    return _table
+
+
+def _range_equity(hero: Sequence[int], combos: np.ndarray, samples: int, rng: np.random.Generator) -> float:
+    """单挑对均匀加权的组合范围（牌索引 (K, 2)）的蒙特卡洛胜率"""
+    ok = ~np.isin(combos, hero).any(axis=1)
+    combos = combos[ok]
+    picks = combos[rng.integers(len(combos), size=samples)]
+    keys = rng.random((samples, 52))
+    keys[:, list(hero)] = 2.0
+    keys[np.arange(samples)[:, None], picks] = 2.0
+    board = keys.argsort(axis=1)[:, :5]
+    hero_values = evaluate_batch(np.concatenate([np.broadcast_to(np.array(hero), (samples, 2)), board], axis=1))
+    opp_values = evaluate_batch(np.concatenate([picks, board], axis=1))
+    return float(_showdown_share(hero_values, opp_values[:, None]).mean())
+
+
+def generate_tables(path: str = DEFAULT_TABLE_PATH, samples: int = 20000,
+                    max_opponents: int = MAX_OPPONENTS,
+                    percentiles: Sequence[float] = DEFAULT_PERCENTILES, seed: int = 0) -> None:
+    """计算 169 类起手牌对 1~N 个随机对手及各百分位范围的胜率，写入二进制表"""
+    rng = np.random.default_rng(seed)
+    combos = [class_combos(i) for i in range(NUM_CLASSES)]
+    representative = [c[0] for c in combos]
+
+    vs_random = np.zeros((NUM_CLASSES, max_opponents), dtype=np.float32)
+    for i, hero in enumerate(representative):
+        for n in range(1, max_opponents + 1):
+            vs_random[i, n - 1] = monte_carlo_equity(hero, (), n, samples=samples, rng=rng).equity
+
+    # 按单挑胜率排序，累计组合数得到百分位范围和每类牌的强度百分位
+    order = np.argsort(-vs_random[:, 0], kind="stable")
+    total_combos = sum(len(c) for c in combos)
+    strength = np.zeros(NUM_CLASSES, dtype=np.float32)
+    ranges = [[] for _ in percentiles]
+    covered = 0
+    for i in order:
+        strength[i] = covered / total_combos
+        for k, pct in enumerate(percentiles):
+            if covered < pct * total_combos:
+                ranges[k].extend(combos[i])
+        covered += len(combos[i])
+
+    vs_range = np.zeros((NUM_CLASSES, len(percentiles)), dtype=np.float32)
+    for k, members in enumerate(ranges):
+        member_idx = np.array([[INDEX_OF_CODE[a], INDEX_OF_CODE[b]] for a, b in members], dtype=np.int64)
+        for i, hero in enumerate(representative):
+            vs_range[i, k] = _range_equity([INDEX_OF_CODE[c] for c in hero], member_idx, samples, rng)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, NUM_CLASSES, max_opponents, len(percentiles)))
+        f.write(np.asarray(percentiles, dtype=np.float32).tobytes())
+        f.write(vs_random.tobytes())
+        f.write(vs_range.tobytes())
+        f.write(strength.tobytes())
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="生成翻前 169 类起手牌胜率表")
+    arg_parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    arg_parser.add_argument("--samples", type=int, default=20000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    generate_tables(args.output, samples=args.samples, seed=args.seed)
+    print(f"翻前胜率表已写入 {args.output}")
@@ -0,0 +1,229 @@
+import argparse
+import mmap
+import os
+import struct
+from functools import lru_cache
+from itertools import permutations
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.calculator import (
+    DECK_CODES, INDEX_OF_CODE, _showdown_share, canonical_spot, evaluate_batch, evaluate_outer
+)
+from core.preflop import NUM_CLASSES, get_preflop_table, hand_class
+from utils.cache import LRUCache
+
+DEFAULT_MATRIX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "data", "range_equity.bin")
+# 范围宽度按 5% 分桶，缓存和查表都以桶为单位
+RANGE_STEP = 0.05
+# 对手样本太少时 VPIP/PFR 不可靠，不构建范围
+MIN_HANDS = 20
+RANGE_CACHE = LRUCache(maxsize=50000)
+
+# 文件头: 魔数, 版本, 手牌类别数；其后为 float32 (类别, 类别) 胜率矩阵
+_HEADER = struct.Struct("<4sHH")
+_MAGIC = b"CVCE"
+_VERSION = 1
+_SUIT_PERMUTATIONS = list(permutations(range(1, 5)))
+
+# 全部 1326 个组合（牌索引）及其所属的 169 类
+COMBOS = np.stack(np.triu_indices(52, 1), axis=1)
+COMBO_CLASS = np.array([hand_class(DECK_CODES[a], DECK_CODES[b]) for a, b in COMBOS.tolist()], dtype=np.int64)
+
+
+def range_width(opponent_stats: Optional[dict], raised: bool = False) -> Optional[float]:
+    """对手统计 -> 分桶后的范围宽度（前 X% 的组合）
+
+    对手加注时取 PFR 范围，否则取 VPIP 范围；样本不足时返回 None。
+    """
+    if not opponent_stats or (opponent_stats.get("hands_played") or 0) < MIN_HANDS:
+        return None
+    width = opponent_stats.get("pfr") if raised else opponent_stats.get("vpip")
+    if width is None:
+        return None
+    return min(max(round(width / RANGE_STEP), 1), round(1 / RANGE_STEP)) * RANGE_STEP
+
+
+@lru_cache(maxsize=None)
+def class_weights(width: float) -> np.ndarray:
+    """169 类起手牌在前 width 范围中的权重
+
+    每类牌按强度占据 [strength, strength + 组合数/1326) 的百分位区间，
+    权重为该区间落在 [0, width) 内的比例，边界上的类别按比例部分计入。
+    """
+    table = get_preflop_table()
+    if table is None:
+        raise RuntimeError("缺少翻前胜率表，无法按强度构建范围")
+    span = np.bincount(COMBO_CLASS, minlength=NUM_CLASSES) / len(COMBOS)
+    weights = np.clip((width - table.strength) / span, 0.0, 1.0)
+    weights.setflags(write=False)
+    return weights
+
+
+def combo_weights(width: float) -> np.ndarray:
+    """1326 个组合的权重"""
+    return class_weights(width)[COMBO_CLASS]
+
+
+class RangeMatrix:
+    """预计算的 169x169 起手牌类别对类别胜率矩阵，mmap 只读映射"""
+
+    def __init__(self, buffer, equity):
+        self._buffer = buffer
+        self.equity = equity
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MATRIX_PATH) -> 'RangeMatrix':
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, classes = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION or classes != NUM_CLASSES:
+            raise ValueError(f"无效的范围胜率矩阵: {path}")
+        equity = np.frombuffer(buffer, dtype=np.float32, count=classes * classes, offset=_HEADER.size)
+        return cls(buffer, equity.reshape(classes, classes))
+
+    def vs_range(self, hero_cards: Sequence[int], weights: np.ndarray) -> float:
+        """hero 对加权组合范围的翻前胜率，扣除与 hero 冲突的组合"""
+        hero = [INDEX_OF_CODE[c] for c in hero_cards]
+        live = ~np.isin(COMBOS, hero).any(axis=1)
+        class_mass = np.bincount(COMBO_CLASS[live], weights=weights[live], minlength=NUM_CLASSES)
+        return float(class_mass @ self.equity[hand_class(*hero_cards)] / class_mass.sum())
+
+
+_matrix: Optional[RangeMatrix] = None
+
+
+def get_range_matrix(path: str = DEFAULT_MATRIX_PATH) -> Optional[RangeMatrix]:
+    """进程内共享的类别胜率矩阵，文件不存在时返回 None"""
+    global _matrix
+    if _matrix is None and os.path.exists(path):
+        _matrix = RangeMatrix.load(path)
+    return _matrix
+
+
+def _canonical_board(board: Sequence[int]) -> Tuple[tuple, Tuple[int, ...]]:
+    """只按公共牌取花色同构的规范形式，返回 (花色置换, 规范公共牌)"""
+    best = None
+    for perm in _SUIT_PERMUTATIONS:
+        cards = tuple(sorted(perm[c // 100 - 1] * 100 + c % 100 for c in board))
+        if best is None or cards < best[1]:
+            best = (perm, cards)
+    return best
+
+
+def _board_table(board: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    known = [INDEX_OF_CODE[c] for c in board]
+    live = np.setdiff1d(np.arange(52), known)
+    if len(board) == 5:
+        runouts = np.zeros((1, 0), dtype=np.int64)
+    elif len(board) == 4:
+        runouts = live[:, None]
+    else:
+        runouts = live[np.stack(np.triu_indices(len(live), 1), axis=1)]
+    size = len(COMBOS), len(runouts)
+    valid = ~np.isin(COMBOS, known).any(axis=1)[:, None].repeat(size[1], axis=1)
+    for k in range(runouts.shape[1]):
+        valid &= (COMBOS[:, :1] != runouts[None, :, k]) & (COMBOS[:, 1:] != runouts[None, :, k])
+    hands = np.concatenate([COMBOS, np.broadcast_to(np.array(known), (len(COMBOS), len(known)))], axis=1)
+    values = evaluate_outer(hands, runouts).astype(np.int32)
+    values[~valid] = -1
+    return runouts, values, valid
+
+
+# 翻牌的表有 1326 x 1176 项（约 8 MB），单独用较小的缓存
+_flop_table = lru_cache(maxsize=16)(_board_table)
+_street_table = lru_cache(maxsize=256)(_board_table)
+
+
+def board_table(board: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """某公共牌面（规范形式）下每个组合在每种补牌中的牌力值 (1326, 补牌数)
+
+    翻牌枚举全部 1176 种转牌+河牌，转牌枚举全部河牌，河牌只有一种补牌；
+    按规范牌面缓存。返回 (补牌, 牌力值, 是否有效)。
+    """
+    return (_flop_table if len(board) == 3 else _street_table)(board)
+
+
+def postflop_range_equity(hero_cards: Sequence[int], board: Sequence[int], weights: np.ndarray) -> float:
+    """翻牌后 hero 对加权组合范围的胜率：逐补牌比较牌力后按组合权重加权"""
+    perm, canonical = _canonical_board(board)
+    hero = [INDEX_OF_CODE[perm[c // 100 - 1] * 100 + c % 100] for c in hero_cards]
+    runouts, values, valid = board_table(canonical)
+    # 扣除含 hero 手牌的补牌和组合
+    live_runouts = ~np.isin(runouts, hero).any(axis=1)
+    mask = valid[:, live_runouts] & ~np.isin(COMBOS, hero).any(axis=1)[:, None]
+    known = [INDEX_OF_CODE[c] for c in canonical]
+    hero_rows = np.concatenate([np.broadcast_to(np.array(hero + known), (int(live_runouts.sum()), 2 + len(known))),
+                                runouts[live_runouts]], axis=1)
+    hero_values = evaluate_batch(hero_rows)[None, :]
+    opp_values = values[:, live_runouts]
+    share = (opp_values < hero_values) + 0.5 * (opp_values == hero_values)
+    per_combo = (share * mask).sum(axis=1)
+    return float(weights @ per_combo / (weights @ mask.sum(axis=1)))
+
+
+def range_equity(hero_cards: Sequence[int], board: Sequence[int], width: float) -> Optional[float]:
+    """hero 对前 width 范围的单挑胜率，按 (范围桶, 花色同构局面) 缓存
+
+    翻前需要类别胜率矩阵，缺失时返回 None。
+    """
+    hero, cards = canonical_spot(hero_cards, board)
+    key = (round(width / RANGE_STEP), hero, cards)
+    equity = RANGE_CACHE.get(key)
+    if equity is None:
+        weights = combo_weights(width)
+        if len(cards) >= 3:
+            equity = postflop_range_equity(hero, cards, weights)
+        else:
+            matrix = get_range_matrix()
+            if matrix is None:
+                return None
+            equity = matrix.vs_range(hero, weights)
+        RANGE_CACHE.put(key, equity)
+    return equity
+
+
+def generate_matrix(path: str = DEFAULT_MATRIX_PATH, samples: int = 1000, seed: int = 0) -> None:
+    """蒙特卡洛计算 169 类起手牌两两对抗的胜率，写入二进制矩阵"""
+    rng = np.random.default_rng(seed)
+    members = [np.nonzero(COMBO_CLASS == i)[0] for i in range(NUM_CLASSES)]
+    sizes = np.array([len(m) for m in members])
+    padded = np.zeros((NUM_CLASSES, sizes.max()), dtype=np.int64)
+    for i, m in enumerate(members):
+        padded[i, :len(m)] = m
+    equity = np.full((NUM_CLASSES, NUM_CLASSES), 0.5, dtype=np.float32)
+    for i in range(NUM_CLASSES):
+        # 一次为所有 j >= i 抽样，去掉两手牌冲突的样本
+        others = np.repeat(np.arange(i, NUM_CLASSES), samples)
+        hero = COMBOS[rng.choice(members[i], len(others))]
+        villain = COMBOS[padded[others, (rng.random(len(others)) * sizes[others]).astype(np.int64)]]
+        ok = (hero[:, :1] != villain).all(axis=1) & (hero[:, 1:] != villain).all(axis=1)
+        others, hero, villain = others[ok], hero[ok], villain[ok]
+        keys = rng.random((len(others), 52))
+        keys[np.arange(len(others))[:, None], np.concatenate([hero, villain], axis=1)] = 2.0
+        board = keys.argsort(axis=1)[:, :5]
+        share = _showdown_share(evaluate_batch(np.concatenate([hero, board], axis=1)),
+                                evaluate_batch(np.concatenate([villain, board], axis=1))[:, None])
+        totals = np.bincount(others, weights=share, minlength=NUM_CLASSES)
+        counts = np.bincount(others, minlength=NUM_CLASSES)
+        row = totals[i:] / np.maximum(counts[i:], 1)
+        equity[i, i:] = row
+        equity[i:, i] = 1 - row
+        equity[i, i] = 0.5
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, NUM_CLASSES))
+        f.write(equity.tobytes())
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="生成 169 类起手牌对抗胜率矩阵")
+    arg_parser.add_argument("--output", default=DEFAULT_MATRIX_PATH)
+    arg_parser.add_argument("--samples", type=int, default=1000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    generate_matrix(args.output, samples=args.samples, seed=args.seed)
+    print(f"范围胜率矩阵已写入 {args.output}")
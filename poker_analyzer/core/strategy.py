@@ -1,4 +1,29 @@
+from dataclasses import dataclass
+from core.advice_cache import AdviceCache, advice_key
+from core.calculator import (
+    EquityResult, calculate_equity, evaluate, hand_category, hand_name,
+    TWO_PAIR, THREE_OF_A_KIND, STRAIGHT, FLUSH, FULL_HOUSE, STRAIGHT_FLUSH
+)
+from core.draws import DrawAnalyzer
+from core.preflop import get_preflop_table, hand_class
+from core.ranges import range_equity, range_width
+from models.card import to_codes
+from utils.metrics import METRICS
+
+@dataclass(frozen=True)
+class StrategyParams:
+    """Strategy 的可调阈值，回测时按组合扫描"""
+    steal_pfr: float = 0.1            # 对手 PFR 低于此值时偷盲
+    semi_bluff_fold: float = 0.6      # 对手弃牌率高于此值时半诈唬
+    preflop_raise_pct: float = 0.15   # 起手牌强度百分位低于此值时加注
+    preflop_call_pct: float = 0.40
+    range_raise_equity: float = 0.55  # 对对手入池范围的胜率高于此值时加注
+    range_call_equity: float = 0.45
+
 class Strategy:
+    def __init__(self, params=None):
+        self.params = params or StrategyParams()
+
     def suggest_action(self, player, game_state, opponent_stats):
         street = game_state['street']
         if street == "preflop":
@@ -14,14 +39,20 @@ class Strategy:
     def preflop_strategy(self, player, opponent_stats):
         # 根据手牌强度和对手统计来决定动作
         hand = player.hand
-        pair = hand[0][0] == hand[1][0]
-        high_cards = [card[0] for card in hand if card[0] >= 10]
-        suited = hand[0][1] == hand[1][1]
 
-        # 如果对手是非常松的玩家，可以加大我们偷盲的频率
-        if opponent_stats.get('PFR', 0) < 0.1:
+        # 对手翻前加注率很低（被动）时偷盲；没有 PFR 样本时不据此偷盲
+        pfr = opponent_stats.get('pfr')
+        if pfr is not None and pfr < self.params.steal_pfr:
             return "RAISE"
 
+        table = get_preflop_table()
+        if table is not None:
+            return self.preflop_table_action(table, hand, opponent_stats)
+
+        # 没有预计算表时退回到简单规则
+        pair = hand[0][0] == hand[1][0]
+        high_cards = [card[0] for card in hand if card[0] >= 10]
+        suited = hand[0][1] == hand[1][1]
         if pair or suited and len(high_cards) == 2:
             return "RAISE"
         elif len(high_cards) == 1:
@@ -29,6 +60,25 @@ class Strategy:
         else:
             return "FOLD"
 
+    def preflop_table_action(self, table, hand, opponent_stats):
+        # 查表得到起手牌强度；已知对手入池率时改用对其范围的胜率
+        hand_index = hand_class(*to_codes(hand))
+        vpip = opponent_stats.get('vpip')
+        if vpip:
+            equity = table.equity_vs_range(hand_index, vpip)
+            if equity >= self.params.range_raise_equity:
+                return "RAISE"
+            elif equity >= self.params.range_call_equity:
+                return "CALL"
+            return "FOLD"
+
+        percentile = table.hand_percentile(hand_index)
+        if percentile < self.params.preflop_raise_pct:
+            return "RAISE"
+        elif percentile < self.params.preflop_call_pct:
+            return "CALL"
+        return "FOLD"
+
     def flop_strategy(self, player, game_state, opponent_stats):
         # 根据公共牌和对手数据分析策略
         hand = player.hand
@@ -41,14 +91,162 @@ class Strategy:
             return "CALL"
         else:
             # 如果对手的弃牌频率高，可以尝试半诈唬
-            if opponent_stats.get('fold_frequency', 0) > 0.6:
+            if opponent_stats.get('fold_frequency', 0) > self.params.semi_bluff_fold:
                 return "RAISE"
             return "FOLD"
 
-    # 其他策略逻辑（如 turn 和 river）保持类似风格，结合手牌、公共牌和对手信息制定策略
+    def turn_strategy(self, player, game_state, opponent_stats):
+        # 转牌圈还剩一张牌，听牌仍有价值，沿用翻牌圈逻辑
+        return self.flop_strategy(player, game_state, opponent_stats)
+
+    def river_strategy(self, player, game_state, opponent_stats):
+        # 河牌圈没有听牌，只看成牌强度
+        hand = player.hand
+        community_cards = game_state['community_cards']
+        category = self.evaluate_category(hand + community_cards)
+
+        if category >= THREE_OF_A_KIND:
+            return "RAISE"
+        elif category == TWO_PAIR:
+            return "CALL"
+        elif opponent_stats.get('fold_frequency', 0) > self.params.semi_bluff_fold:
+            return "RAISE"
+        return "FOLD"
+
+    def evaluate_category(self, cards):
+        # 查表评估 5~7 张牌的牌型类别
+        return hand_category(evaluate(to_codes(cards)))
 
     def has_strong_hand(self, cards):
         # 判断是否有强牌，如三条、顺子、同花、葫芦等
-        return self.has_three_of_a_kind(cards) or self.has_straight(cards) or self.has_flush(cards) or self.has_full_house(cards)
+        return self.evaluate_category(cards) >= THREE_OF_A_KIND
+
+    def has_draw_potential(self, cards):
+        # 前两张为手牌，其余为公共牌：同花听牌或两头顺听牌
+        codes = to_codes(cards)
+        return DrawAnalyzer(codes[:2], codes[2:]).has_draw
+
+    def has_three_of_a_kind(self, cards):
+        return self.evaluate_category(cards) == THREE_OF_A_KIND
+
+    def has_straight(self, cards):
+        return self.evaluate_category(cards) in (STRAIGHT, STRAIGHT_FLUSH)
+
+    def has_flush(self, cards):
+        return self.evaluate_category(cards) in (FLUSH, STRAIGHT_FLUSH)
+
+    def has_full_house(self, cards):
+        return self.evaluate_category(cards) == FULL_HOUSE
+
+
+# 消息中的 round 字段 -> Strategy 使用的街名
+STREETS = {"PRE_FLOP": "preflop", "FLOP": "flop", "TURN": "turn", "RIVER": "river"}
+
+class StrategyEngine:
+    """实时建议引擎：用胜率（转牌/河牌精确枚举，其余蒙特卡洛）结合对手数量给出动作建议"""
 
-    # 其他辅助函数同样可以保留或增加更多的手牌评估逻辑
+    def __init__(self, num_opponents=1, time_budget=0.015, max_samples=20000,
+                 advice_cache: AdviceCache = None, params: StrategyParams = None):
+        self.params = params or StrategyParams()
+        self.num_opponents = num_opponents
+        self.time_budget = time_budget
+        self.max_samples = max_samples
+        self.preflop_table = get_preflop_table()
+        # 按规范化局面缓存建议，None 表示不缓存
+        self.advice_cache = advice_cache
+
+    def _spot(self, game_state, opponent_stats):
+        """从游戏状态取出计算建议所需的输入
+        (手牌, 公共牌, 街, 对手数, 是否面对加注, 对手范围宽度, 是否可半诈唬)"""
+        hero = to_codes(game_state.get("hero_cards", ()))
+        board = to_codes(game_state.get("board", ()))
+        street = STREETS.get(game_state.get("street"), game_state.get("street"))
+        num_opponents = game_state.get("num_opponents") or self.num_opponents
+        # 单挑且对手样本足够时，用对其 VPIP/PFR 加权范围的胜率代替对随机手牌的胜率
+        facing_raise = game_state.get("facing_raise", False)
+        width = range_width(opponent_stats, facing_raise) if num_opponents == 1 else None
+        # 翻牌后单挑对手近期弃牌率高时，弱牌改为半诈唬，与 Strategy.flop_strategy 一致
+        bluff = (num_opponents == 1 and len(board) >= 3 and opponent_stats is not None
+                 and (opponent_stats.get("fold_frequency") or 0) > self.params.semi_bluff_fold)
+        return hero, board, street, num_opponents, facing_raise, width, bluff
+
+    def get_advice(self, game_state, opponent_stats):
+        hero, board, street, num_opponents, facing_raise, width, bluff = self._spot(game_state, opponent_stats)
+        if len(hero) != 2:
+            return {"action": "WAIT", "street": street, "reason": "hero cards unknown"}
+
+        key = None
+        if self.advice_cache is not None:
+            key = advice_key(street, hero, board, num_opponents, facing_raise, width, bluff)
+            advice = self.advice_cache.get(key)
+            if advice is not None:
+                return self._with_draws(advice, hero, board, game_state.get("draws"))
+        advice = self._compute_advice(hero, board, street, num_opponents, width, bluff)
+        if key is not None:
+            self.advice_cache.put(key, advice)
+        return self._with_draws(advice, hero, board, game_state.get("draws"))
+
+    def cached_advice(self, game_state, opponent_stats):
+        """只查缓存，未命中返回 None"""
+        hero, board, street, num_opponents, facing_raise, width, bluff = self._spot(game_state, opponent_stats)
+        if self.advice_cache is None or len(hero) != 2:
+            return None
+        advice = self.advice_cache.get(advice_key(street, hero, board, num_opponents, facing_raise, width, bluff))
+        if advice is None:
+            return None
+        return self._with_draws(advice, hero, board, game_state.get("draws"))
+
+    def remember(self, game_state, opponent_stats, advice) -> None:
+        """把别处（如工作进程）算出的建议放入缓存"""
+        hero, board, street, num_opponents, facing_raise, width, bluff = self._spot(game_state, opponent_stats)
+        if self.advice_cache is None or len(hero) != 2 or advice.get("action") == "WAIT":
+            return
+        advice = {k: v for k, v in advice.items() if k != "draws"}
+        self.advice_cache.put(advice_key(street, hero, board, num_opponents, facing_raise, width, bluff), advice)
+
+    def _compute_advice(self, hero, board, street, num_opponents, width, bluff=False):
+        """与具体花色无关的建议部分：胜率、动作、牌型"""
+        with METRICS.timer("equity"):
+            versus_range = range_equity(hero, board, width) if width is not None else None
+            if versus_range is not None:
+                result = EquityResult(equity=versus_range, ci_low=versus_range, ci_high=versus_range,
+                                      samples=0, exact=len(board) >= 4)
+            elif board or self.preflop_table is None:
+                result = calculate_equity(
+                    hero, board, num_opponents,
+                    samples=self.max_samples, time_budget=self.time_budget
+                )
+            else:
+                # 翻前直接查预计算表
+                equity = self.preflop_table.equity(hand_class(*hero), num_opponents)
+                result = EquityResult(equity=equity, ci_low=equity, ci_high=equity, samples=0)
+        advice = {
+            "action": self._choose_action(result.equity, num_opponents),
+            "street": street,
+            "equity": round(result.equity, 4),
+            "equity_ci": [round(result.ci_low, 4), round(result.ci_high, 4)],
+            "samples": result.samples,
+            "exact": result.exact,
+        }
+        if bluff and advice["action"] == "FOLD":
+            advice["action"], advice["bluff"] = "RAISE", True
+        if versus_range is not None:
+            advice["range_width"] = width
+        if len(board) >= 3:
+            advice["hand"] = hand_name(evaluate(hero + board))
+        return advice
+
+    def _with_draws(self, advice, hero, board, draws=None):
+        """附上听牌摘要：优先用牌局追踪器随状态传入的摘要，没有时现场分析"""
+        if 3 <= len(board) < 5:
+            advice["draws"] = draws if draws is not None else DrawAnalyzer(hero, board).summary()
+        return advice
+
+    def _choose_action(self, equity, num_opponents):
+        # 胜率明显高于均分底池时加注，不低于均分时跟注
+        fair_share = 1.0 / (num_opponents + 1)
+        if equity >= fair_share * 1.5:
+            return "RAISE"
+        elif equity >= fair_share:
+            return "CALL"
+        return "FOLD"
@@ -0,0 +1,98 @@
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from core.game_tracker import GameTracker, HandState
+
+
+def hand_size(hand: HandState) -> int:
+    """一手牌在内存中的近似字节数（对象本身、账本和动作记录）"""
+    size = sys.getsizeof(hand) + sys.getsizeof(hand.__dict__)
+    size += sys.getsizeof(hand.street_bets) + sys.getsizeof(hand.contributions)
+    size += sys.getsizeof(hand.actions) + sum(sys.getsizeof(a) for a in hand.actions)
+    return size
+
+
+class TrackerRegistry:
+    """按牌桌 ID 管理多个 GameTracker
+
+    每张桌只在内存中保留最近 history_size 手，完成的手牌写入归档；
+    每隔 sweep_interval 秒清理一次：超过 idle_timeout 秒没有消息的牌桌被回收，
+    回收前当前手牌也会写入归档；归档缓冲到期的手牌写成段。
+    """
+
+    def __init__(self, archive=None, history_size: int = 100, idle_timeout: Optional[float] = 600.0,
+                 sweep_interval: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.archive = archive
+        self.history_size = history_size
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.trackers: Dict[str, GameTracker] = {}
+        self.last_seen: Dict[str, float] = {}
+        self.evicted = 0
+        self._last_sweep = clock()
+
+    def __len__(self) -> int:
+        return len(self.trackers)
+
+    def __contains__(self, table_id) -> bool:
+        return table_id in self.trackers
+
+    def get(self, table_id: str) -> GameTracker:
+        now = self.clock()
+        tracker = self.trackers.get(table_id)
+        if tracker is None:
+            tracker = self.trackers[table_id] = GameTracker(table_id, self.archive, self.history_size)
+        self.last_seen[table_id] = now
+        if now - self._last_sweep >= self.sweep_interval:
+            self.evict_idle(now)
+        return tracker
+
+    def process_message(self, table_id: str, parsed_msg: dict) -> Optional[dict]:
+        return self.get(table_id).process_message(parsed_msg)
+
+    def close_table(self, table_id: str) -> None:
+        """结束并移除一张牌桌，未完成的手牌写入归档"""
+        tracker = self.trackers.pop(table_id, None)
+        self.last_seen.pop(table_id, None)
+        if tracker is not None:
+            tracker.finish_hand()
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """回收空闲牌桌并写出到期的归档缓冲，返回被回收的牌桌 ID"""
+        now = self.clock() if now is None else now
+        self._last_sweep = now
+        idle = []
+        if self.idle_timeout is not None:
+            idle = [t for t, seen in self.last_seen.items() if now - seen >= self.idle_timeout]
+            for table_id in idle:
+                self.close_table(table_id)
+            self.evicted += len(idle)
+        if self.archive is not None:
+            self.archive.flush_if_due()
+        return idle
+
+    def close(self) -> None:
+        for table_id in list(self.trackers):
+            self.close_table(table_id)
+        if self.archive is not None:
+            self.archive.flush()
+
+    def memory_stats(self) -> Dict[str, dict]:
+        """每张桌常驻内存中的手牌数、动作数、近似字节数，以及等待写入归档的手牌数"""
+        now = self.clock()
+        pending = self.archive.pending_counts() if self.archive is not None else {}
+        stats = {}
+        for table_id, tracker in self.trackers.items():
+            hands = list(tracker.hand_history)
+            if tracker.current_hand is not None:
+                hands.append(tracker.current_hand)
+            stats[table_id] = {
+                "hands": len(hands),
+                "actions": sum(len(h.actions) for h in hands),
+                "bytes": sum(hand_size(h) for h in hands),
+                "idle_seconds": now - self.last_seen[table_id],
+                "archive_pending": pending.get(table_id, 0),
+            }
+        return stats
@@ -0,0 +1,197 @@
+import argparse
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from core.preflop import get_preflop_table
+from core.strategy import StrategyEngine
+from models.card import INDEX_TO_CODE, CardSet
+
+# 对手统计快照的共享内存布局，按 user_id 排序以便二分查找
+OPPONENT_DTYPE = np.dtype([
+    ("user_id", "<i8"), ("vpip", "<f8"), ("pfr", "<f8"),
+    ("hands_played", "<i8"), ("hands_raised", "<i8"), ("vpip_count", "<i8"),
+])
+
+# ---- 工作进程内的状态 ----
+_engine: Optional[StrategyEngine] = None
+_snapshot_name: Optional[str] = None
+_snapshot_shm: Optional[shared_memory.SharedMemory] = None
+_snapshot: Optional[np.ndarray] = None
+
+
+def _init_worker(engine_kwargs: dict) -> None:
+    global _engine
+    _engine = StrategyEngine(**engine_kwargs)
+
+
+def _attach_snapshot(name: str, size: int) -> np.ndarray:
+    """挂载父进程发布的对手快照，同一快照只挂载一次"""
+    global _snapshot_name, _snapshot_shm, _snapshot
+    if name != _snapshot_name:
+        if _snapshot_shm is not None:
+            _snapshot = None
+            _snapshot_shm.close()
+        # 只读挂载，段的回收由父进程负责（子进程与父进程共用同一个资源追踪器）
+        shm = shared_memory.SharedMemory(name=name)
+        _snapshot_name, _snapshot_shm = name, shm
+        _snapshot = np.ndarray((size,), dtype=OPPONENT_DTYPE, buffer=shm.buf)
+    return _snapshot
+
+
+def _lookup_opponent(snapshot: tuple, user_id: int) -> Optional[dict]:
+    return _find_opponent(_attach_snapshot(*snapshot), user_id)
+
+
+def _find_opponent(array: np.ndarray, user_id: int) -> Optional[dict]:
+    i = int(np.searchsorted(array["user_id"], user_id))
+    if i < len(array) and array["user_id"][i] == user_id:
+        row = array[i]
+        return {name: row[name].item() for name in OPPONENT_DTYPE.names}
+    return None
+
+
+def _advise(strategy_state: dict, opponent_id, snapshot: Optional[tuple], opponent_stats: Optional[dict]) -> dict:
+    if opponent_stats is None and opponent_id is not None and snapshot is not None:
+        opponent_stats = _lookup_opponent(snapshot, opponent_id)
+    return _engine.get_advice(strategy_state, opponent_stats)
+
+
+class AdvicePool:
+    """多进程建议计算池
+
+    查表数据（牌力表、翻前胜率表）在父进程加载后由 fork 出的子进程继承，
+    对手统计以共享内存快照发布，任务里只传手牌状态和对手 ID。
+    换发快照后，旧段保留到引用它的任务全部完成才回收。
+    """
+
+    def __init__(self, workers: int, engine_kwargs: Optional[dict] = None):
+        # 先在父进程加载只读表，子进程通过写时复制直接共享
+        get_preflop_table()
+        method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=mp.get_context(method),
+            initializer=_init_worker, initargs=(engine_kwargs or {},)
+        )
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._snapshot: Optional[tuple] = None
+        self._array: Optional[np.ndarray] = None
+        # 段名 -> 尚未完成的任务数；已换下但仍被任务引用的段
+        self._in_flight: Dict[str, int] = {}
+        self._retired: Dict[str, shared_memory.SharedMemory] = {}
+        self._lock = threading.Lock()
+
+    def publish_opponents(self, rows: Iterable[dict]) -> None:
+        """把对手统计写入新的共享内存快照，之后提交的任务都使用它"""
+        records = sorted(tuple(row[name] for name in OPPONENT_DTYPE.names) for row in rows)
+        array = np.array(records, dtype=OPPONENT_DTYPE)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=OPPONENT_DTYPE, buffer=shm.buf)[:] = array
+        with self._lock:
+            old, self._shm = self._shm, shm
+            self._snapshot = (shm.name, len(array))
+            self._array = array
+            if old is not None:
+                self._retired[old.name] = old
+                self._release_retired()
+
+    def _release_retired(self) -> None:
+        for name in [n for n in self._retired if not self._in_flight.get(n)]:
+            shm = self._retired.pop(name)
+            shm.close()
+            shm.unlink()
+
+    def _task_done(self, name: str) -> None:
+        with self._lock:
+            self._in_flight[name] -= 1
+            if not self._in_flight[name]:
+                del self._in_flight[name]
+                self._release_retired()
+
+    def lookup_opponent(self, user_id) -> Optional[dict]:
+        """在父进程查当前快照中的对手统计，与工作进程看到的一致"""
+        array = self._array
+        if array is None or user_id is None:
+            return None
+        return _find_opponent(array, user_id)
+
+    def submit(self, strategy_state: dict, opponent_id=None, opponent_stats: Optional[dict] = None) -> Future:
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                self._in_flight[snapshot[0]] = self._in_flight.get(snapshot[0], 0) + 1
+        try:
+            future = self.executor.submit(_advise, strategy_state, opponent_id, snapshot, opponent_stats)
+        except Exception:
+            if snapshot is not None:
+                self._task_done(snapshot[0])
+            raise
+        if snapshot is not None:
+            future.add_done_callback(lambda _: self._task_done(snapshot[0]))
+        return future
+
+    def map(self, strategy_states: List[dict], opponent_ids: Optional[List] = None) -> List[dict]:
+        opponent_ids = opponent_ids or [None] * len(strategy_states)
+        futures = [self.submit(s, o) for s, o in zip(strategy_states, opponent_ids)]
+        return [f.result() for f in futures]
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        with self._lock:
+            if self._shm is not None:
+                self._retired[self._shm.name] = self._shm
+                self._shm = None
+            self._in_flight.clear()
+            self._release_retired()
+
+    def __enter__(self) -> 'AdvicePool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _benchmark_states(count: int, seed: int = 0) -> List[dict]:
+    """随机翻牌/转牌/河牌局面，用于吞吐量基准"""
+    rng = np.random.default_rng(seed)
+    states = []
+    for i in range(count):
+        cards = [INDEX_TO_CODE[c] for c in rng.choice(52, 7, replace=False)]
+        board_size = (3, 4, 5)[i % 3]
+        states.append({
+            "street": ("FLOP", "TURN", "RIVER")[i % 3],
+            "hero_cards": CardSet.from_codes(cards[:2]),
+            "board": CardSet.from_codes(cards[2:2 + board_size]),
+            "num_opponents": 2,
+        })
+    return states
+
+
+def benchmark(worker_counts=(1, 2, 4, 8), decisions: int = 400, samples: int = 5000) -> dict:
+    """各工作进程数下每秒可完成的决策数"""
+    states = _benchmark_states(decisions)
+    results = {}
+    for workers in worker_counts:
+        # 固定样本数而非时间预算，使每个决策的工作量一致
+        with AdvicePool(workers, {"time_budget": None, "max_samples": samples}) as pool:
+            pool.map(states[:workers * 2])  # 预热子进程
+            start = time.perf_counter()
+            pool.map(states)
+            results[workers] = decisions / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="多进程建议计算吞吐量基准")
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--decisions", type=int, default=400)
+    args = arg_parser.parse_args()
+    print(f"CPU 核数: {mp.cpu_count()}")
+    for workers, rate in benchmark(args.workers, args.decisions).items():
+        print(f"{workers} workers: {rate:.1f} decisions/s")
@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from database.connection import ConnectionPool
+from utils.metrics import METRICS
+
+# 每个 (玩家, 街, 位置) 的计数：动作数、自愿入池、主动下注/加注、弃牌
+COUNTERS = ("actions", "voluntary", "aggressive", "folds")
+# 缩放指数超过该值时把地标时间前移，避免浮点溢出（2^512 远小于 double 上限）
+REBASE_EXPONENT = 512.0
+
+UPSERT_AGGREGATE_SQL = """
+    INSERT INTO opponent_aggregates (user_id, street, position, actions, voluntary, aggressive, folds)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, street, position) DO UPDATE SET
+        actions = actions + excluded.actions,
+        voluntary = voluntary + excluded.voluntary,
+        aggressive = aggressive + excluded.aggressive,
+        folds = folds + excluded.folds
+"""
+SELECT_AGGREGATES_SQL = """
+    SELECT street, position, actions, voluntary, aggressive, folds
+    FROM opponent_aggregates WHERE user_id = ?
+"""
+
+
+def normalize_street(street) -> str:
+    """'PRE_FLOP' / 'preflop' 统一为 'preflop'"""
+    return str(street or "").lower().replace("_", "")
+
+
+class AggregateStore:
+    """按 (玩家, 街, 位置) 的指数衰减行为计数，半衰期 half_life 秒
+
+    采用前向衰减：时刻 t 的一次动作以 2^((t - 地标)/half_life) 的权重累加，
+    当前值等于存储值乘以 2^(-(now - 地标)/half_life)。因此每次更新只是加法，
+    不需要读出旧值重算；比率（入池率等）中缩放因子相互抵消。
+    增量先在内存中累计，随 DatabaseManager.flush 一次批量 UPSERT；
+    读取某个玩家只按主键前缀查询一次。
+    """
+
+    def __init__(self, pool: ConnectionPool, half_life: float = 7 * 86400.0,
+                 clock: Callable[[], float] = time.time, create_schema: bool = True):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.pool = pool
+        self.half_life = half_life
+        self.clock = clock
+        # user_id -> {(street, position): [actions, voluntary, aggressive, folds]} 的待写入缩放增量
+        self._pending: Dict[int, Dict[tuple, list]] = {}
+        self._lock = threading.RLock()
+        self._flushes = 0
+        if create_schema:
+            self._create_tables()
+        with self.pool.writer() as conn:
+            row = conn.execute("SELECT value FROM aggregate_meta WHERE key = 'landmark'").fetchone()
+            if row is None:
+                self.landmark = self.clock()
+                conn.execute("INSERT INTO aggregate_meta VALUES ('landmark', ?)", (self.landmark,))
+            else:
+                self.landmark = row[0]
+
+    def _create_tables(self):
+        with self.pool.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS opponent_aggregates (
+                    user_id INTEGER NOT NULL,
+                    street TEXT NOT NULL,
+                    position TEXT NOT NULL DEFAULT '',
+                    actions REAL DEFAULT 0.0,  -- 按地标时间缩放后的计数
+                    voluntary REAL DEFAULT 0.0,
+                    aggressive REAL DEFAULT 0.0,
+                    folds REAL DEFAULT 0.0,
+                    PRIMARY KEY (user_id, street, position)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS aggregate_meta (key TEXT PRIMARY KEY, value REAL)")
+
+    def _scale(self, now: float) -> float:
+        return 2.0 ** ((now - self.landmark) / self.half_life)
+
+    def record(self, user_id, action: str, street, position=None) -> None:
+        """O(1) 累计一次动作"""
+        now = self.clock()
+        with self._lock:
+            if (now - self.landmark) / self.half_life > REBASE_EXPONENT:
+                self._rebase(now)
+            weight = self._scale(now)
+            cells = self._pending.get(user_id)
+            if cells is None:
+                cells = self._pending[user_id] = {}
+            key = (normalize_street(street), "" if position is None else str(position))
+            counts = cells.get(key)
+            if counts is None:
+                counts = cells[key] = [0.0, 0.0, 0.0, 0.0]
+            counts[0] += weight
+            if action in ("CALL", "BET", "RAISE"):
+                counts[1] += weight
+            if action in ("BET", "RAISE"):
+                counts[2] += weight
+            if action == "FOLD":
+                counts[3] += weight
+
+    def _rebase(self, now: float) -> None:
+        """地标时间前移到 now，所有存储值按同一因子缩小（很少发生的 O(n) 操作）"""
+        self.flush()
+        factor = 1.0 / self._scale(now)
+        with self.pool.writer() as conn:
+            conn.execute("UPDATE opponent_aggregates SET actions = actions * ?, voluntary = voluntary * ?, "
+                         "aggressive = aggressive * ?, folds = folds * ?", (factor,) * 4)
+            conn.execute("UPDATE aggregate_meta SET value = ? WHERE key = 'landmark'", (now,))
+        self.landmark = now
+        self._flushes += 1
+        self.logger.info("Aggregate landmark rebased.")
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [(user_id, street, position, *counts)
+                    for user_id, cells in self._pending.items()
+                    for (street, position), counts in cells.items()]
+            with METRICS.timer("aggregate_flush"), self.pool.writer() as conn:
+                conn.executemany(UPSERT_AGGREGATE_SQL, rows)
+            self._pending.clear()
+            self._flushes += 1
+
+    def get(self, user_id) -> Optional[dict]:
+        """玩家当前的衰减统计：总体、按街、按位置；没有记录时返回 None"""
+        while True:
+            with self._lock:
+                flushes = self._flushes
+            rows = self.pool.read(SELECT_AGGREGATES_SQL, (user_id,))
+            with self._lock:
+                if flushes != self._flushes:
+                    continue
+                cells = {(street, position): list(counts) for street, position, *counts in rows}
+                for key, counts in self._pending.get(user_id, {}).items():
+                    merged = cells.setdefault(key, [0.0, 0.0, 0.0, 0.0])
+                    for i, value in enumerate(counts):
+                        merged[i] += value
+                decay = 1.0 / self._scale(self.clock())
+                break
+        if not cells:
+            return None
+
+        total = [0.0] * len(COUNTERS)
+        by_street: Dict[str, list] = {}
+        by_position: Dict[str, list] = {}
+        for (street, position), counts in cells.items():
+            for group, key in ((by_street, street), (by_position, position)):
+                acc = group.setdefault(key, [0.0] * len(COUNTERS))
+                for i, value in enumerate(counts):
+                    acc[i] += value
+            for i, value in enumerate(counts):
+                total[i] += value
+
+        preflop = by_street.get("preflop")
+        summary = _rates(total, decay)
+        summary["user_id"] = user_id
+        summary["pfr"] = preflop[2] / preflop[0] if preflop and preflop[0] else None
+        summary["by_street"] = {street: _rates(counts, decay) for street, counts in by_street.items()}
+        summary["by_position"] = {position: _rates(counts, decay) for position, counts in by_position.items() if position}
+        return summary
+
+
+def _rates(counts: list, decay: float) -> dict:
+    actions, voluntary, aggressive, folds = counts
+    return {
+        "weight": actions * decay,  # 衰减后的有效动作数
+        "vpip": voluntary / actions if actions else 0.0,
+        "aggression": aggressive / actions if actions else 0.0,
+        "fold_frequency": folds / actions if actions else 0.0,
+    }
@@ -0,0 +1,106 @@
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# WAL 下读不阻塞写、写不阻塞读；synchronous=NORMAL 在 WAL 下只在检查点时 fsync
+WRITER_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # 负数为 KiB，约 16 MB 页缓存
+    "temp_store": "MEMORY",
+}
+READER_PRAGMAS = {
+    "cache_size": -8000,
+    "temp_store": "MEMORY",
+    "query_only": 1,
+}
+
+
+class ConnectionPool:
+    """SQLite 连接管理：一个专用写连接 + 每个线程一个只读连接
+
+    写连接由锁串行化，所有写入都经 writer() 在一个事务里完成；读连接按线程创建、
+    线程结束后回收，读取可以在写入进行时并发执行。相同 SQL 文本复用每个连接的预编译语句缓存。
+    ":memory:" 数据库无法在连接间共享，读写都走写连接。
+    """
+
+    def __init__(self, db_path: str, timeout: float = 5.0, cached_statements: int = 256):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.shared = db_path == ":memory:"
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        # 线程 -> 只读连接，用于关闭和回收已结束线程的连接
+        self._readers: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._readers_lock = threading.Lock()
+        self._writer = self._connect(WRITER_PRAGMAS)
+        self.closed = False
+
+    def _connect(self, pragmas: dict) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @property
+    def journal_mode(self) -> str:
+        with self._write_lock:
+            return self._writer.execute("PRAGMA journal_mode").fetchone()[0]
+
+    @property
+    def user_version(self) -> int:
+        """库文件头中的 user_version，用作表结构版本号"""
+        with self._write_lock:
+            return self._writer.execute("PRAGMA user_version").fetchone()[0]
+
+    @user_version.setter
+    def user_version(self, version: int) -> None:
+        with self._write_lock:
+            self._writer.execute(f"PRAGMA user_version = {int(version)}")
+
+    @contextmanager
+    def writer(self):
+        """独占写连接并开启事务，正常退出时提交、异常时回滚"""
+        with self._write_lock, self._writer:
+            yield self._writer
+
+    def reader(self) -> sqlite3.Connection:
+        """当前线程的只读连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect(READER_PRAGMAS)
+            with self._readers_lock:
+                self._reap_readers()
+                self._readers[threading.current_thread()] = conn
+        return conn
+
+    def _reap_readers(self) -> None:
+        for thread in [t for t in self._readers if not t.is_alive()]:
+            self._readers.pop(thread).close()
+
+    def read(self, sql: str, params=()) -> List[Tuple]:
+        """执行只读查询并返回全部行"""
+        if self.shared:
+            with self._write_lock:
+                return self._writer.execute(sql, params).fetchall()
+        return self.reader().execute(sql, params).fetchall()
+
+    def read_one(self, sql: str, params=()):
+        rows = self.read(sql, params)
+        return rows[0] if rows else None
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        with self._write_lock:
+            self._writer.close()
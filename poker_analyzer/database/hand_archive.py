@@ -0,0 +1,333 @@
+import json
+import mmap
+import os
+import struct
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from core.game_tracker import HandState
+from models.card import CardSet
+
+# 段文件: 文件头(魔数, 版本, 元数据长度) + JSON 元数据 + 按 8 字节对齐的列数据
+_HEADER = struct.Struct("<4sHI")
+_MAGIC = b"PHHS"
+_VERSION = 1
+_ALIGN = 8
+SEGMENT_PATTERN = "segment-{:08d}.phh"
+
+# 每手一行
+HAND_COLUMNS = {
+    "started_at": np.float64,   # 开始时间戳，段内升序，用作日期索引
+    "table": np.int32,          # 元数据 tables 中的下标
+    "street": np.int8,          # 最后到达的街，元数据 streets 中的下标
+    "position": np.int8,
+    "pot": np.float64,
+    "board": np.int64,          # CardSet 位掩码
+    "hero_cards": np.int64,
+    "action_start": np.int64,   # 在动作列中的起始行
+    "action_count": np.int32,
+}
+# 每个动作一行
+ACTION_COLUMNS = {
+    "act_user": np.int64,       # 无法识别的玩家为 -1
+    "act_type": np.int16,
+    "act_street": np.int8,
+    "act_amount": np.float64,
+}
+# 按玩家和牌桌的倒排索引 (CSR)：ids[i] 出现在 hands[offsets[i]:offsets[i+1]] 这些行
+INDEX_COLUMNS = {
+    "player_ids": np.int64,
+    "player_offsets": np.int64,
+    "player_hands": np.int32,
+    "table_offsets": np.int64,
+    "table_hands": np.int32,
+}
+_VOCABS = ("tables", "streets", "positions", "action_types")
+
+
+def _player_key(user_id) -> int:
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return -1
+
+
+class _Vocab:
+    """字符串 -> 段内小整数编码"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value) -> int:
+        value = "" if value is None else str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _csr(keys: np.ndarray, rows: np.ndarray, size: Optional[int] = None):
+    """(key, row) 对 -> (唯一键, 偏移, 行号)；size 给定时键为 0..size-1 的稠密编码"""
+    pairs = np.unique(np.stack([keys, rows], axis=1), axis=0) if len(keys) else np.zeros((0, 2), np.int64)
+    if size is None:
+        ids, counts = np.unique(pairs[:, 0], return_counts=True)
+    else:
+        ids, counts = np.arange(size), np.bincount(pairs[:, 0], minlength=size)
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return ids, offsets, pairs[:, 1]
+
+
+def write_segment(path: str, hands: List[HandState]) -> None:
+    """把一批完成的手牌按开始时间排序后写成一个不可变的段文件"""
+    hands = sorted(hands, key=lambda h: h.started_at)
+    vocabs = {name: _Vocab() for name in _VOCABS}
+    columns = {name: np.zeros(len(hands), dtype=dtype) for name, dtype in HAND_COLUMNS.items()}
+    actions = {name: [] for name in ACTION_COLUMNS}
+    for row, hand in enumerate(hands):
+        columns["started_at"][row] = hand.started_at
+        columns["table"][row] = vocabs["tables"].code(hand.table_id)
+        columns["street"][row] = vocabs["streets"].code(hand.street)
+        columns["position"][row] = vocabs["positions"].code(hand.position)
+        columns["pot"][row] = hand.pot or 0
+        columns["board"][row] = hand.board.mask
+        columns["hero_cards"][row] = hand.hero_cards.mask
+        columns["action_start"][row] = len(actions["act_user"])
+        columns["action_count"][row] = len(hand.actions)
+        for action in hand.actions:
+            actions["act_user"].append(_player_key(action.get("user_id")))
+            actions["act_type"].append(vocabs["action_types"].code(action.get("action_type")))
+            actions["act_street"].append(vocabs["streets"].code(action.get("street")))
+            actions["act_amount"].append(action.get("amount") or 0)
+    columns.update({name: np.array(actions[name], dtype=dtype) for name, dtype in ACTION_COLUMNS.items()})
+
+    action_rows = np.repeat(np.arange(len(hands), dtype=np.int64), columns["action_count"])
+    known = columns["act_user"] >= 0
+    columns["player_ids"], columns["player_offsets"], columns["player_hands"] = _csr(
+        columns["act_user"][known], action_rows[known])
+    tables = len(vocabs["tables"].values)
+    _, columns["table_offsets"], columns["table_hands"] = _csr(
+        columns["table"].astype(np.int64), np.arange(len(hands), dtype=np.int64), tables)
+
+    layout = {}
+    offset = 0
+    for name, dtype in {**HAND_COLUMNS, **ACTION_COLUMNS, **INDEX_COLUMNS}.items():
+        columns[name] = np.ascontiguousarray(columns[name], dtype=dtype)
+        layout[name] = [offset, len(columns[name])]
+        offset += -(-columns[name].nbytes // _ALIGN) * _ALIGN
+    times = columns["started_at"]
+    meta = {
+        "hands": len(hands),
+        "min_time": float(times[0]) if len(hands) else 0.0,
+        "max_time": float(times[-1]) if len(hands) else 0.0,
+        "columns": layout,
+        **{name: vocab.values for name, vocab in vocabs.items()},
+    }
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode()
+    data_start = -(-(_HEADER.size + len(meta_bytes)) // _ALIGN) * _ALIGN
+
+    # 先写临时文件再原子替换，读者永远看不到写了一半的段
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(meta_bytes)))
+        f.write(meta_bytes)
+        for name, (start, _) in layout.items():
+            f.seek(data_start + start)
+            f.write(columns[name].tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """只读段，列数据通过 mmap 映射，只有命中的行才会解码"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_len = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"无效的手牌历史段: {path}")
+        self.meta = json.loads(self._buffer[_HEADER.size:_HEADER.size + meta_len])
+        self._data_start = -(-(_HEADER.size + meta_len) // _ALIGN) * _ALIGN
+        self._table_codes = {name: i for i, name in enumerate(self.meta["tables"])}
+        self._views: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.meta["hands"]
+
+    def column(self, name: str) -> np.ndarray:
+        view = self._views.get(name)
+        if view is None:
+            start, count = self.meta["columns"][name]
+            dtype = {**HAND_COLUMNS, **ACTION_COLUMNS, **INDEX_COLUMNS}[name]
+            view = self._views[name] = np.frombuffer(
+                self._buffer, dtype=dtype, count=count, offset=self._data_start + start)
+        return view
+
+    def player_rows(self, user_id) -> np.ndarray:
+        key = _player_key(user_id)
+        ids = self.column("player_ids")
+        i = int(np.searchsorted(ids, key))
+        if i == len(ids) or ids[i] != key:
+            return np.zeros(0, dtype=np.int32)
+        offsets = self.column("player_offsets")
+        return self.column("player_hands")[offsets[i]:offsets[i + 1]]
+
+    def table_rows(self, table_id) -> np.ndarray:
+        code = self._table_codes.get("" if table_id is None else str(table_id))
+        if code is None:
+            return np.zeros(0, dtype=np.int32)
+        offsets = self.column("table_offsets")
+        return self.column("table_hands")[offsets[code]:offsets[code + 1]]
+
+    def rows(self, player=None, table=None, start: Optional[float] = None,
+             end: Optional[float] = None) -> np.ndarray:
+        """满足全部条件的行号（升序）；时间范围为 [start, end)"""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int32)
+        if (start is not None and self.meta["max_time"] < start) or \
+                (end is not None and self.meta["min_time"] >= end):
+            return np.zeros(0, dtype=np.int32)
+        times = self.column("started_at")
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(times, end, side="left"))
+        rows = None
+        if player is not None:
+            rows = self.player_rows(player)
+        if table is not None:
+            table_rows = self.table_rows(table)
+            rows = table_rows if rows is None else np.intersect1d(rows, table_rows, assume_unique=True)
+        if rows is None:
+            return np.arange(lo, hi, dtype=np.int32)
+        return rows[(rows >= lo) & (rows < hi)]
+
+    def hand(self, row: int) -> HandState:
+        meta = self.meta
+        start = int(self.column("action_start")[row])
+        stop = start + int(self.column("action_count")[row])
+        actions = [
+            {
+                "street": meta["streets"][street],
+                "user_id": None if user < 0 else int(user),
+                "action_type": meta["action_types"][kind],
+                "amount": float(amount),
+            }
+            for user, kind, street, amount in zip(
+                self.column("act_user")[start:stop].tolist(), self.column("act_type")[start:stop].tolist(),
+                self.column("act_street")[start:stop].tolist(), self.column("act_amount")[start:stop].tolist())
+        ]
+        # 由动作序列还原下注账本
+        street = meta["streets"][self.column("street")[row]]
+        street_bets, contributions = {}, {}
+        for action in actions:
+            user, amount = action["user_id"], action["amount"]
+            contributions[user] = contributions.get(user, 0) + amount
+            if action["street"] == street:
+                street_bets[user] = street_bets.get(user, 0) + amount
+        return HandState(
+            street=street,
+            pot=float(self.column("pot")[row]),
+            board=CardSet(int(self.column("board")[row])),
+            current_bet=max(street_bets.values(), default=0),
+            hero_cards=CardSet(int(self.column("hero_cards")[row])),
+            position=meta["positions"][self.column("position")[row]],
+            actions=actions,
+            table_id=meta["tables"][self.column("table")[row]] or None,
+            started_at=float(self.column("started_at")[row]),
+            street_bets=street_bets,
+            contributions=contributions,
+            seq=len(actions),
+        )
+
+    def close(self) -> None:
+        self._views.clear()
+        self._buffer.close()
+
+
+class HandArchive:
+    """追加写入的手牌历史归档
+
+    完成的手牌先在内存中缓冲，满 segment_size 手或最早的缓冲手牌超过 flush_interval 秒
+    （由 flush_if_due 检查，TrackerRegistry 的定期清理会调用）后写成一个新的段文件；
+    已写入的段不再修改。查询按段的时间范围和玩家/牌桌索引裁剪，
+    只解码命中的手牌。
+    """
+
+    def __init__(self, directory: str, segment_size: int = 10000, flush_interval: Optional[float] = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._pending_since = 0.0
+        os.makedirs(directory, exist_ok=True)
+        names = sorted(n for n in os.listdir(directory) if n.startswith("segment-") and n.endswith(".phh"))
+        self.segments: List[Segment] = [Segment(os.path.join(directory, n)) for n in names]
+        self._next_id = int(names[-1][8:16]) + 1 if names else 1
+        self._pending: List[HandState] = []
+
+    def append(self, hand: HandState) -> None:
+        if not self._pending:
+            self._pending_since = self.clock()
+        self._pending.append(hand)
+        if len(self._pending) >= self.segment_size:
+            self.flush()
+
+    def flush_if_due(self) -> bool:
+        """缓冲中最早的手牌已等待 flush_interval 秒时写出，返回是否写出"""
+        if not self._pending or self.flush_interval is None or \
+                self.clock() - self._pending_since < self.flush_interval:
+            return False
+        self.flush()
+        return True
+
+    def pending_counts(self) -> Counter:
+        """尚未写成段、仍在内存中的手牌数，按牌桌"""
+        return Counter(hand.table_id for hand in self._pending)
+
+    def flush(self) -> None:
+        """把缓冲中的手牌写成新段"""
+        if not self._pending:
+            return
+        path = os.path.join(self.directory, SEGMENT_PATTERN.format(self._next_id))
+        write_segment(path, self._pending)
+        self._next_id += 1
+        self._pending = []
+        self.segments.append(Segment(path))
+
+    def query(self, player=None, table=None, start: Optional[float] = None,
+              end: Optional[float] = None) -> Iterator[HandState]:
+        """按玩家 ID、牌桌、时间范围 [start, end) 筛选手牌，按段顺序产出"""
+        for segment in self.segments:
+            for row in segment.rows(player, table, start, end).tolist():
+                yield segment.hand(row)
+        yield from self._pending_matches(player, table, start, end)
+
+    def count(self, player=None, table=None, start: Optional[float] = None,
+              end: Optional[float] = None) -> int:
+        """只读索引不解码手牌的计数"""
+        return sum(len(s.rows(player, table, start, end)) for s in self.segments) + \
+            sum(1 for _ in self._pending_matches(player, table, start, end))
+
+    def _pending_matches(self, player, table, start, end):
+        key = None if player is None else _player_key(player)
+        for hand in self._pending:
+            if (table is None or hand.table_id == table) and \
+                    (start is None or hand.started_at >= start) and (end is None or hand.started_at < end) and \
+                    (key is None or any(_player_key(a.get("user_id")) == key for a in hand.actions)):
+                yield hand
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self.segments) + len(self._pending)
+
+    def close(self) -> None:
+        self.flush()
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
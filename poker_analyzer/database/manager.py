@@ -1,15 +1,85 @@
-import sqlite3
 import logging
+import threading
+import time
+import weakref
+from database.aggregates import AggregateStore, normalize_street
+from database.connection import ConnectionPool
+from database.profiles import ProfileStore
+from utils.cache import LRUCache
+from utils.metrics import METRICS
+
+# 累加增量并在 SQL 中按新计数重算比率；SET 右侧的列引用的是更新前的旧值
+UPSERT_OPPONENT_SQL = """
+    INSERT INTO opponents (user_id, hands_played, hands_raised, vpip_count, vpip, pfr)
+    VALUES (:user_id, :hands_played, :hands_raised, :vpip_count,
+            CAST(:vpip_count AS REAL) / :hands_played, CAST(:hands_raised AS REAL) / :hands_played)
+    ON CONFLICT(user_id) DO UPDATE SET
+        hands_played = hands_played + excluded.hands_played,
+        hands_raised = hands_raised + excluded.hands_raised,
+        vpip_count = vpip_count + excluded.vpip_count,
+        vpip = CAST(vpip_count + excluded.vpip_count AS REAL) / (hands_played + excluded.hands_played),
+        pfr = CAST(hands_raised + excluded.hands_raised AS REAL) / (hands_played + excluded.hands_played)
+"""
+SELECT_OPPONENT_SQL = "SELECT user_id, vpip, pfr, hands_played, hands_raised, vpip_count FROM opponents WHERE user_id = ?"
+SELECT_ALL_OPPONENTS_SQL = "SELECT user_id, vpip, pfr, hands_played, hands_raised, vpip_count FROM opponents"
+
+# 表结构版本，记录在 PRAGMA user_version 中；库已是该版本时启动不再执行建表语句
+SCHEMA_VERSION = 1
+
+# 按位置的衰减样本（有效动作数）达到此值才用该位置的弃牌率，否则用总体
+POSITION_MIN_WEIGHT = 10.0
+
+_MISSING = object()
 
 class DatabaseManager:
-    def __init__(self, db_path="poker_history.db"):
+    def __init__(self, db_path="poker_history.db", buffer_size=1, flush_interval=None,
+                 cache_size=1024, cache_ttl=None, half_life=7 * 86400.0):
+        """buffer_size: 累计多少个动作后批量写入；flush_interval: 距上次写入超过多少秒也写入，
+        由后台线程定时检查，没有新动作到达时缓冲的增量也会按时写入
+        cache_size / cache_ttl: get_opponent_stats 读缓存的容量和过期秒数
+        half_life: 按街/位置衰减统计的半衰期（秒）
+
+        可在多个线程间共享：写入经连接池的单一写连接，读取使用各线程自己的连接。
+        """
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.conn = sqlite3.connect(db_path)
-        self._create_tables()
+        self.pool = ConnectionPool(db_path)
+        # 保护待写入增量和读缓存；_flushes 每次提交后加一，_writing 表示有一批增量正在写入，
+        # 用于检测读取期间的写入。_flush_lock 让写入依次进行，写数据库时不持有 _lock
+        self._lock = threading.RLock()
+        self._flush_lock = threading.RLock()
+        self._flushes = 0
+        self._writing = False
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        # user_id -> [hands_played, hands_raised, vpip_count] 的待写入增量
+        self._pending = {}
+        self._pending_actions = 0
+        self._last_flush = time.monotonic()
+        # user_id -> 对手统计（未知玩家缓存为 None）
+        self._stats_cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+        # 每次成功写入后调用（如向工作进程重新发布对手快照）
+        self.flush_listeners = []
+        create_schema = self.pool.user_version < SCHEMA_VERSION
+        if create_schema:
+            self._create_tables()
+        # 玩家生涯数据与对手统计共用连接池和写连接
+        self.profiles = ProfileStore(self.pool, create_schema=create_schema)
+        self.aggregates = AggregateStore(self.pool, half_life, create_schema=create_schema)
+        if create_schema:
+            self.pool.user_version = SCHEMA_VERSION
+        self._stop = threading.Event()
+        self._flusher = None
+        if flush_interval is not None:
+            # 线程只持有弱引用，未 close 的实例仍可被回收
+            self._flusher = threading.Thread(
+                target=_flush_periodically, args=(weakref.ref(self), self._stop, flush_interval),
+                name="db-flush", daemon=True
+            )
+            self._flusher.start()
 
     def _create_tables(self):
-        with self.conn:
-            self.conn.execute("""
+        with self.pool.writer() as conn:
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS opponents (
                     user_id INTEGER PRIMARY KEY,
                     vpip REAL DEFAULT 0.0,  -- 自愿入池百分比
@@ -21,68 +91,135 @@ class DatabaseManager:
             """)
             self.logger.info("Database table 'opponents' created or verified.")
 
-    def update_opponent_stats(self, user_id, action, street):
+    def update_opponent_stats(self, user_id, action, street, position=None):
         """更新对手的行为统计数据
         """
-        with self.conn:
-            cursor = self.conn.cursor()
+        self.record_action(user_id, action, street, position)
 
-            # Check if opponent exists, if not, create a new record
-            cursor.execute("SELECT * FROM opponents WHERE user_id = ?", (user_id,))
-            opponent = cursor.fetchone()
+    def record_action(self, user_id, action, street, position=None):
+        """在内存中累计一次动作的计数增量，达到批量大小或时间间隔时写入数据库"""
+        self.aggregates.record(user_id, action, street, position)
+        # 消息里的街名是 "PRE_FLOP"，与聚合表使用同一规范化
+        raised = action == "RAISE" and normalize_street(street) == "preflop"
+        voluntary = action in ["CALL", "BET", "RAISE"]
+        with self._lock:
+            delta = self._pending.get(user_id)
+            if delta is None:
+                delta = self._pending[user_id] = [0, 0, 0]
+            delta[0] += 1
+            delta[1] += raised
+            delta[2] += voluntary
+            self._pending_actions += 1
+            self._update_cached_stats(user_id, raised, voluntary)
+            due = self._pending_actions >= self.buffer_size or (
+                self.flush_interval is not None
+                and time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
 
-            if opponent is None:
-                cursor.execute("INSERT INTO opponents (user_id) VALUES (?)", (user_id,))
-                self.logger.info(f"Added new opponent with user_id: {user_id}")
+    def _update_cached_stats(self, user_id, raised, voluntary):
+        """让缓存与写入保持一致：已缓存的玩家原地累加计数，未知玩家的缓存作废"""
+        cached = self._stats_cache.peek(user_id)
+        if cached is None:
+            self._stats_cache.pop(user_id)
+            return
+        cached["hands_played"] += 1
+        cached["hands_raised"] += raised
+        cached["vpip_count"] += voluntary
+        cached["vpip"] = cached["vpip_count"] / cached["hands_played"]
+        cached["pfr"] = cached["hands_raised"] / cached["hands_played"]
 
-            # Update statistics based on action
-            if action in ["CALL", "BET", "RAISE"]:
-                cursor.execute("UPDATE opponents SET vpip_count = vpip_count + 1 WHERE user_id = ?", (user_id,))
-                self.logger.debug(f"VPIP incremented for user_id {user_id}.")
+    def cache_stats(self):
+        """对手统计读缓存的命中率等指标"""
+        with self._lock:
+            return self._stats_cache.stats()
 
-            if action == "RAISE" and street == "preflop":
-                cursor.execute("UPDATE opponents SET hands_raised = hands_raised + 1 WHERE user_id = ?", (user_id,))
-                self.logger.debug(f"Hands raised incremented for user_id {user_id}.")
+    def flush(self):
+        """把所有待写入增量在一个事务里用 UPSERT 写入
 
-            # Update the number of hands played
-            cursor.execute("UPDATE opponents SET hands_played = hands_played + 1 WHERE user_id = ?", (user_id,))
-            self.logger.debug(f"Hands played incremented for user_id {user_id}.")
-
-            # Log raw counts before calculating rates
-            opponent_stats_before = self.get_opponent_stats(user_id)
-            self.logger.debug(f"Raw counts for user_id {user_id} before updating rates: {opponent_stats_before}")
-
-            # Update VPIP and PFR based on updated statistics
-            hands_played = opponent_stats_before['hands_played']
-            hands_raised = opponent_stats_before['hands_raised']
-            vpip_count = opponent_stats_before['vpip_count']
-
-            self.logger.debug(f"Calculating VPIP and PFR for user_id {user_id}: hands_played={hands_played}, hands_raised={hands_raised}, vpip_count={vpip_count}")
-
-            vpip_rate = (vpip_count / hands_played) if hands_played > 0 else 0
-            pfr_rate = (hands_raised / hands_played) if hands_played > 0 else 0
-
-            self.logger.debug(f"Updated rates for user_id {user_id}: VPIP={vpip_rate}, PFR={pfr_rate}")
+        在 _lock 内换下缓冲区，写数据库和通知监听者都在 _lock 外进行，
+        写入期间记录动作和读缓存不被阻塞。
+        """
+        with self._flush_lock:
+            self.aggregates.flush()
+            with self._lock:
+                self._last_flush = time.monotonic()
+                pending, actions = self._pending, self._pending_actions
+                if not pending:
+                    return
+                self._pending, self._pending_actions = {}, 0
+                self._writing = True
+            rows = [
+                {"user_id": user_id, "hands_played": d[0], "hands_raised": d[1], "vpip_count": d[2]}
+                for user_id, d in pending.items()
+            ]
+            try:
+                with METRICS.timer("db_flush"), self.pool.writer() as conn:
+                    conn.executemany(UPSERT_OPPONENT_SQL, rows)
+            except Exception:
+                # 写入失败时把换下的增量并回缓冲区，下次再写
+                with self._lock:
+                    for user_id, d in pending.items():
+                        delta = self._pending.setdefault(user_id, [0, 0, 0])
+                        for i, value in enumerate(d):
+                            delta[i] += value
+                    self._pending_actions += actions
+                    self._writing = False
+                raise
+            with self._lock:
+                self._flushes += 1
+                self._writing = False
+            self.logger.debug("Flushed %d actions for %d opponents.", actions, len(rows))
+        # 在锁外通知，监听者可以再读数据库
+        for listener in self.flush_listeners:
+            listener()
 
-            cursor.execute("""
-                UPDATE opponents
-                SET vpip = ?,
-                    pfr = ?
-                WHERE user_id = ?
-            """, (vpip_rate, pfr_rate, user_id))
+    def _flush_if_due(self):
+        with self._lock:
+            due = self._pending_actions and time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
 
-            # Log updated opponent statistics
-            updated_opponent = self.get_opponent_stats(user_id)
-            self.logger.debug(f"Updated opponent stats for user_id {user_id}: {updated_opponent}")
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.flush()
+        self.pool.close()
 
     def get_opponent_stats(self, user_id):
-        """获取对手的行为统计数据
+        """获取对手的行为统计数据，优先从读缓存返回；没有观察数据时退回玩家生涯数据
         """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT user_id, vpip, pfr, hands_played, hands_raised, vpip_count FROM opponents WHERE user_id = ?", (user_id,))
-        opponent = cursor.fetchone()
+        stats = self._observed_stats(user_id)
+        return stats if stats is not None else self.profiles.opponent_stats(user_id)
 
-        if opponent:
+    def _observed_stats(self, user_id):
+        with self._lock:
+            cached = self._stats_cache.get(user_id, _MISSING)
+            if cached is not _MISSING:
+                return dict(cached) if cached is not None else None
+        while True:
+            # 查询不持锁；期间若有一批增量正在写入或已提交，数据库行和内存增量可能
+            # 重复或遗漏计数：等这批写完再重新读取
+            with self._lock:
+                flushes, writing = self._flushes, self._writing
+            if writing:
+                with self._flush_lock:
+                    continue
+            opponent = self.pool.read_one(SELECT_OPPONENT_SQL, (user_id,))
+            with self._lock:
+                if flushes != self._flushes or self._writing:
+                    continue
+                cached = self._merge_pending(user_id, opponent)
+                self._stats_cache.put(user_id, cached)
+                return dict(cached) if cached is not None else None
+
+    def _merge_pending(self, user_id, opponent):
+        delta = self._pending.get(user_id)
+
+        if opponent is None and delta is None:
+            return None
+        if delta is None:
             return {
                 "user_id": opponent[0],
                 "vpip": opponent[1],
@@ -91,8 +228,62 @@ class DatabaseManager:
                 "hands_raised": opponent[4],
                 "vpip_count": opponent[5]
             }
-        else:
+
+        # 合并尚未写入的增量，比率在读取时按计数计算
+        hands_played, hands_raised, vpip_count = opponent[3:6] if opponent else (0, 0, 0)
+        hands_played += delta[0]
+        hands_raised += delta[1]
+        vpip_count += delta[2]
+        return {
+            "user_id": user_id,
+            "vpip": vpip_count / hands_played if hands_played > 0 else 0,
+            "pfr": hands_raised / hands_played if hands_played > 0 else 0,
+            "hands_played": hands_played,
+            "hands_raised": hands_raised,
+            "vpip_count": vpip_count
+        }
+
+    def get_recent_stats(self, user_id):
+        """对手近期（指数衰减）的总体、按街和按位置统计"""
+        return self.aggregates.get(user_id)
+
+    def get_fold_frequency(self, user_id, position=None):
+        """对手近期弃牌率：该位置样本足够时取该位置的，否则取总体的；没有近期数据返回 None"""
+        recent = self.aggregates.get(user_id) if user_id is not None else None
+        if recent is None:
             return None
+        bucket = recent["by_position"].get(position)
+        if bucket is not None and bucket["weight"] >= POSITION_MIN_WEIGHT:
+            return bucket["fold_frequency"]
+        return recent["fold_frequency"]
+
+    def get_all_opponent_stats(self):
+        """获取全部对手的统计数据，用于生成快照"""
+        self.flush()
+        return [
+            {
+                "user_id": row[0],
+                "vpip": row[1],
+                "pfr": row[2],
+                "hands_played": row[3],
+                "hands_raised": row[4],
+                "vpip_count": row[5]
+            }
+            for row in self.pool.read(SELECT_ALL_OPPONENTS_SQL)
+        ]
+
+def _flush_periodically(ref, stop: threading.Event, interval: float):
+    """后台定时写入：每隔 interval 秒检查一次到期的缓冲，实例被回收或关闭后退出"""
+    while not stop.wait(interval):
+        db = ref()
+        if db is None:
+            return
+        try:
+            db._flush_if_due()
+        except Exception as e:
+            db.logger.error("Periodic flush failed: %s", e)
+        del db
+
 
 if __name__ == "__main__":
     # 设置日志配置
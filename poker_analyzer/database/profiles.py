@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from typing import Iterable, Optional
+
+from database.connection import ConnectionPool
+from utils.cache import LRUCache
+from utils.metrics import METRICS
+
+PROFILE_FIELDS = ("total_hands", "pooling_hands", "win_num", "showdown_num")
+
+# 值没有变化的行不改写（WHERE 条件不成立时 UPSERT 什么也不做）
+UPSERT_PROFILE_SQL = """
+    INSERT INTO profiles (user_id, total_hands, pooling_hands, win_num, showdown_num, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        total_hands = excluded.total_hands,
+        pooling_hands = excluded.pooling_hands,
+        win_num = excluded.win_num,
+        showdown_num = excluded.showdown_num,
+        updated_at = excluded.updated_at
+    WHERE total_hands IS NOT excluded.total_hands OR pooling_hands IS NOT excluded.pooling_hands
+       OR win_num IS NOT excluded.win_num OR showdown_num IS NOT excluded.showdown_num
+"""
+SELECT_PROFILE_SQL = "SELECT total_hands, pooling_hands, win_num, showdown_num FROM profiles WHERE user_id = ?"
+
+_MISSING = object()
+
+
+class ProfileStore:
+    """WP_updateUserProfileNotify 下发的玩家生涯数据，每个玩家只保留最新值
+
+    一条消息的全部玩家在一个事务里 executemany 写入；内存中记着最近写过的值，
+    未变化的玩家不进入批量，数据库侧的 UPSERT 也跳过值相同的行。
+    """
+
+    def __init__(self, pool: ConnectionPool, cache_size: int = 100000, create_schema: bool = True):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.pool = pool
+        # user_id -> 最新的 (total_hands, pooling_hands, win_num, showdown_num)，未知玩家为 None
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.skipped = 0
+        if create_schema:
+            self._create_tables()
+
+    def _create_tables(self):
+        with self.pool.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    user_id INTEGER PRIMARY KEY,
+                    total_hands INTEGER DEFAULT 0,
+                    pooling_hands INTEGER DEFAULT 0,  -- 入池手数
+                    win_num INTEGER DEFAULT 0,
+                    showdown_num INTEGER DEFAULT 0,
+                    updated_at REAL
+                )
+            """)
+
+    def ingest(self, stats: Iterable[dict]) -> int:
+        """写入一条消息里的玩家数据（解析器的 player_stats 格式），返回实际改写的行数"""
+        latest = {}
+        for player in stats:
+            user_id = player.get("user_id")
+            if user_id is not None:
+                latest[user_id] = tuple(int(player.get(field) or 0) for field in PROFILE_FIELDS)
+
+        with self._lock:
+            rows = [(user_id, *values, time.time()) for user_id, values in latest.items()
+                    if self._cache.peek(user_id, _MISSING) != values]
+            self.skipped += len(latest) - len(rows)
+            if not rows:
+                return 0
+            with METRICS.timer("profile_ingest"), self.pool.writer() as conn:
+                before = conn.total_changes
+                conn.executemany(UPSERT_PROFILE_SQL, rows)
+                written = conn.total_changes - before
+            for row in rows:
+                self._cache.put(row[0], row[1:5])
+            self.written += written
+            self.skipped += len(rows) - written
+        self.logger.debug("Profiles: %d received, %d written.", len(latest), written)
+        return written
+
+    def get(self, user_id) -> Optional[dict]:
+        """玩家的最新生涯数据和由此计算的入池率、摊牌率、胜率"""
+        with self._lock:
+            values = self._cache.get(user_id, _MISSING)
+        if values is _MISSING:
+            values = self.pool.read_one(SELECT_PROFILE_SQL, (user_id,))
+            with self._lock:
+                # 读取期间可能有更新的写入，已缓存的值优先
+                current = self._cache.peek(user_id, _MISSING)
+                if current is _MISSING:
+                    self._cache.put(user_id, values)
+                else:
+                    values = current
+        if values is None:
+            return None
+        total_hands, pooling_hands, win_num, showdown_num = values
+        return {
+            "user_id": user_id,
+            "total_hands": total_hands,
+            "pooling_hands": pooling_hands,
+            "win_num": win_num,
+            "showdown_num": showdown_num,
+            "vpip": pooling_hands / total_hands if total_hands else 0.0,
+            "wtsd": showdown_num / pooling_hands if pooling_hands else 0.0,
+            "win_rate": win_num / total_hands if total_hands else 0.0,
+        }
+
+    def opponent_stats(self, user_id) -> Optional[dict]:
+        """没有逐手观察数据时，用生涯数据构造与 get_opponent_stats 同形的统计（没有 PFR）"""
+        profile = self.get(user_id)
+        if profile is None:
+            return None
+        return {
+            "user_id": user_id,
+            "vpip": profile["vpip"],
+            "pfr": None,
+            "hands_played": profile["total_hands"],
+            "hands_raised": None,
+            "vpip_count": profile["pooling_hands"],
+            "source": "profile",
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"written": self.written, "skipped": self.skipped, "cache": self._cache.stats()}
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from numbers import Integral
+from typing import Iterable, Iterator, List, Optional, Union
 
 @dataclass
 class Card:
@@ -17,6 +18,21 @@ class Card:
         value = code % 100
         suit = code // 100
         return Card(value, suit)
+
+    @staticmethod
+    def from_index(index: int) -> 'Card':
+        """从 0..51 牌索引创建卡牌"""
+        return Card.from_code(INDEX_TO_CODE[index])
+
+    @property
+    def code(self) -> int:
+        """游戏编码 suit*100+value"""
+        return self.suit * 100 + self.value
+
+    @property
+    def index(self) -> int:
+        """0..51 牌索引"""
+        return CODE_TO_INDEX[self.code]
     
     def __str__(self) -> str:
         val = self.VALUES.get(self.value, str(self.value))
@@ -57,4 +73,124 @@ def decode_cards(card_codes: List[int]) -> List[Card]:
             card = Card.from_code(code)
             if card:
                 cards.append(card)
-    return cards
\ No newline at end of file
+    return cards
+
+# 模拟器使用的 (点数 2..14, 花色名) 元组格式
+SUIT_NAMES = {'spades': 1, 'hearts': 2, 'clubs': 3, 'diamonds': 4}
+
+# ---- 紧凑表示：0..51 牌索引 + 52 位手牌掩码 ----
+# 索引 = (suit-1)*13 + (value-1)，与 core.calculator 的向量化评估一致
+INDEX_TO_CODE = [suit * 100 + value for suit in range(1, 5) for value in range(1, 14)]
+CODE_TO_INDEX = {code: i for i, code in enumerate(INDEX_TO_CODE)}
+INDEX_TO_STR = [str(Card.from_code(code)) for code in INDEX_TO_CODE]
+FULL_DECK_MASK = (1 << 52) - 1
+
+
+class CardSet:
+    """以 52 位整数掩码表示的一组牌，不可变，支持并、交、去除死牌
+
+    迭代按索引顺序产出游戏编码，可以直接交给 core.calculator。
+    """
+    __slots__ = ("mask",)
+
+    def __init__(self, mask: int = 0):
+        self.mask = mask
+
+    @classmethod
+    def from_codes(cls, codes: Iterable[int]) -> 'CardSet':
+        mask = 0
+        for code in codes:
+            index = CODE_TO_INDEX.get(code)
+            if index is not None:
+                mask |= 1 << index
+        return cls(mask)
+
+    @classmethod
+    def from_indices(cls, indices: Iterable[int]) -> 'CardSet':
+        mask = 0
+        for index in indices:
+            mask |= 1 << index
+        return cls(mask)
+
+    @classmethod
+    def full_deck(cls) -> 'CardSet':
+        return cls(FULL_DECK_MASK)
+
+    def indices(self) -> List[int]:
+        result = []
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            result.append(low.bit_length() - 1)
+            mask ^= low
+        return result
+
+    def codes(self) -> List[int]:
+        return [INDEX_TO_CODE[i] for i in self.indices()]
+
+    def to_strings(self) -> List[str]:
+        return [INDEX_TO_STR[i] for i in self.indices()]
+
+    def cards(self) -> List[Card]:
+        """展开为 Card 视图，仅用于展示"""
+        return [Card.from_index(i) for i in self.indices()]
+
+    def __or__(self, other: 'CardSet') -> 'CardSet':
+        return CardSet(self.mask | other.mask)
+
+    def __and__(self, other: 'CardSet') -> 'CardSet':
+        return CardSet(self.mask & other.mask)
+
+    def __sub__(self, other: 'CardSet') -> 'CardSet':
+        return CardSet(self.mask & ~other.mask)
+
+    def isdisjoint(self, other: 'CardSet') -> bool:
+        return not self.mask & other.mask
+
+    def __contains__(self, code: int) -> bool:
+        index = CODE_TO_INDEX.get(code)
+        return index is not None and bool(self.mask >> index & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.codes())
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.mask != 0
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CardSet) and self.mask == other.mask
+
+    def __hash__(self) -> int:
+        return hash(self.mask)
+
+    def __repr__(self) -> str:
+        return f"CardSet({' '.join(self.to_strings())})"
+
+
+def decode_card_set(card_codes: Iterable[int]) -> CardSet:
+    """解码多张卡牌为紧凑的 CardSet，不创建 Card 对象"""
+    return CardSet.from_codes(card_codes)
+
+
+def to_codes(cards: Union[CardSet, Iterable]) -> List[int]:
+    """将 CardSet 或任意卡牌序列转换为游戏编码列表"""
+    if isinstance(cards, CardSet):
+        return cards.codes()
+    return [to_code(c) for c in cards]
+
+
+def to_code(card: Union[int, str, Card, tuple]) -> int:
+    """将游戏编码、Card、牌面字符串或 (点数, 花色名) 元组统一转换为游戏编码"""
+    if isinstance(card, Integral):
+        return int(card)
+    if isinstance(card, Card):
+        return card.code
+    if isinstance(card, str):
+        return Card.from_str(card).code
+    value, suit = card
+    if value == 14:
+        value = 1
+    return SUIT_NAMES.get(suit, suit) * 100 + value
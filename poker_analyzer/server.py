@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import Executor
+from typing import Dict, Optional, Set
+
+from core.parser import HandHistoryParser
+from core.table_registry import TrackerRegistry
+from utils.helpers import PokerJSONEncoder
+from utils.metrics import METRICS
+
+
+class TableSession:
+    """单张牌桌的连接状态：解析器和有界消息队列；牌局状态由 TrackerRegistry 管理"""
+
+    def __init__(self, table_id: str, queue_size: int):
+        self.table_id = table_id
+        self.parser = HandHistoryParser()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writers: Set[asyncio.StreamWriter] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.processed = 0
+        self.advised = 0
+
+
+class IngestionServer:
+    """asyncio TCP 服务，按牌桌分片并发处理多路消息流
+
+    协议：每个连接先发送一行 ``TABLE <table_id>``，之后每行一条原始游戏消息。
+    同一牌桌的建议以 JSON 行写回该桌的所有连接。发送 ``STATS`` 则返回一行
+    延迟指标和各桌状态的 JSON 后关闭连接。队列满时读取方等待，
+    由 TCP 流控把背压传回发送端；策略计算放到执行器里，不阻塞事件循环。
+    """
+
+    def __init__(self, assistant, host: str = "127.0.0.1", port: int = 9009,
+                 queue_size: int = 256, executor: Optional[Executor] = None,
+                 trackers: Optional[TrackerRegistry] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.assistant = assistant
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.executor = executor
+        self.sessions: Dict[str, TableSession] = {}
+        self.trackers = trackers or TrackerRegistry()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.logger.info("Ingestion server listening on %s:%s", self.host, self.port)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for session in self.sessions.values():
+            if session.task:
+                session.task.cancel()
+        await asyncio.gather(*(s.task for s in self.sessions.values() if s.task), return_exceptions=True)
+        self.trackers.close()
+
+    def get_session(self, table_id: str) -> TableSession:
+        session = self.sessions.get(table_id)
+        if session is None:
+            self._reap_sessions()
+            session = TableSession(table_id, self.queue_size)
+            session.task = asyncio.create_task(self._run_table(session))
+            self.sessions[table_id] = session
+        return session
+
+    def _reap_sessions(self) -> None:
+        """释放牌局已被回收、且没有连接和待处理消息的牌桌会话"""
+        for table_id, session in list(self.sessions.items()):
+            if table_id not in self.trackers and not session.writers and session.queue.empty():
+                session.task.cancel()
+                del self.sessions[table_id]
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        header = (await reader.readline()).decode().strip()
+        if header == "STATS":
+            writer.write((json.dumps({"metrics": METRICS.snapshot(), "tables": self.stats()},
+                                     ensure_ascii=False) + "\n").encode())
+            await writer.drain()
+            writer.close()
+            return
+        if not header.startswith("TABLE "):
+            writer.write(b'{"status": "error", "message": "expected TABLE <table_id>"}\n')
+            await writer.drain()
+            writer.close()
+            return
+
+        session = self.get_session(header[6:].strip())
+        session.writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # 队列满时在这里等待，形成背压
+                await session.queue.put(line)
+        finally:
+            session.writers.discard(writer)
+            writer.close()
+
+    async def _run_table(self, session: TableSession) -> None:
+        while True:
+            line = await session.queue.get()
+            try:
+                result = await self._process(session, line)
+            except Exception as e:
+                self.logger.error("Table %s processing error: %s", session.table_id, e, exc_info=True)
+                result = {"table_id": session.table_id, "status": "error", "message": str(e)}
+            finally:
+                session.queue.task_done()
+            if result is not None:
+                await self._publish(session, result)
+
+    async def _process(self, session: TableSession, line: bytes) -> Optional[dict]:
+        errors = session.parser.stats["errors"]
+        with METRICS.timer("parse"):
+            parsed = session.parser.parse_message(line)
+        session.processed += 1
+        METRICS.incr("messages")
+        if not parsed:
+            # 未处理的消息类型只计数；解析器错误计数增加的才是格式错误
+            if session.parser.stats["errors"] == errors:
+                METRICS.incr("skipped_messages")
+                self.logger.debug("Table %s: skipped unhandled message.", session.table_id)
+            else:
+                METRICS.incr("parse_errors")
+                self.logger.warning("Table %s: malformed message.", session.table_id)
+            return None
+        with METRICS.timer("track"):
+            self.trackers.process_message(session.table_id, parsed)
+        # 数据库读写（可能触发批量写入）都放到线程池，不阻塞事件循环
+        loop = asyncio.get_running_loop()
+        if parsed.get("type") == "action" and parsed.get("user_id") is not None:
+            hand = self.trackers.get(session.table_id).current_hand
+            with METRICS.timer("db"):
+                await loop.run_in_executor(
+                    self.executor, self.assistant.db.record_action, parsed["user_id"],
+                    parsed.get("action_type"), hand.street if hand else None,
+                    hand.position_of(parsed.get("position")) if hand else None
+                )
+            return None
+        if parsed.get("type") == "player_stats":
+            # 大厅消息可能带数百个玩家，一次批量写入
+            with METRICS.timer("db"):
+                await loop.run_in_executor(self.executor, self.assistant.db.profiles.ingest, parsed["stats"])
+            return None
+        if parsed.get("type") != "round_change":
+            return None
+
+        # 是否面对加注、针对的对手和听牌摘要都取自本桌当前手牌
+        self.trackers.get(session.table_id).annotate_round_change(parsed)
+        with METRICS.timer("db"):
+            game_state, strategy_state, opponent_stats = await loop.run_in_executor(
+                self.executor, self.assistant.prepare_round_change, parsed
+            )
+        pool = getattr(self.assistant, "pool", None)
+        with METRICS.timer("strategy"):
+            if pool is not None:
+                # 与单进程路径使用同一份解析好的对手统计
+                advice = await asyncio.wrap_future(
+                    self.assistant.submit_pooled_advice(strategy_state, opponent_stats)
+                )
+            else:
+                advice = await loop.run_in_executor(
+                    self.executor, self.assistant.strategy.get_advice, strategy_state, opponent_stats
+                )
+        session.advised += 1
+        METRICS.incr("advice")
+        return {
+            "table_id": session.table_id,
+            "status": "success",
+            "message_type": "round_change",
+            "game_state": game_state,
+            "advice": advice
+        }
+
+    async def _publish(self, session: TableSession, result: dict) -> None:
+        payload = (json.dumps(result, ensure_ascii=False, cls=PokerJSONEncoder) + "\n").encode()
+        for writer in list(session.writers):
+            writer.write(payload)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                session.writers.discard(writer)
+
+    def stats(self) -> dict:
+        memory = self.trackers.memory_stats()
+        return {
+            table_id: {
+                "queued": s.queue.qsize(),
+                "processed": s.processed,
+                "advised": s.advised,
+                "connections": len(s.writers),
+                "memory": memory.get(table_id),
+            }
+            for table_id, s in self.sessions.items()
+        }
@@ -1,7 +1,20 @@
+import argparse
 import logging
-from player import Player
-from strategy import Strategy
+import multiprocessing as mp
 import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.calculator import evaluate
+from core.game_tracker import POSITIONS, position_names
+from core.strategy import Strategy
+from models.card import INDEX_TO_CODE
+from models.player import Player
 
 class Simulation:
     def __init__(self, db_manager):
@@ -125,6 +138,11 @@ class Simulation:
         for player in self.players:
             self.logger.info(f"玩家 {player.user_id} (位置: {self.get_position(player.user_id)}): {player.chips} 筹码")
 
+    def simulate_headless(self, hands, seed=None, **kwargs):
+        """用无日志的高速引擎模拟，动作统计批量写入数据库"""
+        engine = HeadlessSimulation(num_players=len(self.players), seed=seed, db=self.db, **kwargs)
+        return engine.run(hands)
+
     def determine_winner(self):
         active_players = [p for p in self.players if p.chips > 0 or p.in_pot > 0]
         if active_players:
@@ -134,3 +152,350 @@ class Simulation:
         self.logger.info("每位玩家的手牌组合和策略分析：")
         for player in self.players:
             self.logger.info(f"玩家 {player.user_id} (位置: {self.get_position(player.user_id)}), 手牌: {player.hand}, 筹码: {player.chips}")
+
+
+
+STREETS = ["preflop", "flop", "turn", "river"]
+BOARD_SIZES = [0, 3, 4, 5]
+@dataclass
+class DecisionView:
+    """交给决策策略的只读局面"""
+    street: str
+    position: str
+    hole: List[int]
+    board: List[int]
+    pot: int
+    to_call: int
+    stack: int
+    num_active: int
+    opponent_stats: dict
+
+
+class RandomPolicy:
+    """随机动作，模拟未建模的对手"""
+
+    def __init__(self, rng, actions=("FOLD", "CALL", "RAISE", "ALL-IN"), weights=(30, 45, 20, 5)):
+        self.rng = rng
+        self.actions = list(actions)
+        self.weights = list(weights)
+
+    def __call__(self, view: DecisionView) -> str:
+        return self.rng.choices(self.actions, self.weights)[0]
+
+
+class StrategyPolicy:
+    """把 Strategy.suggest_action 接到引擎上"""
+
+    def __init__(self, strategy=None):
+        self.strategy = strategy or Strategy()
+
+    def __call__(self, view: DecisionView) -> str:
+        player = _HandHolder(view.hole)
+        game_state = {"street": view.street, "community_cards": view.board}
+        return self.strategy.suggest_action(player, game_state, view.opponent_stats)
+
+
+class _HandHolder:
+    __slots__ = ("hand",)
+
+    def __init__(self, hand):
+        self.hand = hand
+
+
+@dataclass
+class SimulationStats:
+    """可合并的模拟统计；筹码单位为引擎的最小筹码"""
+    hands: int = 0
+    showdowns: int = 0
+    hero_chip_delta: int = 0
+    chip_delta_by_position: Dict[str, int] = field(default_factory=Counter)
+    hands_by_position: Dict[str, int] = field(default_factory=Counter)
+    wins_by_position: Dict[str, int] = field(default_factory=Counter)
+    action_counts: Dict[str, int] = field(default_factory=Counter)
+
+    def merge(self, other: 'SimulationStats') -> 'SimulationStats':
+        self.hands += other.hands
+        self.showdowns += other.showdowns
+        self.hero_chip_delta += other.hero_chip_delta
+        self.chip_delta_by_position.update(other.chip_delta_by_position)
+        self.hands_by_position.update(other.hands_by_position)
+        self.wins_by_position.update(other.wins_by_position)
+        self.action_counts.update(other.action_counts)
+        return self
+
+    def win_rates(self) -> Dict[str, float]:
+        return {pos: self.wins_by_position[pos] / n for pos, n in self.hands_by_position.items() if n}
+
+
+class HeadlessSimulation:
+    """无日志的高速模拟引擎
+
+    真实洗牌发牌，完整的下注轮（盲注、最小加注、加注封顶、全下），
+    边池结算，摊牌用查表牌力评估。日志默认关闭，数据库写入走批量缓冲。
+    """
+
+    def __init__(self, num_players=6, policies: Optional[List[Callable]] = None, hero_seat=0,
+                 starting_stack=200, small_blind=1, big_blind=2, max_raises=4,
+                 seed=None, db=None, log_actions=False):
+        if not 2 <= num_players <= len(POSITIONS):
+            raise ValueError(f"num_players 须在 2 到 {len(POSITIONS)} 之间")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.rng = random.Random(seed)
+        self.num_players = num_players
+        self.hero_seat = hero_seat
+        self.starting_stack = starting_stack
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.max_raises = max_raises
+        self.db = db
+        self.log_actions = log_actions
+        if policies is None:
+            policies = [StrategyPolicy() if seat == hero_seat else RandomPolicy(self.rng)
+                        for seat in range(num_players)]
+        self.policies = policies
+        self.positions = position_names(num_players)
+        self.stacks = [starting_stack] * num_players
+        self.button = 0
+        self.stats = SimulationStats()
+        # 每个座位的翻前统计，用于给策略提供对手画像
+        self._seat_hands = [0] * num_players
+        self._seat_raises = [0] * num_players
+        self._seat_vpip = [0] * num_players
+        self._hand_voluntary = set()
+        self._hand_raisers = set()
+
+    def get_position(self, seat):
+        return self.positions[(seat - self.button) % self.num_players]
+
+    def run(self, hands) -> SimulationStats:
+        for _ in range(hands):
+            self.play_hand()
+        if self.db is not None:
+            self.db.flush()
+        return self.stats
+
+    def play_hand(self) -> None:
+        n = self.num_players
+        for seat in range(n):
+            if self.stacks[seat] < self.big_blind:
+                self.stacks[seat] = self.starting_stack  # 筹码不足时补码，保证可以持续模拟
+
+        deck = self.rng.sample(range(52), 2 * n + 5)
+        holes = [[INDEX_TO_CODE[deck[2 * s]], INDEX_TO_CODE[deck[2 * s + 1]]] for s in range(n)]
+        full_board = [INDEX_TO_CODE[i] for i in deck[2 * n:]]
+        contrib = [0] * n
+        folded = [False] * n
+        bets = [0] * n
+        self._hand_voluntary = set()
+        self._hand_raisers = set()
+
+        if n == 2:
+            sb, bb = self.button, (self.button + 1) % n
+            first_preflop, first_postflop = sb, bb
+        else:
+            sb, bb = (self.button + 1) % n, (self.button + 2) % n
+            first_preflop, first_postflop = (self.button + 3) % n, sb
+        self._post(sb, self.small_blind, bets, contrib)
+        self._post(bb, self.big_blind, bets, contrib)
+
+        for street_index, street in enumerate(STREETS):
+            if street_index:
+                bets = [0] * n
+            board = full_board[:BOARD_SIZES[street_index]]
+            first = first_preflop if street_index == 0 else first_postflop
+            self._betting_round(street, first, holes, board, bets, contrib, folded)
+            if folded.count(False) == 1:
+                break
+
+        self._settle(holes, full_board, contrib, folded)
+        self.button = (self.button + 1) % n
+
+    def _post(self, seat, amount, bets, contrib):
+        pay = min(amount, self.stacks[seat])
+        self.stacks[seat] -= pay
+        bets[seat] += pay
+        contrib[seat] += pay
+
+    def _opponent_stats(self, seat, folded):
+        """在场对手翻前统计的均值，带先验以免样本少时极端"""
+        hands = raises = vpip = 0
+        for other in range(self.num_players):
+            if other != seat and not folded[other]:
+                hands += self._seat_hands[other]
+                raises += self._seat_raises[other]
+                vpip += self._seat_vpip[other]
+        return {"pfr": (raises + 1.5) / (hands + 10), "vpip": (vpip + 3.0) / (hands + 10)}
+
+    def _betting_round(self, street, first, holes, board, bets, contrib, folded):
+        n = self.num_players
+        stacks = self.stacks
+        current = max(bets)
+        min_raise = self.big_blind
+        raises = 0
+        pending = {s for s in range(n) if not folded[s] and stacks[s] > 0}
+        preflop = street == "preflop"
+        seat = first
+        while pending:
+            if folded.count(False) == 1:
+                return
+            if seat in pending:
+                pending.discard(seat)
+                to_call = current - bets[seat]
+                actors = sum(1 for s in range(n) if not folded[s] and stacks[s] > 0)
+                if actors <= 1 and to_call <= 0:
+                    # 其他人都已全下或弃牌，无需再行动
+                    seat = (seat + 1) % n
+                    continue
+
+                view = DecisionView(street, self.get_position(seat), holes[seat], board,
+                                    sum(contrib), to_call, stacks[seat], folded.count(False),
+                                    self._opponent_stats(seat, folded))
+                action = self.policies[seat](view)
+
+                if action == "FOLD" and to_call <= 0:
+                    action = "CHECK"
+                elif action == "RAISE" and (raises >= self.max_raises or actors <= 1):
+                    action = "CALL"
+
+                if action == "FOLD":
+                    folded[seat] = True
+                    pay = 0
+                elif action == "ALL-IN":
+                    pay = stacks[seat]
+                elif action == "RAISE":
+                    raise_to = current + max(min_raise, sum(contrib) // 2)
+                    pay = min(raise_to - bets[seat], stacks[seat])
+                else:
+                    pay = min(max(to_call, 0), stacks[seat])
+                    action = "CALL" if pay else "CHECK"
+
+                stacks[seat] -= pay
+                bets[seat] += pay
+                contrib[seat] += pay
+                if bets[seat] > current:
+                    raise_size = bets[seat] - current
+                    current = bets[seat]
+                    if raise_size >= min_raise:
+                        min_raise = raise_size
+                        raises += 1
+                        pending = {s for s in range(n) if s != seat and not folded[s] and stacks[s] > 0}
+                    else:
+                        # 不足最小加注的全下只要求其他人补齐差额
+                        pending |= {s for s in range(n)
+                                    if s != seat and not folded[s] and stacks[s] > 0 and bets[s] < current}
+                    if preflop:
+                        self._hand_raisers.add(seat)
+                if preflop and pay:
+                    self._hand_voluntary.add(seat)
+
+                self.stats.action_counts[f"{street}:{action}"] += 1
+                if self.db is not None:
+                    self.db.record_action(seat, action, street, view.position)
+                if self.log_actions:
+                    self.logger.debug("seat %s (%s) %s %s, pot %s", seat, view.position, street, action, sum(contrib))
+            seat = (seat + 1) % n
+
+    def _settle(self, holes, board, contrib, folded):
+        """按边池分配底池并记录统计"""
+        n = self.num_players
+        alive = [s for s in range(n) if not folded[s]]
+        winnings = [0] * n
+        if len(alive) == 1:
+            winnings[alive[0]] = sum(contrib)
+        else:
+            self.stats.showdowns += 1
+            values = {s: evaluate(holes[s] + board) for s in alive}
+            previous = 0
+            for level in sorted({contrib[s] for s in alive}):
+                pot = sum(min(c, level) - min(c, previous) for c in contrib)
+                eligible = [s for s in alive if contrib[s] >= level]
+                best = max(values[s] for s in eligible)
+                winners = [s for s in eligible if values[s] == best]
+                share, remainder = divmod(pot, len(winners))
+                # 零头按按钮后的座位顺序分配
+                winners.sort(key=lambda s: (s - self.button - 1) % n)
+                for i, s in enumerate(winners):
+                    winnings[s] += share + (1 if i < remainder else 0)
+                previous = level
+            # 已弃牌玩家超出最高边池的投入归最后一个边池的赢家
+            leftover = sum(max(c - previous, 0) for c in contrib)
+            if leftover:
+                winnings[winners[0]] += leftover
+
+        for s in range(n):
+            self._seat_hands[s] += 1
+        for s in self._hand_voluntary:
+            self._seat_vpip[s] += 1
+        for s in self._hand_raisers:
+            self._seat_raises[s] += 1
+
+        stats = self.stats
+        stats.hands += 1
+        for s in range(n):
+            self.stacks[s] += winnings[s]
+            position = self.get_position(s)
+            delta = winnings[s] - contrib[s]
+            stats.chip_delta_by_position[position] += delta
+            stats.hands_by_position[position] += 1
+            if winnings[s]:
+                stats.wins_by_position[position] += 1
+            if s == self.hero_seat:
+                stats.hero_chip_delta += delta
+
+
+def hands_per_second(hands=2000, seed=0, **kwargs) -> float:
+    """无头引擎每秒模拟手数，用于跟踪性能回退"""
+    engine = HeadlessSimulation(seed=seed, **kwargs)
+    start = time.perf_counter()
+    engine.run(hands)
+    return hands / (time.perf_counter() - start)
+
+
+def shard_seeds(seed, shards):
+    """由主种子派生互相独立的分片种子（SeedSequence.spawn）"""
+    return [int(child.generate_state(2, np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(shards)]
+
+
+def _run_shard(hands, seed, engine_kwargs):
+    return HeadlessSimulation(seed=seed, **engine_kwargs).run(hands)
+
+
+def run_batch(hands, seed=0, workers=None, shard_size=5000, **engine_kwargs) -> SimulationStats:
+    """把 N 手牌切成固定大小的分片，在多个进程中并行模拟并流式合并结果
+
+    分片划分和种子只取决于 hands、seed 和 shard_size，与进程数无关；
+    统计合并是求和，与完成顺序无关，因此相同参数的结果逐位一致。
+    """
+    shards = [min(shard_size, hands - start) for start in range(0, hands, shard_size)]
+    seeds = shard_seeds(seed, len(shards))
+    total = SimulationStats()
+    if workers == 1:
+        for size, shard_seed in zip(shards, seeds):
+            total.merge(_run_shard(size, shard_seed, engine_kwargs))
+        return total
+
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context(method)) as executor:
+        futures = [executor.submit(_run_shard, size, shard_seed, engine_kwargs)
+                   for size, shard_seed in zip(shards, seeds)]
+        for future in as_completed(futures):
+            total.merge(future.result())
+    return total
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="无头模拟引擎基准")
+    arg_parser.add_argument("--hands", type=int, default=2000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--workers", type=int, default=0, help="大于 0 时用多进程批量模拟并输出汇总")
+    args = arg_parser.parse_args()
+    if args.workers:
+        start = time.perf_counter()
+        stats = run_batch(args.hands, seed=args.seed, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"{stats.hands} hands in {elapsed:.1f}s ({stats.hands / elapsed:.1f} hands/s)")
+        print(f"hero chip delta: {stats.hero_chip_delta}")
+        print(f"win rates by position: {stats.win_rates()}")
+        print(f"chip delta by position: {dict(stats.chip_delta_by_position)}")
+    else:
+        print(f"hands_per_second: {hands_per_second(args.hands, args.seed):.1f}")
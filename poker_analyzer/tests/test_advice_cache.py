@@ -0,0 +1,61 @@
+from core.advice_cache import AdviceCache, advice_key
+from core.strategy import StrategyEngine
+from models.card import CardSet
+
+def _state(hero, board, street="FLOP"):
+    return {"street": street, "hero_cards": CardSet.from_codes(hero), "board": CardSet.from_codes(board)}
+
+def test_key_is_suit_isomorphic():
+    # 黑桃/红桃互换后是同一局面，顺序也无关
+    assert advice_key("flop", [101, 113], [105, 206, 307], 1, False, None) == \
+        advice_key("flop", [213, 201], [307, 205, 106], 1, False, None)
+    assert advice_key("flop", [101, 113], [105, 206, 307], 1, False, None) != \
+        advice_key("flop", [101, 113], [105, 206, 307], 1, False, 0.3)
+
+def test_engine_reuses_advice_for_isomorphic_spots():
+    cache = AdviceCache(maxsize=10)
+    engine = StrategyEngine(advice_cache=cache)
+    first = engine.get_advice(_state([101, 113], [105, 112, 307]), None)
+    # 花色 1<->2 互换的同构局面直接命中，听牌按实际的牌重新计算
+    second = engine.get_advice(_state([201, 213], [205, 212, 307]), None)
+    assert cache.stats()["hits"] == 1
+    assert second["equity"] == first["equity"] and second["action"] == first["action"]
+    assert second["draws"]["flush_draw"] and all(c.endswith("♥") for c in second["draws"]["out_cards"])
+    assert all(c.endswith("♠") for c in first["draws"]["out_cards"])
+
+    # 缓存中只保存与花色无关的字段
+    assert "draws" not in next(iter(cache._cache.items()))[1]
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "advice.json")
+    cache = AdviceCache(maxsize=2, path=path)
+    engine = StrategyEngine(advice_cache=cache)
+    for hero, board, street in (([101, 113], [105, 112, 307], "FLOP"), ([202, 302], [], "PRE_FLOP"),
+                                ([110, 111], [409, 308, 207, 106], "TURN")):
+        engine.get_advice(_state(hero, board, street), None)
+    assert cache.stats()["evictions"] == 1
+    assert cache.save() == 2
+
+    restored = AdviceCache(maxsize=10, path=path)
+    assert restored.load() == 2
+    engine = StrategyEngine(advice_cache=restored)
+    advice = engine.get_advice(_state([311, 310], [409, 108, 207, 306], "TURN"), None)
+    assert restored.stats()["hits"] == 1 and advice["street"] == "turn"
+    assert AdviceCache(path=str(tmp_path / "missing.json")).load() == 0
+
+def test_assistant_persists_cache(tmp_path, monkeypatch):
+    import json
+    monkeypatch.chdir(tmp_path)
+    from app import PokerAssistant
+    message = json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+        "round": "TURN", "totalPot": 10, "dealPublicCards": [112, 111, 210, 302, 0],
+        "userCardsList": [{"userId": 1, "handCards": [101, 113]}]}})
+    assistant = PokerAssistant(advice_cache="advice.json")
+    advice = assistant.process_message(message)["advice"]
+    assistant.close()
+
+    restarted = PokerAssistant(advice_cache="advice.json")
+    assert restarted.advice_cache.loaded == 1
+    assert restarted.process_message(message)["advice"] == advice
+    assert restarted.advice_cache.stats()["hits"] == 1
+    restarted.close()
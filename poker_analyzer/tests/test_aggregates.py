@@ -0,0 +1,74 @@
+import pytest
+from database.aggregates import AggregateStore, SELECT_AGGREGATES_SQL
+from database.connection import ConnectionPool
+from database.manager import DatabaseManager
+
+def _store(tmp_path, now, half_life=100.0):
+    return AggregateStore(ConnectionPool(str(tmp_path / "agg.db")), half_life, clock=lambda: now[0])
+
+def test_decayed_counts_by_street_and_position(tmp_path):
+    now = [1000.0]
+    store = _store(tmp_path, now)
+    store.record(1, "RAISE", "PRE_FLOP", 3)
+    store.record(1, "FOLD", "flop", 3)
+    now[0] += 100  # 一个半衰期后旧动作权重减半
+    store.record(1, "CALL", "preflop", 5)
+    store.record(1, "CALL", "preflop", 5)
+    stats = store.get(1)
+    assert stats["weight"] == pytest.approx(3.0)
+    assert stats["vpip"] == pytest.approx(2.5 / 3)
+    assert stats["fold_frequency"] == pytest.approx(0.5 / 3)
+    assert stats["pfr"] == pytest.approx(0.5 / 2.5)
+    assert stats["by_street"]["preflop"]["weight"] == pytest.approx(2.5)
+    assert stats["by_position"]["3"]["aggression"] == pytest.approx(0.5)
+    assert store.get(2) is None
+
+    # 写入后由新实例读取，结果一致
+    store.flush()
+    now[0] += 100
+    reopened = _store(tmp_path, now)
+    assert reopened.landmark == store.landmark
+    assert reopened.get(1)["weight"] == pytest.approx(1.5)
+    assert reopened.get(1)["vpip"] == pytest.approx(stats["vpip"])
+
+def test_rebase_keeps_values(tmp_path):
+    now = [0.0]
+    store = _store(tmp_path, now, half_life=1.0)
+    store.record(1, "CALL", "flop")
+    now[0] = 600.0  # 超过 REBASE_EXPONENT 个半衰期
+    store.record(1, "FOLD", "flop")
+    assert store.landmark == 600.0
+    stats = store.get(1)
+    assert stats["weight"] == pytest.approx(1.0)
+    assert stats["fold_frequency"] == pytest.approx(1.0)
+
+def test_reads_use_primary_key(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "agg.db"))
+    AggregateStore(pool)
+    plan = " ".join(str(row) for row in pool.read("EXPLAIN QUERY PLAN " + SELECT_AGGREGATES_SQL, (1,)))
+    assert "PRIMARY KEY" in plan or "INDEX" in plan
+
+def test_manager_records_aggregates(tmp_path):
+    db = DatabaseManager(str(tmp_path / "stats.db"), buffer_size=2)
+    db.record_action(4, "BET", "FLOP", 2)
+    db.record_action(4, "FOLD", "TURN", 2)
+    recent = db.get_recent_stats(4)
+    assert recent["by_street"].keys() == {"flop", "turn"}
+    assert recent["fold_frequency"] == pytest.approx(0.5)
+    assert db.get_opponent_stats(4)["hands_played"] == 2
+
+def test_preflop_raise_from_messages_counts_as_pfr(tmp_path):
+    import json
+    from app import PokerAssistant
+    assistant = PokerAssistant(db_path=str(tmp_path / "stats.db"))
+    # 消息里的街名是原始的 "PRE_FLOP"
+    assistant.process_message(json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+        "round": "PRE_FLOP", "totalPot": 3, "dealPublicCards": [],
+        "userCardsList": [{"userId": 1, "handCards": [101, 113]}]}}))
+    for action in ("RAISE", "CALL"):
+        assistant.process_message(json.dumps({"msgType": "WP_actionNotify", "msgBody": {
+            "actionList": [{"userId": 4, "actionType": action, "actionScore": 6, "seatNum": 2}]}}))
+    stats = assistant.db.get_opponent_stats(4)
+    assert stats["hands_raised"] == 1 and stats["pfr"] == pytest.approx(0.5)
+    assert assistant.db.get_recent_stats(4)["pfr"] == pytest.approx(0.5)
+    assistant.close()
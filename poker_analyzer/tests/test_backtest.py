@@ -0,0 +1,66 @@
+import random
+from core.backtest import ACTION_NAMES, DecisionTable, decide, evaluate_strategy, parameter_grid, sweep
+from core.strategy import Strategy, StrategyParams
+from models.card import INDEX_TO_CODE
+
+def _events(count, seed=0):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        cards = [INDEX_TO_CODE[i] for i in rng.sample(range(52), 7)]
+        for street, size in (("PRE_FLOP", 0), ("FLOP", 3), ("TURN", 4), ("RIVER", 5)):
+            events.append({"type": "action", "user_id": rng.randint(1, 4),
+                           "action_type": rng.choice(["FOLD", "CALL", "RAISE"]), "amount": rng.randint(0, 6)})
+            events.append({"type": "round_change", "street": street, "pot": rng.randint(2, 40),
+                           "hero_cards": cards[:2], "board": cards[2:2 + size]})
+    return events
+
+class _Player:
+    def __init__(self, hand):
+        self.hand = hand
+
+def test_vectorized_decisions_match_strategy():
+    events = _events(40)
+    table = DecisionTable.from_events(events)
+    assert len(table) == 160
+    params = StrategyParams(semi_bluff_fold=0.3, steal_pfr=0.05)
+    strategy = Strategy(params)
+    actions = decide(table, params)
+    rounds = [e for e in events if e["type"] == "round_change"]
+    for i, event in enumerate(rounds):
+        stats = {"pfr": float(table.opp_pfr[i]), "vpip": float(table.opp_vpip[i]),
+                 "fold_frequency": float(table.opp_fold_freq[i])}
+        game_state = {"street": ["preflop", "flop", "turn", "river"][table.street[i]],
+                      "community_cards": event["board"]}
+        assert ACTION_NAMES[actions[i]] == strategy.suggest_action(_Player(event["hero_cards"]), game_state, stats)
+
+def test_sweep_ranks_configs_and_roundtrips(tmp_path):
+    table = DecisionTable.from_events(_events(20, seed=1))
+    path = str(tmp_path / "decisions.npz")
+    table.save(path)
+    loaded = DecisionTable.load(path)
+    grid = parameter_grid(steal_pfr=[0.0, 0.2], semi_bluff_fold=[0.5, 0.9])
+    ranked = sweep(loaded, grid)
+    assert len(ranked) == 4
+    assert ranked[0][1]["total_ev"] >= ranked[-1][1]["total_ev"]
+    metrics = evaluate_strategy(table, StrategyParams())
+    assert abs(sum(metrics["action_freq"].values()) - 1.0) < 1e-9
+    assert abs(sum(metrics["ev_by_street"].values()) - metrics["total_ev"]) < 1e-6
+
+def test_hero_actions_are_not_the_opponent_profile():
+    hero, villain = [101, 113], [208, 307, 412]
+    events = [
+        {"type": "round_change", "street": "PRE_FLOP", "pot": 3, "hero_id": 1, "hero_cards": hero, "board": []},
+        {"type": "action", "user_id": 2, "action_type": "RAISE", "amount": 6},
+        # hero 最后行动：跟注不应让 hero 成为“对手”
+        {"type": "action", "user_id": 1, "action_type": "CALL", "amount": 6},
+        {"type": "round_change", "street": "FLOP", "pot": 15, "hero_id": 1, "hero_cards": hero, "board": villain},
+        {"type": "action", "user_id": 1, "action_type": "FOLD", "amount": 0},
+        {"type": "round_change", "street": "TURN", "pot": 15, "hero_id": 1, "hero_cards": hero,
+         "board": villain + [109]},
+    ]
+    table = DecisionTable.from_events(events)
+    assert len(table) == 3
+    # 翻牌与转牌的对手画像都是 2 号玩家：翻前加注 1 次、没有弃牌，跟注额是他的加注
+    assert table.opp_pfr[1] == 1.0 and table.opp_fold_freq[2] == 0.0
+    assert table.to_call.tolist() == [0.0, 6.0, 0.0]
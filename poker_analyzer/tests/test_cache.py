@@ -0,0 +1,43 @@
+from utils.cache import LRUCache
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.hits == 1 and cache.misses == 1
+
+def test_lru_cache_ttl_expires(monkeypatch):
+    import utils.cache
+    now = [0.0]
+    monkeypatch.setattr(utils.cache.time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl=5)
+    cache.put("a", None)
+    assert "a" in cache
+    assert cache.get("a", "missing") is None
+    now[0] = 6
+    assert cache.get("a", "missing") == "missing"
+    assert cache.expirations == 1
+
+def test_lru_cache_shared_between_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    cache = LRUCache(maxsize=64)
+
+    def work(seed):
+        for i in range(5000):
+            key = (seed * 7 + i) % 100
+            if cache.get(key) is None:
+                cache.put(key, key)
+            if i % 97 == 0:
+                cache.pop(key)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(work, range(8)))
+    stats = cache.stats()
+    assert stats["size"] <= 64 and len(cache.items()) == stats["size"]
+    assert stats["hits"] + stats["misses"] == 8 * 5000
+    assert all(key == value for key, value in cache.items())
@@ -0,0 +1,123 @@
+import os
+import random
+from itertools import combinations
+from core.calculator import (
+    evaluate, hand_category,
+    HIGH_CARD, ONE_PAIR, TWO_PAIR, THREE_OF_A_KIND, STRAIGHT,
+    FLUSH, FULL_HOUSE, FOUR_OF_A_KIND, STRAIGHT_FLUSH
+)
+
+DECK = [suit * 100 + value for suit in range(1, 5) for value in range(1, 14)]
+
+def test_hand_categories():
+    cases = [
+        ([101, 113, 112, 111, 110], STRAIGHT_FLUSH),
+        ([101, 201, 301, 401, 113], FOUR_OF_A_KIND),
+        ([101, 201, 301, 113, 213], FULL_HOUSE),
+        ([101, 109, 107, 105, 103], FLUSH),
+        ([101, 202, 303, 404, 105], STRAIGHT),
+        ([101, 201, 301, 113, 212], THREE_OF_A_KIND),
+        ([101, 201, 313, 113, 212], TWO_PAIR),
+        ([101, 201, 313, 111, 212], ONE_PAIR),
+        ([101, 209, 313, 111, 204], HIGH_CARD),
+    ]
+    for codes, category in cases:
+        assert hand_category(evaluate(codes)) == category
+
+def test_wheel_loses_to_six_high_straight():
+    wheel = evaluate([101, 202, 303, 404, 105])
+    six_high = evaluate([202, 303, 404, 105, 206])
+    assert six_high > wheel
+
+def test_seven_cards_match_best_five():
+    rng = random.Random(7)
+    for _ in range(300):
+        hand = rng.sample(DECK, 7)
+        best = max(evaluate(list(c)) for c in combinations(hand, 5))
+        assert evaluate(hand) == best
+
+def test_scalar_and_batch_evaluators_agree():
+    import numpy as np
+    from core.calculator import INDEX_OF_CODE, evaluate_batch
+    rng = random.Random(11)
+    # 一半的手牌集中在两个花色里，保证覆盖同花分支
+    hands = [rng.sample(DECK if i % 2 else DECK[:26], 7) for i in range(2000)]
+    indexes = np.array([[INDEX_OF_CODE[c] for c in hand] for hand in hands])
+    assert evaluate_batch(indexes).tolist() == [evaluate(hand) for hand in hands]
+
+def test_outer_evaluator_matches_batch():
+    import numpy as np
+    from core.calculator import INDEX_OF_CODE, evaluate_batch, evaluate_outer
+    rng = random.Random(12)
+    hands = [rng.sample(DECK if i % 2 else DECK[:26], 7) for i in range(300)]
+    indexes = np.array([[INDEX_OF_CODE[c] for c in hand] for hand in hands])
+    # 每行拆成 5 + 2 张，对角线上是原来的整手牌
+    assert np.diag(evaluate_outer(indexes[:, :5], indexes[:, 5:])).tolist() == evaluate_batch(indexes).tolist()
+
+def test_monte_carlo_equity_aces_heads_up():
+    import numpy as np
+    from core.calculator import monte_carlo_equity
+    result = monte_carlo_equity([101, 201], [], 1, samples=20000, rng=np.random.default_rng(1))
+    assert result.samples == 20000
+    assert result.ci_low <= result.equity <= result.ci_high
+    assert 0.82 < result.equity < 0.88
+
+def test_monte_carlo_equity_time_budget():
+    from core.calculator import monte_carlo_equity
+    result = monte_carlo_equity([101, 201], [110, 211, 312], 5, samples=None, time_budget=0.01, batch_size=500)
+    assert result.samples >= 500
+    assert 0.0 <= result.equity <= 1.0
+    # 预算在首批内就用完：首批按对手数缩小，超时不超过这一小批
+    result = monte_carlo_equity([101, 201], [], 5, samples=None, time_budget=1e-6, batch_size=2000)
+    assert result.samples == 2000 // 6
+
+def test_monte_carlo_equity_nut_river():
+    from core.calculator import monte_carlo_equity
+    result = monte_carlo_equity([101, 113], [112, 111, 110, 202, 303], 3, samples=1000)
+    assert result.equity == 1.0
+
+def test_exact_equity_matches_monte_carlo():
+    import numpy as np
+    from core.calculator import exact_equity, monte_carlo_equity
+    for opponents in (1, 2):
+        exact = exact_equity([101, 201], [110, 211, 312, 405], opponents)
+        sampled = monte_carlo_equity([101, 201], [110, 211, 312, 405], opponents,
+                                     samples=50000, rng=np.random.default_rng(3))
+        assert exact.exact
+        assert abs(exact.equity - sampled.equity) < 0.01
+
+def test_exact_equity_river_tie():
+    from core.calculator import exact_equity
+    # 公共牌是皇家同花顺，所有人平分
+    result = exact_equity([202, 303], [101, 113, 112, 111, 110], 1)
+    assert result.equity == 0.5
+
+def test_cached_exact_equity_uses_suit_isomorphism():
+    from core.calculator import EXACT_CACHE, cached_exact_equity, canonical_spot
+    EXACT_CACHE.clear()
+    hits = EXACT_CACHE.hits
+    first = cached_exact_equity([101, 201], [110, 211, 312, 405], 1)
+    # 交换黑桃/红心后是同一局面
+    second = cached_exact_equity([201, 101], [210, 111, 312, 405], 1)
+    assert first is second
+    assert EXACT_CACHE.hits == hits + 1
+    assert canonical_spot([101, 201], [110, 211, 312, 405]) == canonical_spot([201, 101], [210, 111, 312, 405])
+
+def test_evaluator_tables_file_round_trip(tmp_path):
+    from core.calculator import FLUSH_TABLE, RANK_TABLE, build_tables, generate_tables, load_tables
+    path = str(tmp_path / "tables.bin")
+    # 表文件缺失时在内存中构建，不会写文件
+    flush, keys, values = load_tables(path)
+    assert not os.path.exists(path)
+    generate_tables(path)
+    cached = load_tables(path)
+    assert all((a == b).all() for a, b in zip((flush, keys, values), cached))
+    assert all((a == b).all() for a, b in zip(build_tables(), cached))
+    assert flush.tolist() == FLUSH_TABLE and dict(zip(keys.tolist(), values.tolist())) == RANK_TABLE
+
+    # 损坏的表文件不被改写，改为在内存中构建
+    with open(path, "wb") as f:
+        f.write(b"junk")
+    assert (load_tables(path)[1] == keys).all()
+    with open(path, "rb") as f:
+        assert f.read() == b"junk"
@@ -0,0 +1,21 @@
+import json
+from models.card import Card, CardSet, decode_card_set
+from utils.helpers import PokerJSONEncoder
+
+def test_card_set_operations():
+    hero = decode_card_set([101, 213])
+    board = decode_card_set([308, 101, 0])
+    assert len(board) == 2
+    assert (hero | board).codes() == [101, 213, 308]
+    assert (hero & board).codes() == [101]
+    live = CardSet.full_deck() - hero - board
+    assert len(live) == 49
+    assert 101 not in live and 102 in live
+    assert not hero.isdisjoint(board)
+
+def test_card_set_views():
+    cards = decode_card_set([213, 101])
+    assert cards.to_strings() == ["A♠", "K♥"]
+    assert [str(c) for c in cards.cards()] == ["A♠", "K♥"]
+    assert Card.from_index(Card(13, 2).index) == Card(13, 2)
+    assert json.loads(json.dumps({"board": cards}, cls=PokerJSONEncoder)) == {"board": ["A♠", "K♥"]}
@@ -0,0 +1,162 @@
+from database.manager import DatabaseManager
+
+def test_update_opponent_stats_single_upsert(tmp_path):
+    db = DatabaseManager(str(tmp_path / "stats.db"))
+    db.update_opponent_stats(1, "RAISE", "preflop")
+    db.update_opponent_stats(1, "CALL", "flop")
+    db.update_opponent_stats(1, "FOLD", "turn")
+    stats = db.get_opponent_stats(1)
+    assert stats == {"user_id": 1, "vpip": 2 / 3, "pfr": 1 / 3,
+                     "hands_played": 3, "hands_raised": 1, "vpip_count": 2}
+    assert db.get_opponent_stats(2) is None
+
+def test_buffered_updates_flush_by_size_and_explicitly(tmp_path):
+    path = str(tmp_path / "stats.db")
+    db = DatabaseManager(path, buffer_size=3)
+    db.record_action(1, "RAISE", "preflop")
+    db.record_action(2, "FOLD", "preflop")
+    # 未写入的增量在读取时合并
+    assert db.get_opponent_stats(1)["pfr"] == 1.0
+    assert DatabaseManager(path).get_opponent_stats(1) is None
+
+    db.record_action(1, "CALL", "flop")
+    assert DatabaseManager(path).get_opponent_stats(1)["hands_played"] == 2
+
+    db.record_action(2, "CALL", "flop")
+    db.flush()
+    reader = DatabaseManager(path)
+    assert reader.get_opponent_stats(2) == {"user_id": 2, "vpip": 0.5, "pfr": 0.0,
+                                            "hands_played": 2, "hands_raised": 0, "vpip_count": 1}
+    assert len(reader.get_all_opponent_stats()) == 2
+
+def test_flush_interval_writes_without_new_actions(tmp_path):
+    import time
+    path = str(tmp_path / "stats.db")
+    db = DatabaseManager(path, buffer_size=100, flush_interval=0.05)
+    db.record_action(1, "CALL", "flop")
+    # 不再有动作到达，后台线程也会按间隔写入
+    deadline = time.monotonic() + 5
+    while DatabaseManager(path).get_opponent_stats(1) is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    db.close()
+    assert not db._flusher.is_alive()
+
+def test_flush_listeners_run_outside_the_lock(tmp_path):
+    import threading
+    db = DatabaseManager(str(tmp_path / "stats.db"), buffer_size=1)
+    seen, notified = [], []
+
+    def listener():
+        # 另一个线程在通知期间记录动作和读取，不会被触发写入的线程持有的锁挡住
+        def other():
+            db.record_action(2, "RAISE", "preflop")
+            seen.append(db.get_opponent_stats(1)["hands_played"])
+        if not notified:
+            notified.append(True)
+            worker = threading.Thread(target=other, daemon=True)
+            worker.start()
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+
+    db.flush_listeners.append(listener)
+    db.record_action(1, "CALL", "flop")
+    assert seen == [1]
+    assert db.get_opponent_stats(2)["hands_raised"] == 1
+
+def test_opponent_stats_cache_stays_coherent(tmp_path):
+    db = DatabaseManager(str(tmp_path / "stats.db"), buffer_size=100)
+    assert db.get_opponent_stats(5) is None
+    db.record_action(5, "CALL", "preflop")
+    # 未知玩家的负缓存被作废，重新读取时合并待写入增量
+    assert db.get_opponent_stats(5)["vpip_count"] == 1
+
+    db.record_action(5, "RAISE", "preflop")
+    stats = db.get_opponent_stats(5)
+    assert stats["hands_played"] == 2 and stats["pfr"] == 0.5
+    db.flush()
+    assert db.get_opponent_stats(5) == stats
+
+    cache = db.cache_stats()
+    assert cache["hits"] == 2 and cache["misses"] == 2
+    assert cache["hit_rate"] == 0.5
+
+def test_opponent_stats_cache_ttl(tmp_path, monkeypatch):
+    import utils.cache
+    now = [100.0]
+    monkeypatch.setattr(utils.cache.time, "monotonic", lambda: now[0])
+    path = str(tmp_path / "stats.db")
+    db = DatabaseManager(path, cache_ttl=10)
+    db.update_opponent_stats(1, "CALL", "flop")
+    assert db.get_opponent_stats(1)["hands_played"] == 1
+    # 其它进程写入后，缓存在 TTL 到期后才会重新读取
+    DatabaseManager(path).update_opponent_stats(1, "CALL", "flop")
+    assert db.get_opponent_stats(1)["hands_played"] == 1
+    now[0] += 11
+    assert db.get_opponent_stats(1)["hands_played"] == 2
+    assert db.cache_stats()["expirations"] == 1
+
+def test_wal_mode_and_concurrent_readers(tmp_path):
+    import threading
+    db = DatabaseManager(str(tmp_path / "stats.db"), buffer_size=7)
+    assert db.pool.journal_mode == "wal"
+    errors = []
+
+    def reader():
+        try:
+            for _ in range(200):
+                stats = db.get_opponent_stats(1)
+                assert stats is None or stats["hands_played"] >= stats["vpip_count"]
+                db.get_opponent_stats(2)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(500):
+        db.record_action(1 + i % 3, "CALL" if i % 2 else "FOLD", "flop")
+    for t in threads:
+        t.join()
+    assert not errors
+    db.flush()
+    assert sum(s["hands_played"] for s in db.get_all_opponent_stats()) == 500
+    assert db.get_opponent_stats(1)["hands_played"] == 167
+    db.close()
+
+def test_reader_connections_are_per_thread(tmp_path):
+    import threading
+    db = DatabaseManager(str(tmp_path / "stats.db"))
+    db.update_opponent_stats(1, "CALL", "flop")
+    db.get_all_opponent_stats()
+    seen = []
+    t = threading.Thread(target=lambda: seen.append((db.pool.reader(), db.get_all_opponent_stats())))
+    t.start()
+    t.join()
+    assert seen[0][0] is not db.pool.reader()
+    assert seen[0][1][0]["hands_played"] == 1
+    # 已结束线程的连接在下一个新线程取连接时被回收
+    t = threading.Thread(target=db.pool.reader)
+    t.start()
+    t.join()
+    assert len(db.pool._readers) == 2
+    db.close()
+
+def test_in_memory_database():
+    db = DatabaseManager(":memory:")
+    db.update_opponent_stats(1, "RAISE", "preflop")
+    assert db.get_all_opponent_stats()[0]["pfr"] == 1.0
+    db.close()
+
+def test_schema_created_once(tmp_path, caplog):
+    import logging
+    from database.manager import SCHEMA_VERSION
+    path = str(tmp_path / "stats.db")
+    DatabaseManager(path).close()
+    with caplog.at_level(logging.INFO):
+        db = DatabaseManager(path)
+    assert db.pool.user_version == SCHEMA_VERSION
+    assert "created or verified" not in caplog.text
+    db.update_opponent_stats(1, "CALL", "flop")
+    db.profiles.ingest([{"user_id": 1, "total_hands": 10}])
+    assert db.get_recent_stats(1)["weight"] > 0
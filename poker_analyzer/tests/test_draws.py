@@ -0,0 +1,72 @@
+from core.draws import DrawAnalyzer
+from core.strategy import Strategy
+
+def test_flush_and_open_ended_draw_outs():
+    # 9♥8♥ 在 7♥6♣2♥ 上：同花听牌 + 两头顺
+    draws = DrawAnalyzer([209, 208], [207, 306, 202])
+    assert draws.flush_suit == 1 and draws.straight_draw == "open_ended"
+    assert sorted(draws.straight_ranks) == [3, 8]
+    # 9 张红心 + 5、T 各 3 张非红心
+    assert len(draws.outs()) == 15
+    assert draws.has_draw
+
+def test_incremental_update_and_made_hands():
+    draws = DrawAnalyzer([110, 111], [112, 305])
+    assert draws.straight_draw is None
+    draws.update([112, 305, 401])
+    assert draws.straight_draw == "gutshot" and len(draws.outs()) == 4
+    # 转牌补成顺子后不再报告听牌；非延续的公共牌被拒绝
+    assert draws.update([112, 305, 401, 213])
+    assert draws.made_straight and draws.straight_draw is None
+    assert not draws.update([301, 302, 303])
+
+def test_blockers():
+    draws = DrawAnalyzer([101, 310], [107, 103, 105, 211, 309])
+    blockers = draws.blockers()
+    assert blockers["nut_flush"] == [101]
+    assert blockers["straight"] == [310]
+    assert draws.flush_suit is None
+
+def test_strategy_draw_potential():
+    strategy = Strategy()
+    assert strategy.has_draw_potential([(9, 'hearts'), (8, 'hearts'), (7, 'hearts'), (6, 'clubs'), (2, 'hearts')])
+    assert not strategy.has_draw_potential([(14, 'hearts'), (2, 'spades'), (9, 'clubs'), (13, 'diamonds'), (5, 'hearts')])
+
+def test_tracker_reuses_flop_analysis():
+    from core.game_tracker import GameTracker
+    from models.card import CardSet
+    tracker = GameTracker()
+    tracker.process_message({"type": "round_change", "street": "PRE_FLOP", "pot": 3,
+                             "hero_cards": CardSet.from_codes([209, 208])})
+    delta = tracker.process_message({"type": "round_change", "street": "FLOP", "pot": 6,
+                                     "board": CardSet.from_codes([207, 306, 202])})["delta"]
+    assert delta["draws"]["flush_draw"] and delta["draws"]["outs"] == 15
+    analyzer = tracker.current_hand.draws
+    delta = tracker.process_message({"type": "round_change", "street": "TURN", "pot": 6,
+                                     "board": CardSet.from_codes([207, 306, 202, 113])})["delta"]
+    assert tracker.current_hand.draws is analyzer and len(analyzer.board) == 4
+    assert delta["draws"]["outs"] == 15
+    delta = tracker.process_message({"type": "round_change", "street": "RIVER", "pot": 6,
+                                     "board": CardSet.from_codes([207, 306, 202, 113, 312])})["delta"]
+    assert "draws" not in delta
+
+def test_advice_reuses_tracker_draw_analysis(tmp_path, monkeypatch):
+    import json
+    import core.strategy
+    from app import PokerAssistant
+    assistant = PokerAssistant(db_path=str(tmp_path / "stats.db"))
+
+    def round_change(street, board):
+        return assistant.process_message(json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+            "round": street, "totalPot": 10, "dealPublicCards": board,
+            "userCardsList": [{"userId": 1, "handCards": [209, 208]}]}}))
+
+    round_change("PRE_FLOP", [])
+    # 引擎不再自己分析听牌，直接用牌局追踪器的结果
+    monkeypatch.setattr(core.strategy, "DrawAnalyzer", None)
+    flop = round_change("FLOP", [207, 306, 202])["advice"]
+    turn = round_change("TURN", [207, 306, 202, 113])["advice"]
+    assert flop["draws"] == DrawAnalyzer([209, 208], [207, 306, 202]).summary()
+    assert turn["draws"] == DrawAnalyzer([209, 208], [207, 306, 202, 113]).summary()
+    assert turn["draws"] == assistant.tracker.current_hand.draw_summary
+    assistant.close()
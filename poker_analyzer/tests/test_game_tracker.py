@@ -0,0 +1,47 @@
+from core.game_tracker import GameTracker, HandState
+from models.card import CardSet
+
+def test_tracker_emits_deltas_and_keeps_ledger():
+    tracker = GameTracker(table_id="t1")
+    result = tracker.process_message({"type": "round_change", "street": "PRE_FLOP", "pot": 3,
+                                      "hero_cards": CardSet.from_codes([101, 201])})
+    assert result["delta"]["new_hand"] and result["delta"]["hero_cards"] == ["A♠", "A♥"]
+
+    delta = tracker.process_message({"type": "action", "user_id": 7, "action_type": "RAISE", "amount": 6})["delta"]
+    assert delta["pot"] == 9 and delta["current_bet"] == 6 and "board" not in delta
+    assert tracker.current_hand.facing_raise(hero_id=1) and not tracker.current_hand.facing_raise(hero_id=7)
+    delta = tracker.process_message({"type": "action", "user_id": 8, "action_type": "CALL", "amount": 6})["delta"]
+    assert delta["pot"] == 15 and "current_bet" not in delta
+    delta = tracker.process_message({"type": "action", "user_id": 9, "action_type": "FOLD", "amount": 0})["delta"]
+    assert set(delta) == {"seq", "action"}
+
+    delta = tracker.process_message({"type": "round_change", "street": "FLOP", "pot": 15,
+                                     "board": CardSet.from_codes([102, 203, 304])})["delta"]
+    assert delta.pop("draws")["straight_draw"] == "gutshot"
+    assert delta == {"seq": 4, "street": "FLOP", "current_bet": 0, "board": ["2♠", "3♥", "4♣"]}
+    assert not tracker.current_hand.facing_raise(hero_id=1)
+
+    state = tracker.get_current_state()
+    assert state["street_bets"] == {} and state["contributions"] == {7: 6, 8: 6}
+    assert [a["action_type"] for a in tracker.current_hand.actions] == ["RAISE", "CALL", "FOLD"]
+
+def test_replay_rebuilds_ledger():
+    hand = HandState.replay({"street": "PRE_FLOP", "pot": 3}, [
+        {"type": "action", "user_id": 1, "action_type": "RAISE", "amount": 4},
+        {"type": "round_change", "street": "FLOP", "pot": 10},
+        {"type": "action", "user_id": 2, "action_type": "BET", "amount": 5},
+    ])
+    assert hand.pot == 15 and hand.current_bet == 5
+    assert hand.street_bets == {2: 5} and hand.contributions == {1: 4, 2: 5}
+
+def test_positions_are_relative_to_the_inferred_button():
+    tracker = GameTracker()
+    tracker.process_message({"type": "round_change", "street": "PRE_FLOP", "pot": 3, "players": [1, 2, 3, 4, 5, 6]})
+    hand = tracker.current_hand
+    assert hand.position_of(4) is None  # 还没有动作，按钮未知
+    # 六人桌翻前第一个行动的是 UTG，座位号从 1 开始也按偏移计算
+    tracker.process_message({"type": "action", "user_id": 4, "action_type": "FOLD", "position": 4})
+    tracker.process_message({"type": "action", "user_id": 6, "action_type": "RAISE", "amount": 6, "position": 6})
+    assert [hand.position_of(seat) for seat in (1, 2, 3, 4, 5, 6)] == ["BTN", "SB", "BB", "UTG", "MP", "CO"]
+    parsed = tracker.annotate_round_change({"type": "round_change", "hero_id": 1})
+    assert parsed["opponentId"] == 6 and parsed["opponentPosition"] == "CO"
@@ -0,0 +1,52 @@
+from core.game_tracker import GameTracker, HandState
+from database.hand_archive import HandArchive
+from models.card import CardSet
+
+def _hand(table, started_at, players, pot=10.0):
+    return HandState(
+        street="RIVER", pot=pot, board=CardSet.from_codes([101, 202, 303, 404, 113]), current_bet=0,
+        hero_cards=CardSet.from_codes([112, 212]), position="CO", table_id=table, started_at=started_at,
+        actions=[{"street": "PRE_FLOP", "user_id": p, "action_type": "CALL", "amount": 2.0} for p in players]
+    )
+
+def test_segments_roundtrip_and_indexed_queries(tmp_path):
+    archive = HandArchive(str(tmp_path), segment_size=3)
+    archive.append(_hand("t1", 30.0, [1, 2]))
+    archive.append(_hand("t2", 10.0, [2, 3]))
+    archive.append(_hand("t1", 20.0, [1], pot=7.5))
+    archive.append(_hand("t2", 40.0, [1]))  # 仍在缓冲中
+    assert len(archive.segments) == 1 and len(archive) == 4
+
+    hands = list(archive.query(player=1))
+    assert [h.started_at for h in hands] == [20.0, 30.0, 40.0]
+    first = hands[0]
+    assert first.pot == 7.5 and first.table_id == "t1" and first.position == "CO"
+    assert first.board == CardSet.from_codes([101, 202, 303, 404, 113])
+    assert first.hero_cards.to_strings() == ["Q♠", "Q♥"]
+    assert first.actions == [{"street": "PRE_FLOP", "user_id": 1, "action_type": "CALL", "amount": 2.0}]
+
+    assert archive.count(table="t2") == 2
+    assert archive.count(player=2, table="t1") == 1
+    assert archive.count(start=15.0, end=35.0) == 2
+    assert archive.count(player=99) == 0
+
+    archive.close()
+    reopened = HandArchive(str(tmp_path), segment_size=3)
+    assert len(reopened.segments) == 2 and len(reopened) == 4
+    assert [h.table_id for h in reopened.query(player=3)] == ["t2"]
+
+def test_tracker_archives_completed_hands(tmp_path):
+    archive = HandArchive(str(tmp_path))
+    tracker = GameTracker(table_id="t9", archive=archive)
+    tracker.process_message({"type": "round_change", "street": "PRE_FLOP", "pot": 3,
+                             "hero_cards": CardSet.from_codes([101, 201])})
+    tracker.process_message({"type": "action", "user_id": 7, "action_type": "RAISE", "amount": 6})
+    tracker.process_message({"type": "round_change", "street": "FLOP", "pot": 15,
+                             "board": CardSet.from_codes([102, 203, 304])})
+    tracker.process_message({"type": "round_change", "street": "PRE_FLOP", "pot": 3})
+    assert len(tracker.hand_history) == 1
+
+    archive.flush()
+    [hand] = archive.query(player=7, table="t9")
+    assert hand.street == "FLOP" and hand.pot == 15
+    assert hand.actions[0]["action_type"] == "RAISE" and hand.actions[0]["street"] == "PRE_FLOP"
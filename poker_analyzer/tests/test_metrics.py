@@ -0,0 +1,84 @@
+import logging
+import time
+from utils.log import setup_logging, stop_logging
+from utils.metrics import LatencyHistogram, Metrics, SamplingProfiler, profiled
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+    summary = histogram.summary()
+    assert summary["count"] == 100 and summary["max_ms"] == 100.0
+    # 对数分桶的上界误差在 19% 以内
+    assert 50 <= summary["p50_ms"] <= 50 * 1.19
+    assert 99 <= summary["p99_ms"] <= 100
+
+def test_stage_timers_counters_and_profiler():
+    metrics = Metrics()
+    with profiled(metrics, interval=0.001):
+        for _ in range(3):
+            with metrics.timer("parse"):
+                time.sleep(0.002)
+            metrics.incr("messages")
+        snapshot = metrics.snapshot()
+    assert snapshot["stages"]["parse"]["count"] == 3
+    assert snapshot["stages"]["parse"]["p50_ms"] >= 2
+    assert snapshot["counters"] == {"messages": 3}
+    assert snapshot["profile"] and metrics.profiler is None
+
+    disabled = Metrics(enabled=False)
+    with disabled.timer("parse"):
+        disabled.incr("messages")
+    assert disabled.snapshot()["stages"] == {} and disabled.snapshot()["counters"] == {}
+
+def test_queue_logging_is_lazy(tmp_path):
+    class Payload:
+        formatted = 0
+
+        def __str__(self):
+            Payload.formatted += 1
+            return "payload"
+
+    path = tmp_path / "app.log"
+    setup_logging("INFO", str(path), stream=open(tmp_path / "stdout.log", "w"))
+    logger = logging.getLogger("test")
+    logger.propagate = False
+    logger.addHandler(logging.getLogger().handlers[-1])
+    try:
+        logger.debug("message %s", Payload())
+        assert Payload.formatted == 0
+        logger.info("message %s", Payload())
+    finally:
+        stop_logging()
+        logger.handlers.clear()
+        logger.propagate = True
+    assert path.read_text().strip().endswith("message payload")
+
+def test_skipped_messages_are_not_parse_errors(tmp_path, caplog):
+    from app import PokerAssistant
+    assistant = PokerAssistant(db_path=str(tmp_path / "stats.db"))
+    counters = assistant.metrics.snapshot()["counters"]
+    before = {name: counters.get(name, 0) for name in ("skipped_messages", "parse_errors")}
+    with caplog.at_level(logging.DEBUG, logger="PokerAssistant"):
+        skipped = assistant.process_message('{"msgType": "WP_heartbeatNotify", "msgBody": {}}')
+        broken = assistant.process_message('{"msgType": "WP_actionNotify", "msgBody": ')
+    assistant.close()
+    assert skipped["status"] == "skipped" and broken["status"] == "error"
+    counters = assistant.metrics.snapshot()["counters"]
+    assert counters["skipped_messages"] == before["skipped_messages"] + 1
+    assert counters["parse_errors"] == before["parse_errors"] + 1
+    assert [r.levelno for r in caplog.records if r.name == "PokerAssistant" and "消息" in r.getMessage()] == [
+        logging.DEBUG, logging.ERROR]
+
+def test_profiler_top_while_sampling():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    try:
+        # 采样线程运行期间反复读取，计数与总数保持一致
+        for _ in range(200):
+            profiler.top(5)
+            sum(i * i for i in range(2000))
+    finally:
+        profiler.stop()
+    assert profiler.total == sum(profiler.samples.values()) > 0
+    assert abs(sum(share for _, share in profiler.top(len(profiler.samples))) - 1.0) < 1e-2
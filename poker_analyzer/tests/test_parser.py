@@ -13,3 +13,40 @@ def test_parse_round_change():
     assert result["type"] == "round_change"
     assert result["pot"] == 3
     assert len(result["board"]) == 3
+
+def test_parse_round_change_packs_cards():
+    parser = HandHistoryParser()
+    sample_message = '''{"msgType": "WP_roundChangeNotify", "msgBody": {
+        "round": "FLOP", "totalPot": 6, "dealPublicCards": [101, 213, 308, 0, 0],
+        "userCardsList": [{"handCards": []}, {"handCards": [110, 210]}]
+    }}'''
+
+    result = parser.parse_message(sample_message)
+
+    assert result["board"].codes() == [101, 213, 308]
+    assert result["hero_cards"].to_strings() == ["10♠", "10♥"]
+
+def test_parse_stream_batches_and_counts():
+    parser = HandHistoryParser()
+    lines = [
+        '{"msgType": "WP_actionNotify", "msgBody": {"actionList": [{"actionType": "RAISE", "actionScore": 4, "userId": 7, "seatNum": 2}]}}',
+        '{"msgType": "WP_heartbeatNotify", "msgBody": {not json at all',
+        '',
+        '{"msgType": "WP_roundChangeNotify", "msgBody": {"round": "FLOP", "totalPot": 9, "dealPublicCards": [101, 213, 308]}}',
+        '{"msgType": "WP_actionNotify", "msgBody": {"actionList": [}',
+    ]
+
+    batches = list(parser.parse_stream(lines, batch_size=2))
+
+    assert [len(b) for b in batches] == [2, 1]
+    events = [e for b in batches for e in b]
+    assert [e["type"] for e in events] == ["action", "round_change", "error"]
+    assert events[2]["line"] == 5
+    assert parser.stats == {"parsed": 2, "skipped": 1, "errors": 1}
+
+def test_parse_file_streams_bytes(tmp_path):
+    log = tmp_path / "capture.log"
+    log.write_text('{"msgType": "WP_updateUserProfileNotify", "msgBody": {"listData": [{"userId": 3, "totalHand": 10}]}}\n')
+    events = list(HandHistoryParser().parse_file(str(log)))
+    assert events == [{"type": "player_stats", "stats": [
+        {"user_id": 3, "total_hands": 10, "pooling_hands": 0, "win_num": 0, "showdown_num": 0}]}]
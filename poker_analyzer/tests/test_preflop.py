@@ -0,0 +1,18 @@
+from core.preflop import PreflopTable, class_combos, class_name, generate_tables, hand_class
+
+def test_hand_classes():
+    assert class_name(hand_class(101, 201)) == "AA"
+    assert class_name(hand_class(101, 113)) == "AKs"
+    assert class_name(hand_class(213, 101)) == "AKo"
+    assert len({hand_class(a, b) for a, b in [(101, 201), (102, 207), (307, 302)]}) == 3
+    assert sum(len(class_combos(i)) for i in range(169)) == 1326
+
+def test_generated_table_roundtrip(tmp_path):
+    path = str(tmp_path / "preflop.bin")
+    generate_tables(path, samples=300, max_opponents=2, percentiles=(0.1, 1.0))
+    table = PreflopTable.load(path)
+    aces, trash = hand_class(101, 201), hand_class(207, 102)
+    assert table.max_opponents == 2
+    assert table.equity(aces, 1) > table.equity(aces, 2) > table.equity(trash, 2)
+    assert table.hand_percentile(aces) == 0.0
+    assert table.equity_vs_range(aces, 0.05) == table.equity_vs_range(aces, 0.1)
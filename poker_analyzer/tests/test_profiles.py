@@ -0,0 +1,49 @@
+import json
+from database.manager import DatabaseManager
+
+def _player(user_id, total=100, pooling=30, win=10, showdown=5):
+    return {"user_id": user_id, "total_hands": total, "pooling_hands": pooling,
+            "win_num": win, "showdown_num": showdown}
+
+def test_ingest_keeps_latest_and_skips_unchanged(tmp_path):
+    path = str(tmp_path / "stats.db")
+    db = DatabaseManager(path)
+    profiles = db.profiles
+    # 同一消息中重复出现的玩家只保留最后一条
+    assert profiles.ingest([_player(1, total=50), _player(2), _player(1, total=60)]) == 2
+    assert profiles.get(1)["total_hands"] == 60
+    # 值未变化的玩家不写入
+    assert profiles.ingest([_player(1, total=60), _player(2)]) == 0
+    assert profiles.ingest([_player(1, total=61), _player(2)]) == 1
+    assert profiles.stats()["written"] == 3
+
+    # 新进程没有内存中的旧值时，数据库侧的 UPSERT 同样跳过相同的行
+    other = DatabaseManager(path).profiles
+    assert other.ingest([_player(1, total=61), _player(2), _player(3)]) == 1
+    assert other.get(2) == {"user_id": 2, "total_hands": 100, "pooling_hands": 30, "win_num": 10,
+                            "showdown_num": 5, "vpip": 0.3, "wtsd": 5 / 30, "win_rate": 0.1}
+    assert other.get(4) is None
+
+def test_opponent_stats_fall_back_to_profile(tmp_path):
+    db = DatabaseManager(str(tmp_path / "stats.db"))
+    assert db.get_opponent_stats(7) is None
+    db.profiles.ingest([_player(7, total=200, pooling=50)])
+    stats = db.get_opponent_stats(7)
+    assert stats["source"] == "profile" and stats["vpip"] == 0.25 and stats["hands_played"] == 200
+    # 有逐手观察数据后优先使用观察数据
+    db.update_opponent_stats(7, "CALL", "flop")
+    assert db.get_opponent_stats(7)["hands_played"] == 1
+
+def test_assistant_ingests_profile_notifications(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from app import PokerAssistant
+    assistant = PokerAssistant()
+    message = json.dumps({"msgType": "WP_updateUserProfileNotify", "msgBody": {"listData": [
+        {"userId": i, "totalHand": 100 + i, "poolingHandNum": 20, "winNum": 5, "showdownNum": 3}
+        for i in range(300)
+    ]}})
+    result = assistant.process_message(message)
+    assert result["message_type"] == "player_stats" and result["updated"] == 300
+    assert assistant.process_message(message)["updated"] == 0
+    assert assistant.db.profiles.get(299)["total_hands"] == 399
+    assistant.close()
@@ -0,0 +1,64 @@
+from core.calculator import exact_equity
+from core.ranges import (
+    RangeMatrix, class_weights, combo_weights, generate_matrix, range_equity, range_width
+)
+from core.preflop import hand_class
+from core.strategy import StrategyEngine
+
+def test_range_width_buckets_and_requires_sample():
+    assert range_width(None) is None
+    assert range_width({"vpip": 0.3, "pfr": 0.1, "hands_played": 5}) is None
+    stats = {"vpip": 0.32, "pfr": 0.11, "hands_played": 100}
+    assert abs(range_width(stats) - 0.3) < 1e-9
+    assert abs(range_width(stats, raised=True) - 0.1) < 1e-9
+    assert class_weights(1.0).min() > 0.999
+    assert abs(combo_weights(0.2).sum() / 1326 - 0.2) < 0.01
+
+def test_full_range_matches_exact_enumeration():
+    hero, board = [101, 201], [302, 407, 113, 212]
+    assert abs(range_equity(hero, board, 1.0) - exact_equity(hero, board, 1).equity) < 1e-9
+    river = board + [309]
+    assert abs(range_equity(hero, river, 1.0) - exact_equity(hero, river, 1).equity) < 1e-9
+    # 翻牌枚举全部转牌+河牌，与精确枚举一致
+    flop = board[:3]
+    assert abs(range_equity(hero, flop, 1.0) - exact_equity(hero, flop, 1).equity) < 1e-9
+    # 对手范围收紧后，中等牌力的胜率下降
+    assert range_equity([110, 212], board, 0.1) < range_equity([110, 212], board, 1.0)
+
+def test_preflop_matrix_roundtrip(tmp_path):
+    path = str(tmp_path / "range.bin")
+    generate_matrix(path, samples=50)
+    matrix = RangeMatrix.load(path)
+    aces = hand_class(101, 201)
+    assert matrix.equity[aces, aces] == 0.5
+    assert abs(matrix.equity[aces, hand_class(207, 102)] + matrix.equity[hand_class(207, 102), aces] - 1) < 1e-6
+    assert matrix.vs_range([101, 201], combo_weights(1.0)) > 0.75
+
+def test_engine_uses_opponent_range():
+    engine = StrategyEngine(num_opponents=1)
+    state = {"street": "TURN", "hero_cards": [110, 212], "board": [302, 407, 113, 112]}
+    tight = {"vpip": 0.08, "pfr": 0.05, "hands_played": 200}
+    advice = engine.get_advice(state, tight)
+    assert advice["range_width"] == range_width(tight)
+    assert advice["exact"] and advice["samples"] == 0
+    assert "range_width" not in engine.get_advice(state, None)
+
+def test_live_advice_uses_villain_range(tmp_path):
+    import json
+    from app import PokerAssistant
+    assistant = PokerAssistant(db_path=str(tmp_path / "stats.db"))
+
+    def round_change(street, board):
+        return assistant.process_message(json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+            "round": street, "totalPot": 10, "dealPublicCards": board,
+            "userCardsList": [{"userId": 1, "handCards": [101, 113]}, {"userId": 7, "handCards": []}]}}))
+
+    round_change("PRE_FLOP", [])
+    # 对手 7 的逐手样本足够后，建议改用对其入池范围的胜率
+    for _ in range(60):
+        assistant.process_message(json.dumps({"msgType": "WP_actionNotify", "msgBody": {
+            "actionList": [{"userId": 7, "actionType": "CALL", "actionScore": 2, "seatNum": 3}]}}))
+    round_change("FLOP", [112, 111, 202])
+    advice = round_change("TURN", [112, 111, 202, 303])["advice"]
+    assert advice["range_width"] == 1.0
+    assistant.close()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from core.strategy import StrategyEngine
+from server import IngestionServer
+
+class _Assistant:
+    def __init__(self):
+        self.strategy = StrategyEngine()
+
+    def prepare_round_change(self, parsed):
+        state = {"street": parsed["street"], "board": parsed["board"], "hero_cards": parsed["hero_cards"]}
+        return {"street": parsed["street"], "board": parsed["board"].to_strings()}, state, None
+
+ROUND = {"msgType": "WP_roundChangeNotify", "msgBody": {
+    "round": "RIVER", "totalPot": 9, "dealPublicCards": [112, 111, 110, 202, 303],
+    "userCardsList": [{"handCards": [101, 113]}]}}
+
+async def _send_table(port, table_id, count):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"TABLE {table_id}\n".encode())
+    for _ in range(count):
+        writer.write((json.dumps(ROUND) + "\n").encode())
+    await writer.drain()
+    results = [json.loads(await reader.readline()) for _ in range(count)]
+    writer.close()
+    return results
+
+def test_server_shards_tables():
+    async def scenario():
+        server = IngestionServer(_Assistant(), port=0, queue_size=2)
+        await server.start()
+        try:
+            results = await asyncio.gather(*(_send_table(server.port, f"t{i}", 3) for i in range(4)))
+            stats = server.stats()
+        finally:
+            await server.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    for i, table_results in enumerate(results):
+        assert {r["table_id"] for r in table_results} == {f"t{i}"}
+        assert all(r["advice"]["action"] == "RAISE" for r in table_results)
+    assert sorted(stats) == ["t0", "t1", "t2", "t3"]
+    assert all(s["advised"] == 3 for s in stats.values())
+
+def test_stats_endpoint():
+    async def scenario():
+        server = IngestionServer(_Assistant(), port=0)
+        await server.start()
+        try:
+            await _send_table(server.port, "t0", 1)
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"STATS\n")
+            await writer.drain()
+            stats = json.loads(await reader.readline())
+            writer.close()
+        finally:
+            await server.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["tables"]["t0"]["advised"] == 1
+    assert stats["metrics"]["stages"]["strategy"]["count"] >= 1
+    assert {"parse", "track", "db"} <= set(stats["metrics"]["stages"])
+
+def test_database_work_runs_off_the_event_loop():
+    import threading
+
+    class _Db:
+        def __init__(self):
+            self.threads = []
+
+        def record_action(self, *args):
+            self.threads.append(threading.current_thread())
+
+    class _DbAssistant(_Assistant):
+        def __init__(self):
+            super().__init__()
+            self.db = _Db()
+
+        def prepare_round_change(self, parsed):
+            self.db.threads.append(threading.current_thread())
+            return super().prepare_round_change(parsed)
+
+    action = {"msgType": "WP_actionNotify", "msgBody": {"actionList": [{"userId": 4, "actionType": "CALL"}]}}
+
+    async def scenario():
+        assistant = _DbAssistant()
+        server = IngestionServer(assistant, port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"TABLE t0\n")
+            for message in (ROUND, action, ROUND):
+                writer.write((json.dumps(message) + "\n").encode())
+            await writer.drain()
+            results = [json.loads(await reader.readline()) for _ in range(2)]
+            writer.close()
+        finally:
+            await server.close()
+        return assistant.db.threads, results
+
+    threads, results = asyncio.run(scenario())
+    assert len(threads) == 3 and threading.main_thread() not in threads
+    assert all(r["status"] == "success" for r in results)
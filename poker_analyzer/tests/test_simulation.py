@@ -0,0 +1,48 @@
+from simulation import HeadlessSimulation, RandomPolicy, hands_per_second
+from database.manager import DatabaseManager
+
+def test_headless_simulation_conserves_chips():
+    engine = HeadlessSimulation(seed=1)
+    stats = engine.run(300)
+    assert stats.hands == 300
+    assert sum(stats.chip_delta_by_position.values()) == 0
+    assert set(stats.hands_by_position) == {"BTN", "SB", "BB", "UTG", "MP", "CO"}
+    assert all(v == 300 for v in stats.hands_by_position.values())
+    assert stats.showdowns > 0
+
+def test_headless_simulation_is_reproducible():
+    first = HeadlessSimulation(seed=5).run(100)
+    second = HeadlessSimulation(seed=5).run(100)
+    assert first == second
+
+def test_side_pots_pay_by_hand_rank():
+    class Shove:
+        def __call__(self, view):
+            return "ALL-IN"
+
+    engine = HeadlessSimulation(num_players=3, policies=[Shove()] * 3, seed=3)
+    engine.stacks = [50, 100, 200]
+    engine.play_hand()
+    # 三人全下：总筹码不变，最短码玩家最多赢得 150
+    assert sum(engine.stacks) == 350
+    assert engine.stacks[0] <= 150
+    assert engine.stats.showdowns == 1
+
+def test_headless_simulation_batches_db_writes(tmp_path):
+    db = DatabaseManager(str(tmp_path / "sim.db"), buffer_size=10000)
+    engine = HeadlessSimulation(seed=2, db=db)
+    engine.run(20)
+    total_actions = sum(engine.stats.action_counts.values())
+    assert sum(row["hands_played"] for row in db.get_all_opponent_stats()) == total_actions
+
+def test_hands_per_second_benchmark():
+    assert hands_per_second(hands=50) > 0
+
+def test_run_batch_is_reproducible_across_worker_counts():
+    from simulation import run_batch
+    serial = run_batch(120, seed=11, workers=1, shard_size=40)
+    parallel = run_batch(120, seed=11, workers=2, shard_size=40)
+    assert serial == parallel
+    assert serial.hands == 120
+    assert sum(serial.chip_delta_by_position.values()) == 0
+    assert run_batch(120, seed=12, workers=1, shard_size=40) != serial
@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+import os
+from config.settings import Settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUND = json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+    "round": "FLOP", "totalPot": 10, "dealPublicCards": [112, 111, 210, 0, 0],
+    "userCardsList": [{"userId": 1, "handCards": [101, 113]}]}})
+
+def test_settings_from_env_and_overrides():
+    env = {"POKER_LOG_LEVEL": "DEBUG", "POKER_FAST_START": "1", "POKER_ADVICE_CACHE_SIZE": "10",
+           "POKER_LOG_FILE": ""}
+    settings = Settings.from_env(env, db_path="x.db", log_level=None)
+    assert settings.log_level == "DEBUG" and settings.fast_start is True
+    assert settings.advice_cache_size == 10 and settings.log_file is None
+    assert settings.db_path == "x.db" and settings.advice_cache == "advice_cache.json"
+    assert Settings.from_env({}, advice_cache="").advice_cache == ""
+
+def test_importing_app_is_side_effect_free(tmp_path):
+    # 导入时不配置日志、不打开数据库、不导入策略引擎
+    code = ("import logging, sys, app; "
+            "assert not logging.getLogger().handlers; "
+            "assert 'core.strategy' not in sys.modules and 'database.manager' not in sys.modules")
+    data_dir = os.path.join(ROOT, "data")
+
+    def snapshot():
+        return {name: os.stat(os.path.join(data_dir, name)).st_mtime_ns for name in os.listdir(data_dir)}
+
+    before = snapshot()
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True, env={**os.environ, "PYTHONPATH": ROOT})
+    assert not os.listdir(tmp_path)
+    # 也不在包内的数据目录生成或改写文件
+    assert snapshot() == before
+
+def test_fast_start_warms_up_in_background(tmp_path):
+    from app import PokerAssistant
+    assistant = PokerAssistant(advice_cache=str(tmp_path / "advice.json"), db_path=str(tmp_path / "stats.db"),
+                               fast_start=True)
+    result = assistant.process_message(ROUND)
+    assert result["status"] == "success" and result["advice"]["street"] == "flop"
+    assistant.close()
+    assert {"import", "init", "strategy", "db", "advice_cache", "first_advice"} <= set(assistant.startup)
+    assert os.path.exists(tmp_path / "advice.json")
@@ -0,0 +1,106 @@
+from core.strategy import Strategy
+
+class _Player:
+    def __init__(self, hand):
+        self.hand = hand
+
+def test_flop_strategy_raises_with_set():
+    strategy = Strategy()
+    player = _Player([(9, 'hearts'), (9, 'spades')])
+    game_state = {"street": "flop", "community_cards": [(9, 'clubs'), (2, 'hearts'), (13, 'diamonds')]}
+    assert strategy.suggest_action(player, game_state, {}) == "RAISE"
+
+def test_river_strategy_folds_air():
+    strategy = Strategy()
+    player = _Player([(2, 'hearts'), (7, 'spades')])
+    board = [(9, 'clubs'), (4, 'hearts'), (13, 'diamonds'), (11, 'spades'), (14, 'clubs')]
+    game_state = {"street": "river", "community_cards": board}
+    assert strategy.suggest_action(player, game_state, {}) == "FOLD"
+
+def test_strategy_engine_advice_from_round_change():
+    from core.strategy import StrategyEngine
+    from models.card import decode_cards
+    engine = StrategyEngine(num_opponents=1)
+    game_state = {"street": "FLOP", "hero_cards": decode_cards([101, 201]), "board": decode_cards([301, 113, 205])}
+    advice = engine.get_advice(game_state, None)
+    assert advice["action"] == "RAISE"
+    assert advice["street"] == "flop"
+    assert advice["hand"] == "Three of a Kind"
+    assert advice["equity_ci"][0] <= advice["equity"] <= advice["equity_ci"][1]
+
+def test_preflop_strategy_uses_table():
+    strategy = Strategy()
+    game_state = {"street": "preflop"}
+    aces = _Player([(14, 'hearts'), (14, 'spades')])
+    trash = _Player([(7, 'hearts'), (2, 'spades')])
+    assert strategy.suggest_action(aces, game_state, {"pfr": 0.3}) == "RAISE"
+    assert strategy.suggest_action(trash, game_state, {"pfr": 0.3}) == "FOLD"
+    # 被动的对手（PFR 低于 steal_pfr）面前偷盲
+    assert strategy.suggest_action(trash, game_state, {"pfr": 0.05}) == "RAISE"
+    # 数据库产出的统计键名是小写 pfr，不会被当作 0 一律偷盲
+    assert strategy.suggest_action(trash, game_state, {"pfr": 0.3, "vpip": 0.3}) == "FOLD"
+
+def test_strategy_engine_preflop_lookup():
+    from core.strategy import StrategyEngine
+    engine = StrategyEngine(num_opponents=1)
+    advice = engine.get_advice({"street": "PRE_FLOP", "hero_cards": [101, 201], "board": []}, None)
+    assert advice["action"] == "RAISE"
+    assert advice["samples"] == 0
+    assert 0.8 < advice["equity"] < 0.9
+
+def test_facing_raise_reaches_engine_from_messages(tmp_path):
+    import json
+    from app import PokerAssistant
+    assistant = PokerAssistant(db_path=str(tmp_path / "stats.db"))
+    seen = []
+    get_advice = assistant.strategy.get_advice
+    assistant.strategy.get_advice = lambda state, stats: seen.append(state["facing_raise"]) or get_advice(state, stats)
+
+    def round_change(street, board):
+        return assistant.process_message(json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+            "round": street, "totalPot": 10, "dealPublicCards": board,
+            "userCardsList": [{"userId": 1, "handCards": [101, 113]}]}}))
+
+    def action(user_id, action_type):
+        assistant.process_message(json.dumps({"msgType": "WP_actionNotify", "msgBody": {
+            "actionList": [{"userId": user_id, "actionType": action_type, "actionScore": 4}]}}))
+
+    round_change("FLOP", [112, 111, 202])
+    action(1, "RAISE")  # 主角自己的加注不算
+    round_change("FLOP", [112, 111, 202])
+    action(4, "RAISE")
+    assert round_change("FLOP", [112, 111, 202])["game_state"]["facing_raise"] is True
+    # 进入新的一街后重新计算
+    round_change("TURN", [112, 111, 202, 303])
+    assert seen == [False, False, True, False]
+    assistant.close()
+
+def test_recent_fold_frequency_turns_a_fold_into_a_semi_bluff(tmp_path):
+    import json
+    from app import PokerAssistant
+    assistant = PokerAssistant(db_path=str(tmp_path / "stats.db"))
+
+    def round_change(street, board):
+        return assistant.process_message(json.dumps({"msgType": "WP_roundChangeNotify", "msgBody": {
+            "round": street, "totalPot": 10, "dealPublicCards": board,
+            "userCardsList": [{"userId": 1, "handCards": [107, 202]}, {"userId": 7}]}}))
+
+    def action(action_type):
+        assistant.process_message(json.dumps({"msgType": "WP_actionNotify", "msgBody": {
+            "actionList": [{"userId": 7, "actionType": action_type, "actionScore": 0, "seatNum": 2}]}}))
+
+    round_change("PRE_FLOP", [])
+    action("CALL")
+    advice = round_change("FLOP", [301, 413, 112])["advice"]
+    assert advice["action"] == "FOLD" and "bluff" not in advice
+    # 对手近期几乎总是弃牌：同样的牌面改为半诈唬
+    for _ in range(12):
+        round_change("PRE_FLOP", [])
+        action("FOLD")
+    round_change("PRE_FLOP", [])
+    action("CALL")
+    advice = round_change("FLOP", [301, 413, 112])["advice"]
+    assert advice["action"] == "RAISE" and advice["bluff"] is True
+    # 单挑时第一个行动的是按钮，统计按相对位置记录
+    assert set(assistant.db.get_recent_stats(7)["by_position"]) == {"BTN"}
+    assistant.close()
@@ -0,0 +1,53 @@
+from core.table_registry import TrackerRegistry
+from database.hand_archive import HandArchive
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _play_hand(registry, table_id, user_id=1):
+    registry.process_message(table_id, {"type": "round_change", "street": "PRE_FLOP", "pot": 3})
+    registry.process_message(table_id, {"type": "action", "user_id": user_id, "action_type": "CALL", "amount": 2})
+
+def test_history_is_capped_and_spilled_to_archive(tmp_path):
+    archive = HandArchive(str(tmp_path))
+    registry = TrackerRegistry(archive, history_size=3, idle_timeout=None)
+    for _ in range(10):
+        _play_hand(registry, "t1")
+    tracker = registry.get("t1")
+    assert len(tracker.hand_history) == 3 and tracker.current_hand is not None
+    stats = registry.memory_stats()["t1"]
+    assert stats["hands"] == 4 and stats["actions"] == 4 and stats["bytes"] > 0
+
+    registry.close()
+    assert len(registry) == 0 and archive.count(player=1, table="t1") == 10
+
+def test_idle_tables_are_evicted(tmp_path):
+    clock = _Clock()
+    archive = HandArchive(str(tmp_path))
+    registry = TrackerRegistry(archive, idle_timeout=60, sweep_interval=10, clock=clock)
+    _play_hand(registry, "t1")
+    clock.now = 30
+    _play_hand(registry, "t2")
+    clock.now = 75
+    registry.get("t2")  # 触发周期性清理
+    assert "t1" not in registry and "t2" in registry and registry.evicted == 1
+    assert archive.count(table="t1") == 1 and archive.count(table="t2") == 0
+
+def test_sweep_flushes_archive_buffer_by_age(tmp_path):
+    clock = _Clock()
+    archive = HandArchive(str(tmp_path), flush_interval=60, clock=clock)
+    registry = TrackerRegistry(archive, idle_timeout=None, sweep_interval=10, clock=clock)
+    _play_hand(registry, "t1")
+    _play_hand(registry, "t1")  # 第一手结束，进入归档缓冲
+    assert registry.memory_stats()["t1"]["archive_pending"] == 1 and not archive.segments
+    clock.now = 30
+    registry.get("t1")
+    assert not archive.segments
+    clock.now = 70
+    registry.get("t1")  # 清理时缓冲已超过 60 秒，写成段
+    assert len(archive.segments) == 1 and registry.memory_stats()["t1"]["archive_pending"] == 0
+    assert archive.count(table="t1") == 1
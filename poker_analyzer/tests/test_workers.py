@@ -0,0 +1,69 @@
+from core.workers import AdvicePool, _lookup_opponent, benchmark
+from models.card import CardSet
+
+def test_advice_pool_with_shared_opponent_snapshot():
+    rows = [
+        {"user_id": 9, "vpip": 0.5, "pfr": 0.2, "hands_played": 10, "hands_raised": 2, "vpip_count": 5},
+        {"user_id": 3, "vpip": 0.1, "pfr": 0.05, "hands_played": 20, "hands_raised": 1, "vpip_count": 2},
+    ]
+    state = {"street": "RIVER", "hero_cards": CardSet.from_codes([101, 113]),
+             "board": CardSet.from_codes([112, 111, 110, 202, 303])}
+    with AdvicePool(2) as pool:
+        pool.publish_opponents(rows)
+        assert pool.executor.submit(_lookup_opponent, pool._snapshot, 3).result()["vpip_count"] == 2
+        assert pool.executor.submit(_lookup_opponent, pool._snapshot, 4).result() is None
+        pool.publish_opponents(rows[:1])
+        assert pool.executor.submit(_lookup_opponent, pool._snapshot, 9).result()["pfr"] == 0.2
+        advice = pool.map([state, state], [9, 3])
+    assert [a["action"] for a in advice] == ["RAISE", "RAISE"]
+
+def test_republish_keeps_segment_for_pending_tasks():
+    rows = [{"user_id": 9, "vpip": 0.5, "pfr": 0.2, "hands_played": 10, "hands_raised": 2, "vpip_count": 5}]
+    state = {"street": "RIVER", "hero_cards": CardSet.from_codes([101, 113]),
+             "board": CardSet.from_codes([112, 111, 110, 202, 303])}
+    with AdvicePool(1) as pool:
+        pool.publish_opponents(rows)
+        old_name = pool._snapshot[0]
+        futures = [pool.submit(state, opponent_id=9) for _ in range(4)]
+        pool.publish_opponents(rows)
+        # 旧段在任务完成前不回收，任务读到的是发布时的快照
+        assert [f.result()["action"] for f in futures] == ["RAISE"] * 4
+        assert old_name not in pool._retired
+        assert pool.lookup_opponent(9)["pfr"] == 0.2
+        assert pool.lookup_opponent(4) is None
+
+def test_benchmark_reports_rates():
+    rates = benchmark((1, 2), decisions=6, samples=200)
+    assert set(rates) == {1, 2}
+    assert all(rate > 0 for rate in rates.values())
+
+def test_assistant_republishes_snapshot_after_flush(tmp_path):
+    from app import PokerAssistant
+    assistant = PokerAssistant(workers=1, advice_cache=str(tmp_path / "advice.json"),
+                               db_path=str(tmp_path / "stats.db"))
+    try:
+        assert assistant.pool.lookup_opponent(42) is None
+        assistant.db.record_action(42, "CALL", "FLOP")
+        assistant.db.flush()
+        assert assistant.pool.lookup_opponent(42)["hands_played"] == 1
+        state = {"street": "RIVER", "hero_cards": CardSet.from_codes([101, 113]),
+                 "board": CardSet.from_codes([112, 111, 110, 202, 303])}
+        stats = assistant.db.get_opponent_stats(42)
+        assert assistant.submit_pooled_advice(state, stats).result()["action"] == "RAISE"
+        # 第二次命中建议缓存，直接返回已完成的 Future
+        assert assistant.submit_pooled_advice(state, stats).done()
+    finally:
+        assistant.close()
+
+def test_pooled_advice_uses_the_resolved_opponent_stats(tmp_path):
+    from app import PokerAssistant
+    assistant = PokerAssistant(workers=1, db_path=str(tmp_path / "stats.db"))
+    try:
+        # 对手不在快照里，只有近期弃牌率：多进程路径与单进程路径给出同样的半诈唬
+        state = {"street": "FLOP", "hero_cards": CardSet.from_codes([107, 202]),
+                 "board": CardSet.from_codes([301, 413, 112])}
+        advice = assistant.submit_pooled_advice(state, {"fold_frequency": 0.9}).result()
+        assert advice["action"] == "RAISE" and advice["bluff"] is True
+        assert assistant.strategy.get_advice(state, {"fold_frequency": 0.9})["bluff"] is True
+    finally:
+        assistant.close()
@@ -0,0 +1,99 @@
+# utils/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """有界 LRU 缓存，可选 TTL，带命中/未命中计数
+
+    各操作在内部锁内完成，可以在线程池的多个线程间共享（如 EXACT_CACHE、RANGE_CACHE）。
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, 过期时间)；未设置 TTL 时过期时间为 None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            self.expirations += 1
+            return _MISSING
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """读取但不计入命中统计，也不更新 LRU 顺序"""
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def items(self) -> list:
+        """(键, 值) 列表，按最久未使用到最近使用排列"""
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._data.items()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hit_rate,
+            }
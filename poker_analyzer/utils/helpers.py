@@ -1,9 +1,11 @@
 # utils/helpers.py
 from json import JSONEncoder
-from models.card import Card
+from models.card import Card, CardSet
 
 class PokerJSONEncoder(JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Card):
             return str(obj)
+        if isinstance(obj, CardSet):
+            return obj.to_strings()
         return super().default(obj)
\ No newline at end of file
@@ -0,0 +1,65 @@
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """把记录原样放入队列，消息格式化推迟到监听线程
+
+    标准 QueueHandler 会在调用线程里先格式化消息；这里只复制记录，
+    因此日志参数在写出前不应再被修改。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+def setup_logging(level="INFO", log_file: Optional[str] = "poker_assistant.log",
+                  stream=sys.stdout) -> logging.handlers.QueueListener:
+    """异步日志：调用线程只把记录放入队列，格式化和写文件/终端由监听线程完成
+
+    重复调用时替换之前的配置。
+    """
+    global _listener
+    stop_logging()
+
+    handlers = [logging.StreamHandler(stream)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """刷出队列中剩余的日志并停止监听线程"""
+    global _listener
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DeferredQueueHandler):
+            root.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,238 @@
+import json
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# 延迟直方图桶上界：1 微秒起每桶 x2^(1/4)，约到 100 秒，相对误差 < 19%
+_BUCKET_BOUNDS = [1e-6 * 2 ** (i / 4) for i in range(4 * 27)]
+
+
+class LatencyHistogram:
+    """固定对数分桶的延迟直方图，记录 O(log 桶数)，内存固定"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """第 q 分位（0~1）所在桶的上界，最后一个桶取观测到的最大值"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(_BUCKET_BOUNDS[i], self.max) if i < len(_BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        """毫秒为单位的摘要"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 4),
+            "p99_ms": round(self.percentile(0.99) * 1000, 4),
+            "max_ms": round(self.max * 1000, 4),
+        }
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: 'Metrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """各处理阶段的延迟直方图和计数器，线程安全
+
+    用法: ``with METRICS.timer("parse"): ...``；关闭时计时器是空操作。
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Counter = Counter()
+        self.started_at = time.time()
+        self.profiler: Optional[SamplingProfiler] = None
+        self._lock = threading.Lock()
+
+    def timer(self, stage: str):
+        return _StageTimer(self, stage) if self.enabled else _NULL_TIMER
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "stages": {stage: h.summary() for stage, h in sorted(self.histograms.items())},
+                "counters": dict(self.counters),
+            }
+        if self.profiler is not None:
+            stats["profile"] = self.profiler.top()
+        return stats
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.started_at = time.time()
+
+    def start_profiler(self, interval: float = 0.005) -> 'SamplingProfiler':
+        """开启采样分析器，之后的 snapshot 附带最热的调用位置"""
+        if self.profiler is None:
+            self.profiler = SamplingProfiler(interval)
+            self.profiler.start()
+        return self.profiler
+
+    def stop_profiler(self) -> None:
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+
+
+class SamplingProfiler:
+    """后台线程按固定间隔采样其他线程的当前栈帧，统计最常出现的函数位置
+
+    只读取 sys._current_frames，不挂 sys.setprofile 钩子，对被测代码几乎没有开销。
+    """
+
+    def __init__(self, interval: float = 0.005, depth: int = 3):
+        self.interval = interval
+        self.depth = depth
+        self.samples: Counter = Counter()
+        self.total = 0
+        # 采样线程写计数、调用方读 top，计数的更新和读取都在锁内
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                stacks.append(" <- ".join(stack))
+            with self._lock:
+                self.samples.update(stacks)
+                self.total += len(stacks)
+
+    def top(self, n: int = 10) -> List[Tuple[str, float]]:
+        """最热的 n 个栈（占全部样本的比例）"""
+        with self._lock:
+            total = max(self.total, 1)
+            hottest = self.samples.most_common(n)
+        return [(stack, round(count / total, 4)) for stack, count in hottest]
+
+
+class MetricsDumper:
+    """后台线程定期把指标快照以 JSON 写入日志或文件"""
+
+    def __init__(self, metrics: 'Metrics', interval: float = 60.0, path: Optional[str] = None):
+        self.metrics = metrics
+        self.interval = interval
+        self.path = path
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+
+    def start(self) -> 'MetricsDumper':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.dump()
+
+    def dump(self) -> None:
+        payload = json.dumps(self.metrics.snapshot(), ensure_ascii=False)
+        if self.path:
+            with open(self.path, "w") as f:
+                f.write(payload)
+        else:
+            self.logger.info("metrics %s", payload)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+
+# 进程内默认的指标实例
+METRICS = Metrics()
+
+
+@contextmanager
+def profiled(metrics: Metrics = METRICS, interval: float = 0.005):
+    """在 with 块内开启采样分析器"""
+    profiler = metrics.start_profiler(interval)
+    try:
+        yield profiler
+    finally:
+        metrics.stop_profiler()